@@ -1,18 +1,62 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy import event
 from backend.config import config  # Moved import to top
+from backend.app.admission import AdmissionControl
+from backend.app.idempotency import Idempotency
+from backend.app.jobs import JobRunner
+from backend.app.metrics import Metrics
+from backend.app.profiling import RequestProfiler, SamplingProfiler
+from backend.app.purge import PurgeWorker
+from backend.app.query_counter import QueryCounter
+from backend.app.response_cache import ResponseCache
+from backend.app.slow_query_log import SlowQueryLog
+from backend.app.startup import LazyMigrateGroup, StartupTimer
 
 db = SQLAlchemy()
-migrate = Migrate()
+metrics = Metrics()
+query_counter = QueryCounter()
+slow_query_log = SlowQueryLog()
+profiler = RequestProfiler()
+sampling_profiler = SamplingProfiler()
+admission = AdmissionControl()
+idempotency = Idempotency()
+response_cache = ResponseCache()
+purge_worker = PurgeWorker()
+job_runner = JobRunner()
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores FOREIGN KEY clauses (including ON DELETE CASCADE) unless
+    # enabled on every connection.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
 
 def create_app(config_name="development"):
+    timer = StartupTimer()
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.config["CONFIG_NAME"] = config_name  # For the job runner's processes
+    timer.mark("config")
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            event.listen(db.engine, "connect", _enable_sqlite_foreign_keys)
+    metrics.init_app(app)
+    query_counter.init_app(app)
+    slow_query_log.init_app(app)
+    profiler.init_app(app)
+    sampling_profiler.init_app(app)
+    # Before idempotency, so shed requests never claim a key
+    admission.init_app(app)
+    idempotency.init_app(app)
+    response_cache.init_app(app)
+    purge_worker.init_app(app)
+    job_runner.init_app(app)
+    timer.mark("extensions")
 
     from flask_jwt_extended import JWTManager
 
@@ -29,4 +73,33 @@ def create_app(config_name="development"):
 
     app.register_blueprint(api_bp)
 
+    from .admin.routes import admin_bp
+
+    app.register_blueprint(admin_bp)
+    timer.mark("blueprints")
+
+    from .commands import (
+        flow_rollup_command,
+        loadgen_command,
+        purge_deleted_command,
+        reconcile_counters_command,
+        run_jobs_command,
+        schema_status_command,
+        seed_command,
+        startup_profile_command,
+    )
+
+    # Flask-Migrate/Alembic are only imported when a `flask db` command runs
+    app.cli.add_command(LazyMigrateGroup(db))
+    app.cli.add_command(seed_command)
+    app.cli.add_command(loadgen_command)
+    app.cli.add_command(startup_profile_command)
+    app.cli.add_command(schema_status_command)
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(flow_rollup_command)
+    app.cli.add_command(purge_deleted_command)
+    app.cli.add_command(run_jobs_command)
+    timer.mark("cli")
+    app.extensions["startup"] = timer.summary()
+
     return app
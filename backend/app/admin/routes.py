@@ -0,0 +1,66 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+
+from backend.app import db
+from backend.app.auth.decorators import admin_required
+from backend.app.services import job_service
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
+
+
+@admin_bp.route("/slow-queries", methods=["GET"])
+@admin_required
+def get_slow_queries():
+    slow_query_log = current_app.extensions["slow_query_log"]
+    if slow_query_log.threshold is None:
+        return jsonify({"message": "Slow query logging is disabled"}), 404
+
+    sort = request.args.get("sort", "total")
+    if sort not in ("total", "max", "mean", "count"):
+        return jsonify({"message": "sort must be one of total, max, mean, count"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 200)
+    except ValueError:
+        return jsonify({"message": "limit must be an integer"}), 400
+
+    return (
+        jsonify(
+            {
+                "threshold_ms": slow_query_log.threshold,
+                "sort": sort,
+                "offenders": slow_query_log.top_offenders(limit=limit, sort=sort),
+            }
+        ),
+        200,
+    )
+
+
+@admin_bp.route("/cache", methods=["GET"])
+@admin_required
+def get_cache_stats():
+    backend = current_app.extensions["response_cache"].backend
+    if backend is None:
+        return jsonify({"message": "The response cache is disabled"}), 404
+    return jsonify({"backend": backend.name, **backend.stats()}), 200
+
+
+@admin_bp.route("/jobs", methods=["POST"])
+@admin_required
+def create_job():
+    data = request.get_json(silent=True) or {}
+    params = data.get("params") or {}
+    if not isinstance(params, dict):
+        return jsonify({"message": "params must be an object"}), 400
+    try:
+        job = job_service.enqueue(
+            db.session,
+            data.get("kind"),
+            params,
+            user_id=int(get_jwt_identity()),
+            max_attempts=current_app.config.get("JOBS_MAX_ATTEMPTS", 3),
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    response = jsonify(job.to_dict())
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return response, 202
@@ -0,0 +1,254 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, jsonify, request
+
+from backend.app.auth.identity import request_identity
+
+# Endpoints that are never throttled: health checks and scrapes must keep
+# answering precisely when the API is saturated.
+EXEMPT_ENDPOINTS = frozenset({"metrics", "api.health_check", "static"})
+
+
+def refill(tokens, updated, now, rate, burst):
+    """Tokens in a bucket last seen at ``(tokens, updated)``, as of ``now``."""
+    if tokens is None:
+        return float(burst)
+    return min(float(burst), tokens + max(now - updated, 0.0) * rate)
+
+
+def _admit(states, limits, now):
+    """
+    Takes one token from every bucket in ``limits`` (``[(key, rate, burst)]``)
+    or, if any is empty, from none. ``states`` maps key to ``(tokens,
+    updated)`` and is updated in place. Returns the seconds until all
+    buckets have a token again (0.0 when admitted).
+    """
+    levels = {
+        key: refill(*states.get(key, (None, None)), now, rate, burst)
+        for key, rate, burst in limits
+    }
+    wait = 0.0
+    for key, rate, _ in limits:
+        if levels[key] < 1.0:
+            wait = max(wait, (1.0 - levels[key]) / rate)
+    for key, _, _ in limits:
+        states[key] = (levels[key] - (0.0 if wait else 1.0), now)
+    return wait
+
+
+class MemoryBucketStore:
+    """Token buckets of one worker process, least recently used dropped first."""
+
+    def __init__(self, max_keys=100000, clock=None):
+        self.max_keys = max_keys
+        self.clock = clock or time.monotonic
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, limits):
+        with self._lock:
+            wait = _admit(self._states, limits, self.clock())
+            for key, _, _ in limits:
+                self._states.move_to_end(key)
+            # A dropped bucket is simply full again
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+            return wait
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a SQLite file on local disk, shared by every worker
+    process that opens it. Each ``take`` is one IMMEDIATE transaction, so
+    concurrent workers never spend the same token twice.
+    """
+
+    def __init__(self, path, idle_seconds=3600, clock=None):
+        self.path = path
+        self.idle_seconds = idle_seconds
+        self.clock = clock or time.time
+        self._local = threading.local()
+        self._takes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS token_bucket ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, limits):
+        conn = self._connection()
+        now = self.clock()
+        keys = [key for key, _, _ in limits]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            placeholders = ",".join("?" * len(keys))
+            rows = conn.execute(
+                "SELECT key, tokens, updated FROM token_bucket "
+                f"WHERE key IN ({placeholders})",
+                keys,
+            )
+            states = {key: (tokens, updated) for key, tokens, updated in rows}
+            wait = _admit(states, limits, now)
+            conn.executemany(
+                "INSERT OR REPLACE INTO token_bucket (key, tokens, updated) "
+                "VALUES (?, ?, ?)",
+                [(key, *states[key]) for key in keys],
+            )
+            self._takes += 1
+            if self._takes % 1000 == 0:
+                # Idle buckets have refilled; dropping them changes nothing
+                conn.execute(
+                    "DELETE FROM token_bucket WHERE updated < ?",
+                    (now - self.idle_seconds,),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+class ConcurrencyLimiter:
+    """
+    At most ``limit`` requests in progress per worker; up to ``queue_size``
+    more wait (for at most ``timeout`` seconds) and the rest are turned away
+    immediately.
+    """
+
+    def __init__(self, limit, queue_size, timeout):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            if self.waiting >= self.queue_size:
+                return False
+            self.waiting += 1
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self.active < self.limit, self.timeout
+                )
+            finally:
+                self.waiting -= 1
+            if admitted:
+                self.active += 1
+            return admitted
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+
+def _retry_after(seconds):
+    return str(max(1, math.ceil(seconds)))
+
+
+class AdmissionControl:
+    """
+    Sheds load before it reaches the views.
+
+    Every request takes a token from its caller's bucket (``ADMISSION_USER_RATE``
+    per second, bursts of ``ADMISSION_USER_BURST``) and, for endpoints listed
+    in ``ADMISSION_ROUTE_LIMITS``, from the caller's bucket for that endpoint.
+    Callers are keyed by JWT identity, or by address when unauthenticated. An
+    empty bucket answers 429 at once. Admitted requests then need one of
+    ``ADMISSION_MAX_CONCURRENT`` slots per worker; up to
+    ``ADMISSION_QUEUE_SIZE`` wait ``ADMISSION_QUEUE_TIMEOUT`` seconds for one
+    and the rest get 503. Both carry ``Retry-After``.
+
+    Buckets live in the worker unless ``ADMISSION_STATE_DB`` names a SQLite
+    file that all workers share.
+    """
+
+    def __init__(self, app=None):
+        self.buckets = None
+        self.limiter = None
+        self.user_limit = None
+        self.route_limits = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["admission"] = self
+        if not app.config.get("ADMISSION_CONTROL_ENABLED"):
+            return
+
+        self.user_limit = (
+            app.config.get("ADMISSION_USER_RATE", 20.0),
+            app.config.get("ADMISSION_USER_BURST", 40),
+        )
+        self.route_limits = dict(app.config.get("ADMISSION_ROUTE_LIMITS") or {})
+        path = app.config.get("ADMISSION_STATE_DB")
+        self.buckets = SQLiteBucketStore(path) if path else MemoryBucketStore()
+        self.limiter = ConcurrencyLimiter(
+            app.config.get("ADMISSION_MAX_CONCURRENT", 32),
+            app.config.get("ADMISSION_QUEUE_SIZE", 64),
+            app.config.get("ADMISSION_QUEUE_TIMEOUT", 2.0),
+        )
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _reject(self, status, reason, retry_after):
+        metrics = current_app.extensions.get("metrics")
+        if metrics is not None:
+            metrics.registry.inc(
+                "kanban_admission_rejected_total",
+                (("endpoint", request.endpoint or "unmatched"), ("reason", reason)),
+            )
+        message = (
+            "Too many requests" if status == 429 else "Server busy, try again later"
+        )
+        return jsonify({"message": message}), status, {"Retry-After": retry_after}
+
+    def _before_request(self):
+        if request.endpoint in EXEMPT_ENDPOINTS:
+            return None
+        identity = request_identity()
+        caller = (
+            f"user:{identity}"
+            if identity is not None
+            else (f"addr:{request.remote_addr}")
+        )
+        limits = [(caller, *self.user_limit)]
+        route_limit = self.route_limits.get(request.endpoint)
+        if route_limit is not None:
+            limits.append((f"{caller}:{request.endpoint}", *route_limit))
+        wait = self.buckets.take(limits)
+        if wait:
+            return self._reject(429, "rate_limited", _retry_after(wait))
+
+        if not self.limiter.acquire():
+            return self._reject(503, "overloaded", _retry_after(1))
+        g._admission_slot = request._get_current_object()
+        return None
+
+    def _teardown_request(self, exc):
+        # The operations of a /api/batch request run in nested request
+        # contexts sharing its g; only the batch request itself frees its slot
+        if g.get("_admission_slot") is request._get_current_object():
+            del g._admission_slot
+            self.limiter.release()
@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.app.models import (
     User,
@@ -9,14 +9,47 @@ from backend.app.models import (
     Comment,
     ActivityLog,
     Tag,
+    Job,
 )  # Import all models
 from backend.app import db  # Import db
-from datetime import datetime  # For due_date parsing
+from backend.app.pagination import decode_cursor, encode_cursor, page_size
+from backend.app.response_cache import cached_json
+from datetime import datetime, timedelta  # For due_date parsing
+from backend.app.services import (
+    activity_service,
+    counter_service,
+    job_service,
+    tag_service,
+)
+from backend.app.services.batch_service import run_batch
+from backend.app.services.clone_service import clone_project
 from backend.app.services.activity_service import record_activity
-from sqlalchemy.exc import IntegrityError
+from backend.app.services.flow_service import flow_metrics, refresh_project
+from backend.app.services.my_tasks_service import my_tasks
+from backend.app.services.project_list_service import project_page
+from backend.app.services.stats_service import project_stats
+from sqlalchemy.exc import IntegrityError, OperationalError
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
+# Task fields whose changes TASK_UPDATED entries record
+TASK_LOGGED_FIELDS = ("content", "assignee", "priority", "order", "due_date")
+
+
+def _live(obj):
+    """``obj``, or None when it is missing or soft-deleted (itself or an ancestor)."""
+    return obj if obj is not None and not obj.is_deleted else None
+
+
+def _restore_error(obj, label):
+    """The error response for restoring ``obj``, or None if it can be restored."""
+    if obj.deleted_at is None:
+        return jsonify({"message": f"{label} is not deleted"}), 409
+    grace = timedelta(seconds=current_app.config.get("PURGE_GRACE_SECONDS", 604800))
+    if obj.deleted_at <= datetime.utcnow() - grace:
+        return jsonify({"message": f"{label} can no longer be restored"}), 410
+    return None
+
 
 @api_bp.route("/health", methods=["GET"])
 def health_check():
@@ -56,27 +89,91 @@ def create_project():
     db.session.add(project)
     db.session.commit()
 
-    user = User.query.get(current_user_id_int)  # Use int
     record_activity(
         action_type="PROJECT_CREATED",
-        description=f"User '{user.username}' created project '{project.name}'",
         user_id=current_user_id_int,  # Use int
         project_id=project.id,
     )
     return jsonify(project.to_dict()), 201
 
 
+@api_bp.route("/projects/<int:project_id>/clone", methods=["POST"])
+@jwt_required()
+def clone_project_route(project_id):
+    current_user_id_int = int(get_jwt_identity())
+    project = _live(Project.query.get(project_id))
+
+    if not project:
+        return jsonify({"message": "Project not found"}), 404
+    if project.user_id != current_user_id_int:
+        return jsonify({"message": "Access forbidden"}), 403
+
+    data = request.get_json(silent=True) or {}
+    options = {}
+    for option, default in (
+        ("include_tasks", True),
+        ("include_subtasks", True),
+        ("include_tags", True),
+        ("reset_due_dates", False),
+    ):
+        value = data.get(option, default)
+        if not isinstance(value, bool):
+            return jsonify({"message": f"{option} must be a boolean"}), 400
+        options[option] = value
+    name = (data.get("name") or "").strip() or f"{project.name} (copy)"
+    description = data.get("description")
+
+    new_project_id, copied = clone_project(
+        db.session.connection(),
+        project.id,
+        current_user_id_int,
+        name[:100],
+        description=description.strip() if isinstance(description, str) else None,
+        **options,
+    )
+    db.session.commit()
+
+    record_activity(
+        action_type="PROJECT_CREATED",
+        user_id=current_user_id_int,
+        project_id=new_project_id,
+        details={"source_project_id": project.id, "copied": copied},
+    )
+    data = db.session.get(Project, new_project_id).to_dict()
+    data["copied"] = copied
+    return jsonify(data), 201
+
+
 @api_bp.route("/projects", methods=["GET"])
 @jwt_required()
 def get_projects():
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    projects = (
-        Project.query.filter_by(user_id=current_user_id_int)  # Use int
-        .order_by(Project.created_at.desc())
-        .all()
+    cursor = None
+    if request.args.get("cursor"):
+        try:
+            cursor = decode_cursor(request.args["cursor"], 2)
+        except ValueError:
+            return jsonify({"message": "Invalid cursor"}), 400
+    include = request.args.get("include", "").split(",")
+
+    rows, has_more = project_page(
+        current_user_id_int,
+        limit=page_size(request.args.get("limit", type=int)),
+        cursor=cursor,
+        with_counts="counts" in include,
     )
-    return jsonify([project.to_dict() for project in projects]), 200
+    projects = []
+    for project, counts in rows:
+        data = project.to_dict()
+        if counts is not None:
+            data["counts"] = counts
+        projects.append(data)
+    response = jsonify(projects)
+    if has_more:
+        last = rows[-1][0]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return response, 200
 
 
 @api_bp.route("/projects/<int:project_id>", methods=["GET"])
@@ -84,15 +181,81 @@ def get_projects():
 def get_project(project_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    project = Project.query.get(project_id)
+    project = _live(Project.query.get(project_id))
 
     if not project:
         return jsonify({"message": "Project not found"}), 404
     if project.user_id != current_user_id_int:  # Use int
         return jsonify({"message": "Access forbidden"}), 403
 
-    # Optionally include stages and tasks by default if useful
-    return jsonify(project.to_dict(include_stages=True)), 200
+    # Cards carry subtask progress from the task counters; the subtasks
+    # themselves are fetched per task, when a card is opened
+    if request.args.get("include_tasks", "").lower() == "true":
+        return cached_json(
+            "board-tasks",
+            project,
+            lambda: project.to_dict(include_stages=True, include_tasks=True),
+        )
+    return cached_json("board", project, lambda: project.to_dict(include_stages=True))
+
+
+def _due_soon_days():
+    value = request.args.get("due_soon_days", 7, type=int)
+    return min(max(value, 0), 365)
+
+
+@api_bp.route("/projects/<int:project_id>/stats", methods=["GET"])
+@jwt_required()
+def get_project_stats(project_id):
+    current_user_id_int = int(get_jwt_identity())
+    project = _live(Project.query.get(project_id))
+
+    if not project:
+        return jsonify({"message": "Project not found"}), 404
+    if project.user_id != current_user_id_int:
+        return jsonify({"message": "Access forbidden"}), 403
+
+    stats = project_stats([project.id], due_soon_days=_due_soon_days())
+    return jsonify(stats[project.id]), 200
+
+
+@api_bp.route("/projects/stats", methods=["GET"])
+@jwt_required()
+def get_projects_stats():
+    current_user_id_int = int(get_jwt_identity())
+    project_ids = [
+        project_id
+        for (project_id,) in db.session.query(Project.id)
+        .filter_by(user_id=current_user_id_int)
+        .filter(Project.deleted_at.is_(None))
+        .order_by(Project.created_at.desc())
+    ]
+    stats = project_stats(project_ids, due_soon_days=_due_soon_days())
+    return jsonify([stats[project_id] for project_id in project_ids]), 200
+
+
+@api_bp.route("/projects/<int:project_id>/flow", methods=["GET"])
+@jwt_required()
+def get_project_flow(project_id):
+    current_user_id_int = int(get_jwt_identity())
+    project = _live(Project.query.get(project_id))
+
+    if not project:
+        return jsonify({"message": "Project not found"}), 404
+    if project.user_id != current_user_id_int:
+        return jsonify({"message": "Access forbidden"}), 403
+
+    days = min(max(request.args.get("days", 90, type=int), 1), 365)
+    # Fold in activity newer than the rollup watermark before reading it.
+    try:
+        refresh_project(db.session.connection(), project.id)
+        db.session.commit()
+    except OperationalError:
+        # The database stayed locked by other writers; a read still answers,
+        # from the rollups as they are, and the next one catches up
+        db.session.rollback()
+        current_app.logger.warning("Flow rollup of project %s skipped", project.id)
+    return jsonify(flow_metrics(db.session.connection(), project.id, days=days)), 200
 
 
 @api_bp.route("/projects/<int:project_id>", methods=["PUT"])
@@ -100,7 +263,7 @@ def get_project(project_id):
 def update_project(project_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    project = Project.query.get(project_id)
+    project = _live(Project.query.get(project_id))
 
     if not project:
         return jsonify({"message": "Project not found"}), 404
@@ -120,6 +283,7 @@ def update_project(project_id):
         updated = True
 
     if updated:
+        counter_service.project_changed(project.id)
         db.session.commit()
     return jsonify(project.to_dict()), 200
 
@@ -129,18 +293,45 @@ def update_project(project_id):
 def delete_project(project_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    project = Project.query.get(project_id)
+    project = _live(Project.query.get(project_id))
 
     if not project:
         return jsonify({"message": "Project not found"}), 404
     if project.user_id != current_user_id_int:  # Use int
         return jsonify({"message": "Access forbidden"}), 403
 
-    db.session.delete(project)
+    # O(1): the purge worker removes the project's rows after the grace period
+    project.deleted_at = datetime.utcnow()
     db.session.commit()
     return "", 204
 
 
+@api_bp.route("/projects/<int:project_id>/restore", methods=["POST"])
+@jwt_required()
+def restore_project(project_id):
+    current_user_id_int = int(get_jwt_identity())
+    project = Project.query.get(project_id)
+
+    if not project:
+        return jsonify({"message": "Project not found"}), 404
+    if project.user_id != current_user_id_int:
+        return jsonify({"message": "Access forbidden"}), 403
+    error = _restore_error(project, "Project")
+    if error:
+        return error
+
+    project.deleted_at = None
+    counter_service.project_changed(project.id)
+    db.session.commit()
+
+    record_activity(
+        action_type="PROJECT_RESTORED",
+        user_id=current_user_id_int,
+        project_id=project.id,
+    )
+    return jsonify(project.to_dict()), 200
+
+
 # === Stage Endpoints ===
 
 
@@ -149,7 +340,7 @@ def delete_project(project_id):
 def create_stage(project_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    project = Project.query.get(project_id)
+    project = _live(Project.query.get(project_id))
 
     if not project:
         return jsonify({"message": "Project not found"}), 404
@@ -165,6 +356,7 @@ def create_stage(project_id):
 
     stage = Stage(name=name, project_id=project.id, order=order)
     db.session.add(stage)
+    counter_service.project_changed(project.id)
     db.session.commit()
     return jsonify(stage.to_dict()), 201
 
@@ -174,19 +366,22 @@ def create_stage(project_id):
 def get_stages_for_project(project_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    project = Project.query.get(project_id)
+    project = _live(Project.query.get(project_id))
 
     if not project:
         return jsonify({"message": "Project not found"}), 404
     if project.user_id != current_user_id_int:  # Use int
         return jsonify({"message": "Access forbidden to this project"}), 403
 
-    stages = (
-        Stage.query.filter_by(project_id=project.id)
-        .order_by(Stage.order, Stage.created_at)
-        .all()
-    )
-    return jsonify([stage.to_dict() for stage in stages]), 200
+    def build():
+        stages = (
+            Stage.query.filter_by(project_id=project.id, deleted_at=None)
+            .order_by(Stage.order, Stage.created_at)
+            .all()
+        )
+        return [stage.to_dict() for stage in stages]
+
+    return cached_json("stages", project, build)
 
 
 @api_bp.route("/stages/<int:stage_id>", methods=["PUT"])
@@ -194,7 +389,7 @@ def get_stages_for_project(project_id):
 def update_stage(stage_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    stage = Stage.query.get(stage_id)
+    stage = _live(Stage.query.get(stage_id))
 
     if not stage:
         return jsonify({"message": "Stage not found"}), 404
@@ -217,6 +412,7 @@ def update_stage(stage_id):
     # If 'project_id' were allowed, further checks for the new project's ownership would be needed.
 
     if updated:
+        counter_service.project_changed(stage.project_id)
         db.session.commit()
     return jsonify(stage.to_dict()), 200
 
@@ -226,7 +422,7 @@ def update_stage(stage_id):
 def delete_stage(stage_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    stage = Stage.query.get(stage_id)
+    stage = _live(Stage.query.get(stage_id))
 
     if not stage:
         return jsonify({"message": "Stage not found"}), 404
@@ -235,11 +431,50 @@ def delete_stage(stage_id):
     ):  # Check ownership via project # Use int
         return jsonify({"message": "Access forbidden to this stage"}), 403
 
-    db.session.delete(stage)
+    counter_service.stage_removed(stage)
+    counter_service.project_changed(stage.project_id)
+    stage_name = stage.name
+    project_id = stage.project_id
+    stage.deleted_at = datetime.utcnow()
     db.session.commit()
+
+    record_activity(
+        action_type="STAGE_DELETED",
+        user_id=current_user_id_int,
+        project_id=project_id,
+        details={"stage_id": stage_id, "stage": stage_name},
+    )
     return "", 204
 
 
+@api_bp.route("/stages/<int:stage_id>/restore", methods=["POST"])
+@jwt_required()
+def restore_stage(stage_id):
+    current_user_id_int = int(get_jwt_identity())
+    stage = Stage.query.get(stage_id)
+
+    if not stage or stage.project.is_deleted:
+        return jsonify({"message": "Stage not found"}), 404
+    if stage.project.user_id != current_user_id_int:
+        return jsonify({"message": "Access forbidden to this stage"}), 403
+    error = _restore_error(stage, "Stage")
+    if error:
+        return error
+
+    stage.deleted_at = None
+    counter_service.stage_restored(stage)
+    counter_service.project_changed(stage.project_id)
+    db.session.commit()
+
+    record_activity(
+        action_type="STAGE_RESTORED",
+        user_id=current_user_id_int,
+        project_id=stage.project_id,
+        details={"stage_id": stage.id},
+    )
+    return jsonify(stage.to_dict()), 200
+
+
 # === Task Endpoints ===
 
 
@@ -248,7 +483,7 @@ def delete_stage(stage_id):
 def create_task(stage_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    stage = Stage.query.get(stage_id)
+    stage = _live(Stage.query.get(stage_id))
 
     if not stage:
         return jsonify({"message": "Stage not found"}), 404
@@ -291,18 +526,16 @@ def create_task(stage_id):
         order=order,
     )
     db.session.add(task)
+    counter_service.task_added(stage)
+    counter_service.project_changed(stage.project_id)
     db.session.commit()
 
-    user = User.query.get(current_user_id_int)  # Use int
     record_activity(
         action_type="TASK_CREATED",
-        description=(
-            f"User '{user.username}' created task '{task.content[:30]}...' "
-            f"in stage '{stage.name}'"
-        ),
         user_id=current_user_id_int,  # Use int
         project_id=stage.project_id,
         task_id=task.id,
+        details={"stage_id": stage.id},
     )
     return jsonify(task.to_dict()), 201
 
@@ -312,7 +545,7 @@ def create_task(stage_id):
 def get_tasks_for_stage(stage_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    stage = Stage.query.get(stage_id)
+    stage = _live(Stage.query.get(stage_id))
 
     if not stage:
         return jsonify({"message": "Stage not found"}), 404
@@ -320,7 +553,7 @@ def get_tasks_for_stage(stage_id):
         return jsonify({"message": "Access forbidden to this stage"}), 403
 
     tasks = (
-        Task.query.filter_by(stage_id=stage.id)
+        Task.query.filter_by(stage_id=stage.id, deleted_at=None)
         .order_by(Task.order, Task.created_at)
         .all()
     )
@@ -332,7 +565,7 @@ def get_tasks_for_stage(stage_id):
 def get_task(task_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Task not found"}), 404
@@ -347,7 +580,7 @@ def get_task(task_id):
 def update_task(task_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Task not found"}), 404
@@ -358,19 +591,15 @@ def update_task(task_id):
     if not data:
         return jsonify({"message": "No input data provided"}), 400
 
-    updated = False
+    before = {field: getattr(task, field) for field in TASK_LOGGED_FIELDS}
     if "content" in data and data["content"].strip():
         task.content = data["content"].strip()
-        updated = True
     if "assignee" in data:
         task.assignee = data["assignee"].strip()
-        updated = True
     if "priority" in data:
         task.priority = data["priority"].strip()
-        updated = True
     if "order" in data:
         task.order = data["order"]
-        updated = True
     if "due_date" in data:
         due_date_str = data.get("due_date")
         if due_date_str:
@@ -390,30 +619,56 @@ def update_task(task_id):
                 )
         else:  # Allow clearing due_date
             task.due_date = None
-        updated = True
 
+    details = {}
+    project_id = task.stage.project_id  # Logs a move where the task was
     if "stage_id" in data:
         new_stage_id = data["stage_id"]
         if new_stage_id != task.stage_id:
-            new_stage = Stage.query.get(new_stage_id)
+            new_stage = _live(Stage.query.get(new_stage_id))
             if not new_stage:
                 return jsonify({"message": "New stage not found"}), 404
             if new_stage.project.user_id != current_user_id_int:  # Use int
                 return jsonify({"message": "Access forbidden to new stage"}), 403
+            counter_service.task_moved(task.stage, new_stage)
+            counter_service.project_changed(task.stage.project_id)
+            details = {
+                "from_stage_id": task.stage_id,
+                "to_stage_id": new_stage.id,
+            }
+            if new_stage.project_id != task.stage.project_id:
+                counter_service.project_changed(new_stage.project_id)
+                # Each project logs its side of the move, so both flow
+                # rollups see the task leave or arrive
+                details["to_project_id"] = new_stage.project_id
+                db.session.add(
+                    ActivityLog(
+                        action_type="TASK_UPDATED",
+                        user_id=current_user_id_int,
+                        project_id=new_stage.project_id,
+                        task_id=task.id,
+                        details={
+                            "from_stage_id": task.stage_id,
+                            "to_stage_id": new_stage.id,
+                            "from_project_id": project_id,
+                        },
+                    )
+                )
             task.stage_id = new_stage_id
-            updated = True
 
-    if updated:
-        db.session.commit()
-        user = User.query.get(current_user_id_int)  # Use int
+    changes = activity_service.field_changes(
+        before, {field: getattr(task, field) for field in TASK_LOGGED_FIELDS}
+    )
+    if changes:
+        details["changes"] = changes
+    if details:
+        # Commits the update together with its (possibly merged) log entry
         record_activity(
             action_type="TASK_UPDATED",
-            description=(
-                f"User '{user.username}' updated task " f"'{task.content[:30]}...'"
-            ),
             user_id=current_user_id_int,  # Use int
-            project_id=task.stage.project.id,
+            project_id=project_id,
             task_id=task.id,
+            details=details,
         )
     return jsonify(task.to_dict()), 200
 
@@ -423,21 +678,14 @@ def update_task(task_id):
 def delete_task(task_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Task not found"}), 404
     if task.stage.project.user_id != current_user_id_int:  # Use int
         return jsonify({"message": "Access forbidden to this task"}), 403
 
-    # Explicitly fetch user and details needed for the log before any delete operation
-    user_for_log = User.query.get(current_user_id_int)
-    if not user_for_log:
-        # Fallback or error if user somehow not found, though JWT should protect this
-        log_username = "Unknown User"
-    else:
-        log_username = user_for_log.username
-
+    # Fetch the details needed for the log before any delete operation
     task_content_for_log = task.content
     stage_name_for_log = task.stage.name
     project_id_for_log = task.stage.project.id
@@ -446,19 +694,108 @@ def delete_task(task_id):
     # Record activity before deleting the task
     record_activity(
         action_type="TASK_DELETED",
-        description=(
-            f"User '{log_username}' deleted task "
-            f"'{task_content_for_log[:30]}...' from stage '{stage_name_for_log}'"
-        ),
         user_id=current_user_id_int,
         project_id=project_id_for_log,
         task_id=task_id_for_log,
+        # Snapshots for the description once the task is purged
+        details={
+            "stage_id": task.stage_id,
+            "task": task_content_for_log[:30],
+            "stage": stage_name_for_log,
+        },
     )
-    db.session.delete(task)
+    counter_service.task_removed(task)
+    counter_service.project_changed(project_id_for_log)
+    task.deleted_at = datetime.utcnow()
     db.session.commit()
     return "", 204
 
 
+@api_bp.route("/tasks/<int:task_id>/restore", methods=["POST"])
+@jwt_required()
+def restore_task(task_id):
+    current_user_id_int = int(get_jwt_identity())
+    task = Task.query.get(task_id)
+
+    if not task or task.stage.project.is_deleted:
+        return jsonify({"message": "Task not found"}), 404
+    if task.stage.project.user_id != current_user_id_int:
+        return jsonify({"message": "Access forbidden to this task"}), 403
+    error = _restore_error(task, "Task")
+    if error:
+        return error
+    if task.stage.deleted_at is not None:
+        return jsonify({"message": "Restore the task's stage first"}), 409
+
+    task.deleted_at = None
+    counter_service.task_added(task.stage)
+    counter_service.project_changed(task.stage.project_id)
+    db.session.commit()
+
+    record_activity(
+        action_type="TASK_RESTORED",
+        user_id=current_user_id_int,
+        project_id=task.stage.project_id,
+        task_id=task.id,
+        details={"stage_id": task.stage_id},
+    )
+    return jsonify(task.to_dict()), 200
+
+
+@api_bp.route("/me/tasks", methods=["GET"])
+@jwt_required()
+def get_my_tasks():
+    current_user_id_int = int(get_jwt_identity())
+
+    bounds = {}
+    for name in ("due_after", "due_before"):
+        value = request.args.get(name)
+        if value:
+            try:
+                bounds[name] = datetime.fromisoformat(value)
+            except ValueError:
+                return (
+                    jsonify({"message": f"Invalid {name} format. Use ISO format."}),
+                    400,
+                )
+    cursor = None
+    if request.args.get("cursor"):
+        try:
+            cursor = decode_cursor(request.args["cursor"], 2)
+        except ValueError:
+            return jsonify({"message": "Invalid cursor"}), 400
+
+    assignee = request.args.get("assignee")
+    if not assignee:
+        assignee = User.query.get(current_user_id_int).username
+    limit = page_size(request.args.get("limit", type=int))
+    rows, has_more = my_tasks(
+        current_user_id_int,
+        assignee,
+        priority=request.args.get("priority") or None,
+        limit=limit,
+        cursor=cursor,
+        **bounds,
+    )
+
+    tasks = []
+    for task, stage_name, project_id, project_name in rows:
+        data = task.to_dict()
+        data.update(
+            {
+                "stage_name": stage_name,
+                "project_id": project_id,
+                "project_name": project_name,
+            }
+        )
+        tasks.append(data)
+    response = jsonify(tasks)
+    if has_more:
+        last = rows[-1][0]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.due_date, last.id)
+    return response, 200
+
+
 # === SubTask Endpoints ===
 
 
@@ -467,7 +804,7 @@ def delete_task(task_id):
 def create_subtask(task_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Parent task not found"}), 404
@@ -495,6 +832,8 @@ def create_subtask(task_id):
         order=order,
     )
     db.session.add(subtask)
+    counter_service.subtask_added(task.id, completed)
+    counter_service.project_changed(task.stage.project_id)  # Card progress
     db.session.commit()
     return jsonify(subtask.to_dict()), 201
 
@@ -504,7 +843,7 @@ def create_subtask(task_id):
 def get_subtasks_for_task(task_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Parent task not found"}), 404
@@ -526,7 +865,7 @@ def update_subtask(subtask_id):
     current_user_id_int = int(current_user_id)  # Added int conversion
     subtask = SubTask.query.get(subtask_id)
 
-    if not subtask:
+    if not subtask or subtask.parent_task.is_deleted:
         return jsonify({"message": "SubTask not found"}), 404
     if subtask.parent_task.stage.project.user_id != current_user_id_int:  # Use int
         return jsonify({"message": "Access forbidden to this subtask"}), 403
@@ -536,6 +875,7 @@ def update_subtask(subtask_id):
         return jsonify({"message": "No input data provided"}), 400
 
     updated = False
+    was_completed = subtask.completed
     if "content" in data and data["content"].strip():
         subtask.content = data["content"].strip()
         updated = True
@@ -556,6 +896,8 @@ def update_subtask(subtask_id):
     # For V1, not allowing moving subtask to another parent task via this endpoint.
 
     if updated:
+        counter_service.subtask_completed_changed(subtask, was_completed)
+        counter_service.project_changed(subtask.parent_task.stage.project_id)
         db.session.commit()
     return jsonify(subtask.to_dict()), 200
 
@@ -567,11 +909,13 @@ def delete_subtask(subtask_id):
     current_user_id_int = int(current_user_id)  # Added int conversion
     subtask = SubTask.query.get(subtask_id)
 
-    if not subtask:
+    if not subtask or subtask.parent_task.is_deleted:
         return jsonify({"message": "SubTask not found"}), 404
     if subtask.parent_task.stage.project.user_id != current_user_id_int:  # Use int
         return jsonify({"message": "Access forbidden to this subtask"}), 403
 
+    counter_service.subtask_removed(subtask)
+    counter_service.project_changed(subtask.parent_task.stage.project_id)
     db.session.delete(subtask)
     db.session.commit()
     return "", 204
@@ -585,7 +929,7 @@ def delete_subtask(subtask_id):
 def create_comment(task_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Task not found"}), 404
@@ -602,14 +946,11 @@ def create_comment(task_id):
         content=content, task_id=task.id, user_id=current_user_id_int
     )  # Use int
     db.session.add(comment)
+    counter_service.comment_added(task.id)
     db.session.commit()
 
-    user = User.query.get(current_user_id_int)  # Use int
     record_activity(
         action_type="COMMENT_ADDED",
-        description=(
-            f"User '{user.username}' commented on task " f"'{task.content[:30]}...'"
-        ),
         user_id=current_user_id_int,  # Use int
         project_id=task.stage.project.id,
         task_id=task.id,
@@ -622,7 +963,7 @@ def create_comment(task_id):
 def get_comments_for_task(task_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Task not found"}), 404
@@ -645,19 +986,22 @@ def get_comments_for_task(task_id):
 def get_project_activities(project_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    project = Project.query.get(project_id)
+    project = _live(Project.query.get(project_id))
 
     if not project:
         return jsonify({"message": "Project not found"}), 404
     if project.user_id != current_user_id_int:  # Use int
         return jsonify({"message": "Access forbidden to this project"}), 403
 
-    activities = (
-        ActivityLog.query.filter_by(project_id=project_id)
-        .order_by(ActivityLog.created_at.desc())
-        .all()
-    )
-    return jsonify([activity.to_dict() for activity in activities]), 200
+    def build():
+        activities = (
+            ActivityLog.query.filter_by(project_id=project_id)
+            .order_by(ActivityLog.created_at.desc())
+            .all()
+        )
+        return activity_service.activity_dicts(db.session, activities)
+
+    return cached_json("activities", project, build)
 
 
 @api_bp.route("/tasks/<int:task_id>/activities", methods=["GET"])
@@ -665,7 +1009,7 @@ def get_project_activities(project_id):
 def get_task_activities(task_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Task not found"}), 404
@@ -679,7 +1023,7 @@ def get_task_activities(task_id):
         .order_by(ActivityLog.created_at.desc())
         .all()
     )
-    return jsonify([activity.to_dict() for activity in activities]), 200
+    return jsonify(activity_service.activity_dicts(db.session, activities)), 200
 
 
 # === Tag Endpoints ===
@@ -688,8 +1032,14 @@ def get_task_activities(task_id):
 @api_bp.route("/tags", methods=["GET"])
 @jwt_required()
 def get_tags():
-    tags = Tag.query.order_by(Tag.name).all()
-    return jsonify([tag.to_dict() for tag in tags]), 200
+    etag, body = tag_service.tag_list_memo.get(
+        current_app.config.get("TAGS_GENERATION_CHECK_INTERVAL", 1.0)
+    )
+    response = current_app.response_class(body, mimetype=current_app.json.mimetype)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get("TAGS_MAX_AGE", 60)
+    return response.make_conditional(request)  # 304 when If-None-Match matches
 
 
 @api_bp.route("/tags", methods=["POST"])
@@ -712,6 +1062,7 @@ def create_tag():
     tag = Tag(name=name)
     db.session.add(tag)
     try:
+        tag_service.tags_changed()
         db.session.commit()
     except IntegrityError:  # Handles potential race conditions if another request creates the same tag
         db.session.rollback()
@@ -728,7 +1079,7 @@ def create_tag():
 def add_tag_to_task(task_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Task not found"}), 404
@@ -764,6 +1115,7 @@ def add_tag_to_task(task_id):
             db.session.add(tag_to_add)
             try:
                 db.session.flush()  #  Attempt to get ID and check constraints before full commit
+                tag_service.tags_changed()
             except IntegrityError:
                 db.session.rollback()
                 # Re-fetch in case of race condition or if the DB's collation caused an issue not caught by lower().
@@ -803,14 +1155,10 @@ def add_tag_to_task(task_id):
         # The main session commit for task-tag association happens after.
         record_activity(
             action_type="TAG_ADDED_TO_TASK",
-            description=(
-                f"User '{user.username}' added tag '{tag_to_add.name}' "
-                f"to task '{task.content[:30]}...'"
-            ),
             user_id=current_user_id_int,
             project_id=task.stage.project.id,
             task_id=task.id,
-            details={"tag_id": tag_to_add.id, "tag_name": tag_to_add.name}
+            details={"tag_id": tag_to_add.id},
         )
         db.session.commit()  # Commit task-tag association
     except IntegrityError:
@@ -824,7 +1172,7 @@ def add_tag_to_task(task_id):
 def remove_tag_from_task(task_id, tag_id):
     current_user_id = get_jwt_identity()
     current_user_id_int = int(current_user_id)  # Added int conversion
-    task = Task.query.get(task_id)
+    task = _live(Task.query.get(task_id))
 
     if not task:
         return jsonify({"message": "Task not found"}), 404
@@ -850,13 +1198,63 @@ def remove_tag_from_task(task_id, tag_id):
 
     record_activity(
         action_type="TAG_REMOVED_FROM_TASK",
-        description=(
-            f"User '{user.username}' removed tag '{tag_to_remove.name}' "
-            f"from task '{task.content[:30]}...'"  # Content might be stale if task was updated then tag removed
-        ),
         user_id=current_user_id_int,
         project_id=task.stage.project.id,
         task_id=task.id,
+        details={"tag_id": tag_to_remove.id},
     )
     db.session.commit()  # Commits tag removal and activity log
     return "", 204
+
+
+# === Job Endpoints ===
+
+
+@api_bp.route("/jobs/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    current_user_id_int = int(get_jwt_identity())
+    job = db.session.get(Job, job_id)
+
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+    if job.user_id != current_user_id_int:
+        return jsonify({"message": "Access forbidden to this job"}), 403
+    return jsonify(job.to_dict()), 200
+
+
+@api_bp.route("/jobs/<int:job_id>/cancel", methods=["POST"])
+@jwt_required()
+def cancel_job(job_id):
+    current_user_id_int = int(get_jwt_identity())
+    job = db.session.get(Job, job_id)
+
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+    if job.user_id != current_user_id_int:
+        return jsonify({"message": "Access forbidden to this job"}), 403
+    if not job_service.request_cancel(db.session, job):
+        return jsonify({"message": f"Job has already {job.status}"}), 409
+    return jsonify(job.to_dict()), 200
+
+
+# === Batch Endpoint ===
+
+
+@api_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def batch():
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"message": "operations must be a non-empty list"}), 400
+    limit = current_app.config["BATCH_MAX_OPERATIONS"]
+    if len(operations) > limit:
+        return jsonify({"message": f"At most {limit} operations per batch"}), 400
+
+    headers = {"Authorization": request.headers["Authorization"]}
+    failed, results = run_batch(operations, headers)
+    if failed is not None:
+        body = {"committed": False, "failed": failed, "results": results}
+        return jsonify(body), results[failed]["status"]
+    return jsonify({"committed": True, "results": results}), 200
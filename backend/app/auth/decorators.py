@@ -0,0 +1,24 @@
+from functools import wraps
+
+from flask import current_app, jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from backend.app import db
+from backend.app.models import User
+
+
+def admin_required(fn):
+    """
+    Requires a JWT whose user is listed (by email) in the ADMIN_EMAILS config.
+    """
+
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        user = db.session.get(User, int(get_jwt_identity()))
+        admins = current_app.config.get("ADMIN_EMAILS") or []
+        if not user or user.email not in admins:
+            return jsonify({"message": "Admin access required"}), 403
+        return fn(*args, **kwargs)
+
+    return wrapper
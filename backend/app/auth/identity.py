@@ -0,0 +1,18 @@
+from flask import g
+
+
+def request_identity():
+    """
+    The JWT identity of the current request, or None when it carries no
+    valid token (the view then rejects it itself). Verified once per request,
+    so request hooks can call this before the view's @jwt_required.
+    """
+    if "_request_identity" not in g:
+        from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+        try:
+            verify_jwt_in_request(optional=True)
+            g._request_identity = get_jwt_identity()
+        except Exception:
+            g._request_identity = None
+    return g._request_identity
@@ -0,0 +1,407 @@
+import subprocess
+import time
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import create_engine
+
+from backend.app import db
+
+
+@click.command("seed")
+@click.option(
+    "--database",
+    default=None,
+    help="SQLite file to fill. Defaults to the app database.",
+)
+@click.option(
+    "--projects", default=100, show_default=True, help="Number of projects to generate."
+)
+@click.option(
+    "--users", default=50, show_default=True, help="Number of users to generate."
+)
+@click.option(
+    "--tags", default=40, show_default=True, help="Size of the shared tag pool."
+)
+@click.option("--stages", default=None, help="Stages per project, e.g. uniform:3:7.")
+@click.option("--tasks", default=None, help="Tasks per stage, e.g. uniform:20:120.")
+@click.option(
+    "--content-length", default=None, help="Task content length, e.g. normal:80:40."
+)
+@click.option(
+    "--tags-per-task", default=None, help="Tag fan-out per task, e.g. uniform:0:3."
+)
+@click.option("--subtasks", default=None, help="Subtasks per task, e.g. uniform:0:5.")
+@click.option(
+    "--comments", default=None, help="Comment depth per task, e.g. zipf:1.6:12."
+)
+@click.option("--activities", default=None, help="Extra TASK_UPDATED entries per task.")
+@click.option(
+    "--days",
+    default=365,
+    show_default=True,
+    help="Spread timestamps over this many days.",
+)
+@click.option(
+    "--workers",
+    default=None,
+    type=int,
+    help="Generator processes. Defaults to CPU count.",
+)
+@click.option(
+    "--batch-size", default=5000, show_default=True, help="Rows per executemany INSERT."
+)
+@click.option(
+    "--seed",
+    "random_seed",
+    default=None,
+    type=int,
+    help="Seed for reproducible output.",
+)
+@with_appcontext
+def seed_command(
+    database,
+    projects,
+    users,
+    tags,
+    stages,
+    tasks,
+    content_length,
+    tags_per_task,
+    subtasks,
+    comments,
+    activities,
+    days,
+    workers,
+    batch_size,
+    random_seed,
+):
+    """Generate a production-scale fixture database."""
+    from backend.app.services.seed_service import seed_database
+
+    options = {
+        "stages": stages,
+        "tasks": tasks,
+        "content_length": content_length,
+        "tags": tags_per_task,
+        "subtasks": subtasks,
+        "comments": comments,
+        "activities": activities,
+    }
+    spec = {name: value for name, value in options.items() if value is not None}
+
+    engine = create_engine(f"sqlite:///{database}") if database else db.engine
+    if engine.dialect.name != "sqlite" or not engine.url.database:
+        raise click.UsageError("flask seed requires a file-based SQLite database.")
+
+    started = time.perf_counter()
+    try:
+        totals = seed_database(
+            engine,
+            projects=projects,
+            users=users,
+            tags=tags,
+            workers=workers,
+            seed=random_seed,
+            days=days,
+            batch_size=batch_size,
+            spec=spec,
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    elapsed = time.perf_counter() - started
+
+    for table_name, count in sorted(totals.items()):
+        click.echo(f"{table_name:>14}: {count}")
+    click.echo(f"Seeded {engine.url.database} in {elapsed:.1f}s")
+
+
+@click.command("loadgen")
+@click.option(
+    "--url",
+    default="http://127.0.0.1:5000",
+    show_default=True,
+    help="Base URL of the running backend.",
+)
+@click.option("--users", default=10, show_default=True, help="Concurrent users.")
+@click.option(
+    "--duration", default=30.0, show_default=True, help="Seconds to generate load."
+)
+@click.option(
+    "--mix",
+    default=None,
+    help="Operation weights, e.g. open_board=40,drag_task=20,add_comment=15.",
+)
+@click.option(
+    "--think-time",
+    default=0.0,
+    show_default=True,
+    help="Mean pause (s) between a user's requests.",
+)
+@click.option(
+    "--password",
+    default="loadgen-password",
+    show_default=True,
+    help="Password of the synthetic users.",
+)
+@click.option("--seed", "random_seed", default=None, type=int)
+@click.option("--record", "record_path", default=None, help="Write sent requests here.")
+@click.option(
+    "--replay",
+    "replay_path",
+    default=None,
+    help="Replay a recorded request log or gunicorn access log instead.",
+)
+@click.option(
+    "--speed",
+    default=1.0,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Replay speed multiplier.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON.")
+def loadgen_command(
+    url,
+    users,
+    duration,
+    mix,
+    think_time,
+    password,
+    random_seed,
+    record_path,
+    replay_path,
+    speed,
+    as_json,
+):
+    """Generate closed-loop mixed traffic against a running backend."""
+    import asyncio
+    import json
+
+    from backend.app.services.loadgen_service import (
+        format_report,
+        parse_mix,
+        parse_request_log,
+        replay_log,
+        run_load,
+    )
+
+    try:
+        if replay_path:
+            with open(replay_path) as handle:
+                entries = parse_request_log(handle)
+            coro = replay_log(
+                url,
+                entries,
+                users=users,
+                speed=speed,
+                password=password,
+                seed=random_seed,
+            )
+        else:
+            coro = run_load(
+                url,
+                users=users,
+                duration=duration,
+                mix=parse_mix(mix),
+                think_time=think_time,
+                password=password,
+                seed=random_seed,
+                record_path=record_path,
+            )
+        stats = asyncio.run(coro)
+    except (ValueError, RuntimeError, OSError) as e:
+        raise click.ClickException(str(e))
+
+    if as_json:
+        click.echo(json.dumps(stats.to_dict(), indent=2))
+    else:
+        click.echo(format_report(stats))
+
+
+@click.command("startup-profile")
+@click.option(
+    "--config",
+    "config_name",
+    default="production",
+    show_default=True,
+    help="Config to build the app with.",
+)
+@click.option("--top", default=25, show_default=True, help="Modules to list.")
+@click.option(
+    "--sort",
+    type=click.Choice(["cumulative", "self"]),
+    default="cumulative",
+    show_default=True,
+)
+@click.option(
+    "--budget-ms",
+    default=None,
+    type=float,
+    help="Exit with an error when startup takes longer than this.",
+)
+def startup_profile_command(config_name, top, sort, budget_ms):
+    """Breaks app startup down by create_app phase and imported module."""
+    from backend.app.startup import measure_startup
+
+    try:
+        modules, summary = measure_startup(config_name)
+    except subprocess.CalledProcessError as e:
+        raise click.ClickException(f"App failed to start:\n{e.stderr}")
+
+    click.echo(f"Startup: {summary['wall_ms']:.1f}ms wall")
+    click.echo(f"create_app: {summary['total_ms']:.1f}ms")
+    for phase, elapsed in summary["phases"].items():
+        click.echo(f"  {phase:<12} {elapsed:>9.1f}ms")
+
+    index = 1 if sort == "self" else 2
+    click.echo(f"\nTop {top} imports by {sort} time:")
+    click.echo(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for module, self_us, cumulative_us, depth in sorted(
+        modules, key=lambda m: m[index], reverse=True
+    )[:top]:
+        click.echo(
+            f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  "
+            f"{'  ' * depth}{module}"
+        )
+
+    if budget_ms is not None and summary["wall_ms"] > budget_ms:
+        raise click.ClickException(
+            f"Startup took {summary['wall_ms']:.1f}ms, budget is {budget_ms:.1f}ms"
+        )
+
+
+@click.command("schema-status")
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Only set the exit status: 0 when no migration is pending.",
+)
+@with_appcontext
+def schema_status_command(check):
+    """Compares the database revision with the migration heads."""
+    from backend.app.startup import current_revisions, migration_heads
+
+    heads = migration_heads()
+    current = current_revisions(db.engine)
+    up_to_date = bool(heads) and current == heads
+    if not check:
+        click.echo(f"Database revision: {', '.join(sorted(current)) or 'none'}")
+        click.echo(f"Migration heads:   {', '.join(sorted(heads)) or 'none'}")
+        click.echo("Up to date." if up_to_date else "Upgrade required.")
+    if not up_to_date:
+        raise SystemExit(1)
+
+
+@click.command("reconcile-counters")
+@click.option("--fix", is_flag=True, help="Overwrite drifted counters.")
+@click.option(
+    "--limit", default=20, show_default=True, help="Drifted rows listed per counter."
+)
+@with_appcontext
+def reconcile_counters_command(fix, limit):
+    """Recomputes maintained counters and reports drift."""
+    from backend.app.services.counter_service import reconcile_counters
+
+    connection = db.session.connection()
+    report = reconcile_counters(connection, fix=fix, limit=limit)
+    if fix:
+        db.session.commit()
+
+    total = 0
+    for counter, result in report.items():
+        total += result["drifted"]
+        click.echo(f"{counter}: {result['drifted']} drifted")
+        for row_id, stored, actual in result["rows"]:
+            click.echo(f"  id={row_id} stored={stored} actual={actual}")
+    if total and fix:
+        click.echo(f"Fixed {total} counters.")
+    elif total:
+        raise SystemExit(1)
+
+
+@click.command("flow-rollup")
+@click.option("--project", "project_id", type=int, help="Only this project.")
+@click.option(
+    "--rebuild", is_flag=True, help="Discard rollups and replay the whole log."
+)
+@click.option(
+    "--workers", type=int, default=None, help="Rebuild processes (default: CPUs)."
+)
+@with_appcontext
+def flow_rollup_command(project_id, rebuild, workers):
+    """Rolls up the activity log into flow analytics tables."""
+    from backend.app.models import Project
+    from backend.app.services.flow_service import rebuild_projects, refresh_project
+
+    if project_id is not None:
+        project_ids = [project_id]
+    else:
+        project_ids = [
+            row[0] for row in db.session.query(Project.id).order_by(Project.id)
+        ]
+
+    if rebuild:
+        db.session.remove()
+        results = rebuild_projects(db.engine, project_ids, workers=workers)
+    else:
+        connection = db.session.connection()
+        results = {pid: refresh_project(connection, pid) for pid in project_ids}
+        db.session.commit()
+    for pid, events in results.items():
+        click.echo(f"project {pid}: {events} events")
+    click.echo(f"Rolled up {len(results)} projects.")
+
+
+@click.command("purge-deleted")
+@click.option(
+    "--grace",
+    "grace_seconds",
+    type=int,
+    default=None,
+    help="Purge rows deleted longer ago than this. Defaults to PURGE_GRACE_SECONDS.",
+)
+@click.option(
+    "--batch-size", default=None, type=int, help="Defaults to PURGE_BATCH_SIZE."
+)
+@with_appcontext
+def purge_deleted_command(grace_seconds, batch_size):
+    """Permanently removes soft-deleted rows past their grace period."""
+    from datetime import datetime, timedelta
+
+    from flask import current_app
+
+    from backend.app.services.purge_service import purge_deleted
+
+    config = current_app.config
+    if grace_seconds is None:
+        grace_seconds = config.get("PURGE_GRACE_SECONDS", 604800)
+    purged, _ = purge_deleted(
+        db.session,
+        datetime.utcnow() - timedelta(seconds=grace_seconds),
+        batch_size=batch_size or config.get("PURGE_BATCH_SIZE", 500),
+    )
+    for table, count in purged.items():
+        click.echo(f"{table}: {count}")
+
+
+@click.command("run-jobs")
+@with_appcontext
+def run_jobs_command():
+    """Runs the due background jobs in this process, then exits."""
+    import os
+    import socket
+
+    from flask import current_app
+
+    from backend.app.services.job_service import run_pending
+
+    config = current_app.config
+    results = run_pending(
+        db.session,
+        f"{socket.gethostname()}:{os.getpid()}:cli",
+        lease_seconds=config.get("JOBS_LEASE_SECONDS", 60.0),
+        retry_backoff=config.get("JOBS_RETRY_BACKOFF", 10.0),
+    )
+    for job_id, kind, status in results:
+        click.echo(f"job {job_id} ({kind}): {status}")
+    click.echo(f"Ran {len(results)} jobs.")
@@ -0,0 +1,313 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, g, jsonify, request
+
+from backend.app.auth.identity import request_identity
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyInProgress(Exception):
+    """The original request for a key is still running after the wait timeout."""
+
+
+class IdempotencyStore:
+    """
+    Completed responses by key in a bounded LRU with a TTL, plus the keys
+    currently being served.
+
+    With ``path`` set, claims and responses also go to a SQLite table there,
+    so a duplicate that lands on another gunicorn worker finds (or waits
+    for) the original instead of running it again.
+    """
+
+    def __init__(
+        self, max_entries=10000, ttl=86400, path=None, poll_interval=0.05, clock=None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.poll_interval = poll_interval
+        self.clock = clock or time.time
+        self._entries = OrderedDict()  # key -> (expires_at, entry)
+        self._inflight = {}  # key -> threading.Event
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._claims = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS idempotency_key ("
+                    "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, "
+                    "response TEXT, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+                )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Returns the stored entry for ``key`` from memory, else the shared table."""
+        now = self.clock()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return item[1]
+                del self._entries[key]
+        if self.path:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT response, expires_at FROM idempotency_key "
+                    "WHERE key = ? AND response IS NOT NULL AND expires_at > ?",
+                    (key, now),
+                )
+                .fetchone()
+            )
+            if row is not None:
+                entry = json.loads(row[0])
+                self._remember(key, entry, row[1])
+                with self._lock:
+                    self.hits += 1
+                return entry
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key, entry, expires_at):
+        with self._lock:
+            self._entries[key] = (expires_at, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def claim(self, key, fingerprint, timeout=30.0):
+        """
+        Claims ``key`` for the calling request.
+
+        Returns None when the caller should run the request (and then call
+        ``complete`` or ``release``), or the stored entry of the original
+        once it has finished. Waits up to ``timeout`` seconds for an
+        in-flight original before raising IdempotencyInProgress.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                if not event.wait(max(deadline - time.monotonic(), 0)):
+                    raise IdempotencyInProgress(key)
+                continue
+            if not self.path or self._claim_shared(key, fingerprint, timeout):
+                return None
+            # Another worker holds the key: wait for its response there
+            try:
+                while time.monotonic() < deadline:
+                    time.sleep(self.poll_interval)
+                    if self.get(key) is not None or self._claim_shared(
+                        key, fingerprint, timeout
+                    ):
+                        break
+                else:
+                    raise IdempotencyInProgress(key)
+            except BaseException:
+                self._wake(key)
+                raise
+            if self.get(key) is None:
+                return None  # The other worker gave up; this request now owns it
+            self._wake(key)
+
+    def _claim_shared(self, key, fingerprint, timeout):
+        now = self.clock()
+        conn = self._connection()
+        self._claims += 1
+        if self._claims % 100 == 0:
+            conn.execute("DELETE FROM idempotency_key WHERE expires_at <= ?", (now,))
+        # Expired rows and abandoned claims (older than the wait timeout) are
+        # taken over.
+        conn.execute(
+            "DELETE FROM idempotency_key WHERE key = ? AND (expires_at <= ? "
+            "OR (response IS NULL AND created_at <= ?))",
+            (key, now, now - timeout),
+        )
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO idempotency_key "
+            "(key, fingerprint, response, created_at, expires_at) "
+            "VALUES (?, ?, NULL, ?, ?)",
+            (key, fingerprint, now, now + self.ttl),
+        )
+        return cursor.rowcount == 1
+
+    def _wake(self, key):
+        with self._lock:
+            event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def complete(self, key, entry):
+        """Stores the response of a claimed key and wakes its waiters."""
+        expires_at = self.clock() + self.ttl
+        self._remember(key, entry, expires_at)
+        if self.path:
+            self._connection().execute(
+                "UPDATE idempotency_key SET response = ?, expires_at = ? WHERE key = ?",
+                (json.dumps(entry), expires_at, key),
+            )
+        self._wake(key)
+
+    def release(self, key):
+        """Gives up a claim without storing a response (the request failed)."""
+        if self.path:
+            self._connection().execute(
+                "DELETE FROM idempotency_key WHERE key = ? AND response IS NULL", (key,)
+            )
+        self._wake(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "in_flight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _fingerprint():
+    return hashlib.sha256(request.get_data()).hexdigest()
+
+
+def _pop_claim():
+    """
+    Takes the claim of the current request off ``g``. The operations of a
+    ``/api/batch`` request run in nested request contexts that share its
+    ``g``; their teardown must leave the batch request's claim alone.
+    """
+    claim = g.get("_idempotency")
+    if claim is None or claim[0] is not request._get_current_object():
+        return None
+    del g._idempotency
+    return claim[1:]
+
+
+class Idempotency:
+    """
+    ``Idempotency-Key`` handling for POST requests.
+
+    The first response for a (user, path, key) is stored and replayed, with
+    an ``Idempotent-Replayed: true`` header, to every retry; a retry that
+    arrives while the original is still running waits for it. Reusing a key
+    with a different body is rejected with 422. 5xx and 429 responses are
+    not stored, so those requests can be retried for real.
+    """
+
+    def __init__(self, app=None):
+        self.store = None
+        self.wait_timeout = 30.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["idempotency"] = self
+        if not app.config.get("IDEMPOTENCY_ENABLED", True):
+            return
+
+        self.wait_timeout = app.config.get("IDEMPOTENCY_WAIT_TIMEOUT", 30.0)
+        self.store = IdempotencyStore(
+            max_entries=app.config.get("IDEMPOTENCY_CACHE_SIZE", 10000),
+            ttl=app.config.get("IDEMPOTENCY_TTL", 86400),
+            path=app.config.get("IDEMPOTENCY_DB"),
+        )
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        key = request.headers.get(HEADER)
+        if request.method != "POST" or not key:
+            return None
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"message": f"{HEADER} is too long"}), 400
+        identity = request_identity()
+        if identity is None:
+            return None
+
+        scope = f"{identity}:{request.path}:{key}"
+        fingerprint = _fingerprint()
+        try:
+            entry = self.store.claim(scope, fingerprint, self.wait_timeout)
+        except IdempotencyInProgress:
+            return (
+                jsonify({"message": "A request with this key is still in progress"}),
+                409,
+                {"Retry-After": "1"},
+            )
+        if entry is None:
+            g._idempotency = (request._get_current_object(), scope, fingerprint)
+            return None
+        if entry["fingerprint"] != fingerprint:
+            return (
+                jsonify({"message": f"{HEADER} was already used with another body"}),
+                422,
+            )
+        response = Response(
+            entry["body"], status=entry["status"], content_type=entry["content_type"]
+        )
+        response.headers[REPLAYED_HEADER] = "true"
+        return response
+
+    def _after_request(self, response):
+        claim = _pop_claim()
+        if claim is None:
+            return response
+        scope, fingerprint = claim
+        if response.status_code >= 500 or response.status_code == 429:
+            self.store.release(scope)
+            return response
+        self.store.complete(
+            scope,
+            {
+                "fingerprint": fingerprint,
+                "status": response.status_code,
+                "content_type": response.content_type,
+                "body": response.get_data(as_text=True),
+            },
+        )
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request is skipped when the view raised
+        claim = _pop_claim()
+        if claim is not None:
+            self.store.release(claim[0])
@@ -0,0 +1,24 @@
+from sqlalchemy import column, func, select, table as table_clause
+
+_sqlite_sequence = table_clause("sqlite_sequence", column("name"), column("seq"))
+
+
+def max_used_id(connection, table):
+    """
+    The highest id ``table`` has handed out. For a SQLite AUTOINCREMENT
+    table (see Task) that includes the ids of removed rows, which are still
+    referenced by activity and flow state and must not be reused; code that
+    assigns ids itself starts above this. Explicit ids inserted above it
+    advance the sequence on their own.
+    """
+    current = select(func.coalesce(func.max(table.c.id), 0)).scalar_subquery()
+    autoincrement = table.dialect_options["sqlite"].get("autoincrement")
+    if connection.dialect.name != "sqlite" or not autoincrement:
+        return connection.execute(select(current)).scalar()
+    seq = (
+        select(func.coalesce(func.max(_sqlite_sequence.c.seq), 0))
+        .where(_sqlite_sequence.c.name == table.name)
+        .scalar_subquery()
+    )
+    # Two-argument max() is SQLite's scalar max
+    return connection.execute(select(func.max(current, seq))).scalar()
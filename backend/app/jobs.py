@@ -0,0 +1,203 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_process_app = None  # The app of a job-pool process, built on its first job
+
+
+def _run_job(app, job_id, owner, retry_backoff):
+    from backend.app import db
+    from backend.app.services.job_service import execute_job
+
+    with app.app_context():
+        try:
+            return execute_job(db.session, job_id, owner, retry_backoff)
+        finally:
+            db.session.remove()
+
+
+def _run_job_in_process(config_name, job_id, owner, retry_backoff):
+    global _process_app
+    if _process_app is None:
+        from backend.app import create_app
+
+        _process_app = create_app(config_name)
+    return _run_job(_process_app, job_id, owner, retry_backoff)
+
+
+class JobRunner:
+    """
+    Runs the background jobs queued in the ``job`` table (see
+    services.job_service) on a pool of ``JOBS_WORKERS`` threads or, with
+    ``JOBS_EXECUTOR = "process"``, processes.
+
+    A dispatcher thread claims due jobs every ``JOBS_POLL_INTERVAL`` seconds
+    while the pool has room, and renews the leases of the jobs it is running
+    so that other workers leave them alone. Each gunicorn worker has its own
+    runner; the claim is atomic, so a job runs in one of them, and the jobs
+    of a worker that dies are picked up again once their
+    ``JOBS_LEASE_SECONDS`` lease runs out. Like the sampling profiler, the
+    dispatcher starts lazily on the first request.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.executor = "thread"
+        self.workers = 2
+        self.poll_interval = 2.0
+        self.lease_seconds = 60.0
+        self.retry_backoff = 10.0
+        self.owner = None
+        self._pool = None
+        self._running = {}  # job id -> future
+        self._renewed = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["jobs"] = self
+        if not app.config.get("JOBS_ENABLED"):
+            return
+
+        self.app = app
+        self.executor = app.config.get("JOBS_EXECUTOR", self.executor)
+        if self.executor not in ("thread", "process"):
+            raise ValueError(f"Unknown JOBS_EXECUTOR {self.executor!r}")
+        self.workers = app.config.get("JOBS_WORKERS", self.workers)
+        self.poll_interval = app.config.get("JOBS_POLL_INTERVAL", self.poll_interval)
+        self.lease_seconds = app.config.get("JOBS_LEASE_SECONDS", self.lease_seconds)
+        self.retry_backoff = app.config.get("JOBS_RETRY_BACKOFF", self.retry_backoff)
+        app.before_request(self._before_request)
+
+    def _before_request(self):
+        if self._pid != os.getpid():
+            self.start()
+
+    def _make_pool(self):
+        with self.app.app_context():
+            from backend.app import db
+
+            database = db.engine.url.database
+        # Other processes cannot see an in-memory database
+        if self.executor == "process" and database and database != ":memory:":
+            return ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return ThreadPoolExecutor(self.workers, thread_name_prefix="job")
+
+    def start(self):
+        """Starts the dispatcher and the pool in the current process."""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self.owner = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+            self._stop = threading.Event()
+            self._running = {}
+            self._pool = self._make_pool()
+            self._thread = threading.Thread(
+                target=self._run, name="job-dispatcher", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """
+        Stops claiming jobs. Running ones are not waited for; their leases
+        run out and another worker retries them.
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self.dispatch()
+            except Exception:
+                logger.exception("Job dispatch failed")
+                claimed = 0
+            if not claimed:
+                self._stop.wait(self.poll_interval)
+
+    def dispatch(self):
+        """
+        Renews the leases of running jobs when due and claims jobs while the
+        pool has room. Returns the number of jobs claimed.
+        """
+        from backend.app import db
+        from backend.app.services.job_service import claim, renew
+
+        with self.app.app_context():
+            try:
+                self._running = {
+                    job_id: future
+                    for job_id, future in self._running.items()
+                    if not future.done()
+                }
+                now = time.monotonic()
+                if self._running and now - self._renewed >= self.lease_seconds / 3:
+                    renew(
+                        db.session, self.owner, list(self._running), self.lease_seconds
+                    )
+                    self._renewed = now
+                claimed = 0
+                while len(self._running) < self.workers:
+                    job = claim(db.session, self.owner, self.lease_seconds)
+                    if job is None:
+                        break
+                    self._submit(*job)
+                    claimed += 1
+                return claimed
+            finally:
+                db.session.remove()
+
+    def _submit(self, job_id, kind):
+        if isinstance(self._pool, ProcessPoolExecutor):
+            args = (
+                _run_job_in_process,
+                self.app.config.get("CONFIG_NAME", "default"),
+                job_id,
+                self.owner,
+                self.retry_backoff,
+            )
+        else:
+            args = (_run_job, self.app, job_id, self.owner, self.retry_backoff)
+        try:
+            future = self._pool.submit(*args)
+        except BrokenExecutor:
+            # A pool process died; its jobs are retried once their leases end
+            logger.error("Job pool broken, starting a new one")
+            self._pool = self._make_pool()
+            future = self._pool.submit(*args)
+        self._running[job_id] = future
+        future.add_done_callback(lambda done: self._finished(job_id, kind, done))
+
+    def _finished(self, job_id, kind, future):
+        try:
+            status = future.result()
+        except Exception:
+            logger.exception("Job %s (%s) crashed its runner", job_id, kind)
+            status = "crashed"
+        metrics = self.app.extensions.get("metrics")
+        if metrics is not None and status:
+            metrics.registry.inc(
+                "kanban_jobs_total", (("kind", kind), ("status", status))
+            )
@@ -0,0 +1,352 @@
+import json
+import os
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+DEFAULT_SIZE_BUCKETS = (100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+DEFAULT_QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "kanban_http_requests_total": (
+        "counter",
+        "Total HTTP requests by endpoint, method and status.",
+        None,
+    ),
+    "kanban_http_request_duration_seconds": (
+        "histogram",
+        "HTTP request latency in seconds.",
+        DEFAULT_LATENCY_BUCKETS,
+    ),
+    "kanban_http_response_size_bytes": (
+        "histogram",
+        "HTTP response body size in bytes.",
+        DEFAULT_SIZE_BUCKETS,
+    ),
+    "kanban_http_requests_in_flight": (
+        "gauge",
+        "HTTP requests currently being served.",
+        None,
+    ),
+    "kanban_db_queries_total": (
+        "counter",
+        "SQL statements executed while serving requests.",
+        None,
+    ),
+    "kanban_db_query_duration_seconds_total": (
+        "counter",
+        "Time spent executing SQL statements while serving requests.",
+        None,
+    ),
+    "kanban_db_queries_per_request": (
+        "histogram",
+        "SQL statements executed per request.",
+        DEFAULT_QUERY_COUNT_BUCKETS,
+    ),
+    "kanban_admission_rejected_total": (
+        "counter",
+        "Requests turned away by admission control, by endpoint and reason.",
+        None,
+    ),
+    "kanban_response_cache_requests_total": (
+        "counter",
+        "Response cache lookups by kind (board, stages, activities) and result.",
+        None,
+    ),
+    "kanban_response_cache_evictions_total": (
+        "counter",
+        "Response cache entries evicted to stay under the memory cap.",
+        None,
+    ),
+    "kanban_purged_rows_total": (
+        "counter",
+        "Soft-deleted rows permanently removed by the purge worker, by table.",
+        None,
+    ),
+    "kanban_activity_writes_total": (
+        "counter",
+        "Activity log writes by action, as new entries or merged into the last one.",
+        None,
+    ),
+    "kanban_jobs_total": (
+        "counter",
+        "Background jobs run by this worker, by kind and resulting status.",
+        None,
+    ),
+}
+
+
+class MetricsRegistry:
+    """In-process store of counter, gauge and histogram samples."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, labels, amount):
+        key = (name, labels)
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += value
+            hist[2] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "pid": os.getpid(),
+                "counters": [[n, list(l), v] for (n, l), v in self.counters.items()],
+                "gauges": [[n, list(l), v] for (n, l), v in self.gauges.items()],
+                "histograms": [
+                    [n, list(l), list(h[0]), h[1], h[2]]
+                    for (n, l), h in self.histograms.items()
+                ],
+            }
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots):
+    """
+    Sums per-process snapshots into one registry. Counters and histograms of
+    exited workers still count (they are cumulative); gauges only count for
+    processes that are still alive.
+    """
+    merged = MetricsRegistry()
+    for snap in snapshots:
+        for name, labels, value in snap["counters"]:
+            merged.inc(name, tuple(tuple(pair) for pair in labels), value)
+        if snap["pid"] == os.getpid() or _pid_alive(snap["pid"]):
+            for name, labels, value in snap["gauges"]:
+                merged.set_gauge(name, tuple(tuple(pair) for pair in labels), value)
+        for name, labels, buckets, total, count in snap["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            hist = merged.histograms.get(key)
+            if hist is None:
+                hist = merged.histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, value in enumerate(buckets):
+                hist[0][i] += value
+            hist[1] += total
+            hist[2] += count
+    return merged
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus(registry):
+    """Renders a registry in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        if kind == "counter":
+            samples = {k: v for k, v in registry.counters.items() if k[0] == name}
+        elif kind == "gauge":
+            samples = {k: v for k, v in registry.gauges.items() if k[0] == name}
+        else:
+            samples = {k: v for k, v in registry.histograms.items() if k[0] == name}
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (_, labels), value in sorted(samples.items()):
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                le = ("le", repr(float(bound)))
+                lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+            lines.append(
+                f'{name}_bucket{_format_labels(labels, ("le", "+Inf"))} {count}'
+            )
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class Metrics:
+    """
+    Request and SQL instrumentation exposed on ``/metrics``.
+
+    Nothing is registered unless ``METRICS_ENABLED`` is set, so a disabled
+    app pays no per-request cost. With ``METRICS_DIR`` set, every worker
+    process periodically writes a snapshot file there and the worker serving
+    ``/metrics`` sums all snapshots, so values are correct across gunicorn
+    workers.
+    """
+
+    def __init__(self, app=None):
+        self.registry = MetricsRegistry()
+        self.directory = None
+        self.flush_interval = 1.0
+        self._last_flush = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["metrics"] = self
+        if not app.config.get("METRICS_ENABLED"):
+            return
+
+        self.directory = app.config.get("METRICS_DIR")
+        self.flush_interval = app.config.get("METRICS_FLUSH_INTERVAL", 1.0)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule(
+            app.config.get("METRICS_PATH", "/metrics"),
+            "metrics",
+            self.expose,
+            methods=["GET"],
+        )
+
+        from backend.app import db
+
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(db.engine, "after_cursor_execute", _after_cursor_execute)
+
+    def _before_request(self):
+        if request.endpoint == "metrics":
+            return  # Scrapes are not instrumented
+        g._metrics_request = request._get_current_object()
+        g._metrics_started = time.perf_counter()
+        g._metrics_sql_count = 0
+        g._metrics_sql_time = 0.0
+        self.registry.set_gauge("kanban_http_requests_in_flight", (), 1)
+
+    def _after_request(self, response):
+        started = g.get("_metrics_started")
+        if started is None:
+            return response
+        endpoint = request.endpoint or "unmatched"
+        elapsed = time.perf_counter() - started
+        method_labels = (("endpoint", endpoint), ("method", request.method))
+        endpoint_labels = (("endpoint", endpoint),)
+        registry = self.registry
+
+        registry.inc(
+            "kanban_http_requests_total",
+            method_labels + (("status", str(response.status_code)),),
+        )
+        registry.observe("kanban_http_request_duration_seconds", method_labels, elapsed)
+        size = response.calculate_content_length()
+        if size is not None:
+            registry.observe("kanban_http_response_size_bytes", endpoint_labels, size)
+        registry.inc("kanban_db_queries_total", endpoint_labels, g._metrics_sql_count)
+        registry.inc(
+            "kanban_db_query_duration_seconds_total",
+            endpoint_labels,
+            g._metrics_sql_time,
+        )
+        registry.observe(
+            "kanban_db_queries_per_request", endpoint_labels, g._metrics_sql_count
+        )
+
+        if self.directory and time.monotonic() - self._last_flush > self.flush_interval:
+            self.flush()
+        return response
+
+    def _teardown_request(self, exc):
+        # The operations of a /api/batch request run in nested request
+        # contexts sharing its g; only the batch request itself is finished
+        if g.get("_metrics_request") is request._get_current_object():
+            del g._metrics_request
+            g.pop("_metrics_started", None)
+            self.registry.set_gauge("kanban_http_requests_in_flight", (), -1)
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def flush(self):
+        """Writes this process's snapshot atomically into METRICS_DIR."""
+        self._last_flush = time.monotonic()
+        path = self._snapshot_path(os.getpid())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump(self.registry.snapshot(), handle)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Returns the registry aggregated over all worker processes."""
+        if not self.directory:
+            return self.registry
+        self.flush()
+        snapshots = []
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith("metrics-") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as handle:
+                    snapshots.append(json.load(handle))
+            except (OSError, ValueError):
+                continue  # Snapshot vanished or is being replaced
+        return merge_snapshots(snapshots)
+
+    def expose(self):
+        body = render_prometheus(self.collect())
+        return Response(body, mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or "_metrics_sql_count" not in g:
+        return
+    g._metrics_sql_count += 1
+    g._metrics_sql_time += time.perf_counter() - context._metrics_started
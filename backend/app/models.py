@@ -1,7 +1,25 @@
 from datetime import datetime
+
+from sqlalchemy.ext.hybrid import Comparator, hybrid_property
+
 from backend.app import db  # Corrected import path
 
 
+def _live_index(name, *columns):
+    """
+    Index over the rows that are not soft-deleted. Only queries that filter
+    on ``deleted_at IS NULL`` can use it.
+    """
+    where = db.text("deleted_at IS NULL")
+    return db.Index(name, *columns, sqlite_where=where, postgresql_where=where)
+
+
+def _tombstone_index(name):
+    """Index over the soft-deleted rows only, for the purge worker."""
+    where = db.text("deleted_at IS NOT NULL")
+    return db.Index(name, "deleted_at", sqlite_where=where, postgresql_where=where)
+
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -47,60 +65,134 @@ class Project(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # Maintained by services.counter_service
+    task_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Bumped by every change to the project's board, stages or activity;
+    # part of the response cache keys (see app.response_cache)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Soft delete: set by DELETE, cleared by restore; services.purge_service
+    # removes the row and everything under it once the grace period is over
+    deleted_at = db.Column(db.DateTime, nullable=True)
+    # Child rows are removed by ON DELETE CASCADE in the database, so purging
+    # a project never loads its stages, tasks or activity into the session.
     stages = db.relationship(
-        "Stage", backref="project", lazy="dynamic", cascade="all, delete-orphan"
+        "Stage",
+        backref="project",
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     activity_logs = db.relationship(
-        "ActivityLog", backref="project", lazy="dynamic", cascade="all, delete-orphan"
+        "ActivityLog",
+        backref="project",
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    __table_args__ = (
+        # Serves the project list, newest first (see project_list_service)
+        _live_index("ix_project_user_id_created_at_live", "user_id", "created_at"),
+        _tombstone_index("ix_project_deleted_at"),
     )
 
     def __repr__(self):
         return f"<Project {self.name}>"
 
-    def to_dict(self, include_stages=False):
+    @property
+    def is_deleted(self):
+        return self.deleted_at is not None
+
+    def to_dict(self, include_stages=False, include_tasks=False):
         data = {
             "id": self.id,
             "name": self.name,
             "description": self.description,
             "user_id": self.user_id,
+            "task_count": self.task_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
         if include_stages:
+            stages = self.stages.filter(Stage.deleted_at.is_(None))
             data["stages"] = [
-                stage.to_dict() for stage in self.stages.order_by(Stage.order).all()
+                stage.to_dict() for stage in stages.order_by(Stage.order).all()
             ]
+            if include_tasks:
+                # One query for the tasks of every stage (plus one for their
+                # tags) rather than one per stage; the cards' subtask and
+                # comment badges come from the maintained counters.
+                tasks = (
+                    Task.query.join(Stage, Task.stage_id == Stage.id)
+                    .filter(
+                        Stage.project_id == self.id,
+                        Stage.deleted_at.is_(None),
+                        Task.deleted_at.is_(None),
+                    )
+                    .order_by(Task.order, Task.created_at)
+                    .all()
+                )
+                by_stage = {stage["id"]: [] for stage in data["stages"]}
+                for task in tasks:
+                    by_stage[task.stage_id].append(task.to_dict())
+                for stage in data["stages"]:
+                    stage["tasks"] = by_stage[stage["id"]]
         return data
 
 
 class Stage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=False)
+    project_id = db.Column(
+        db.Integer,
+        db.ForeignKey("project.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
     order = db.Column(db.Integer, nullable=True)
+    # Maintained by services.counter_service
+    task_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
+    deleted_at = db.Column(db.DateTime, nullable=True)  # See Project.deleted_at
     tasks = db.relationship(
-        "Task", backref="stage", lazy="dynamic", cascade="all, delete-orphan"
+        "Task",
+        backref="stage",
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    # The full project_id index serves the purge worker and the cascades
+    __table_args__ = (
+        _live_index("ix_stage_project_id_live", "project_id", "order"),
+        _tombstone_index("ix_stage_deleted_at"),
     )
 
     def __repr__(self):
         return f"<Stage {self.name}>"
 
+    @property
+    def is_deleted(self):
+        """Whether the stage or its project is soft-deleted."""
+        return self.deleted_at is not None or self.project.is_deleted
+
     def to_dict(self, include_tasks=False):
         data = {
             "id": self.id,
             "name": self.name,
             "project_id": self.project_id,
             "order": self.order,
+            "task_count": self.task_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
         if include_tasks:
+            tasks = self.tasks.filter(Task.deleted_at.is_(None))
             data["tasks"] = [
-                task.to_dict() for task in self.tasks.order_by(Task.order).all()
+                task.to_dict() for task in tasks.order_by(Task.order).all()
             ]
         return data
 
@@ -108,7 +200,11 @@ class Stage(db.Model):
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    stage_id = db.Column(db.Integer, db.ForeignKey("stage.id"), nullable=False)
+    stage_id = db.Column(
+        db.Integer,
+        db.ForeignKey("stage.id", ondelete="CASCADE"),
+        nullable=False,
+    )
     assignee = db.Column(db.String(80), nullable=True)
     order = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -117,14 +213,37 @@ class Task(db.Model):
     )
     due_date = db.Column(db.DateTime, nullable=True)
     priority = db.Column(db.String(50), nullable=True)
+    # Maintained by services.counter_service, shown as badges on board cards
+    subtask_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    open_subtask_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    deleted_at = db.Column(db.DateTime, nullable=True)  # See Project.deleted_at
     subtasks = db.relationship(
-        "SubTask", backref="parent_task", lazy="dynamic", cascade="all, delete-orphan"
+        "SubTask",
+        backref="parent_task",
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     comments = db.relationship(
-        "Comment", backref="task", lazy="dynamic", cascade="all, delete-orphan"
+        "Comment",
+        backref="task",
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
+    # ActivityLog.task_id is a plain reference, not a foreign key: task
+    # history outlives the task and is only removed with its project. Task
+    # ids are therefore never reused (AUTOINCREMENT, see __table_args__), or
+    # a new task would inherit the history of a removed one.
     activity_logs = db.relationship(
-        "ActivityLog", backref="task", lazy="dynamic"  # Cascade removed
+        "ActivityLog",
+        primaryjoin="Task.id == foreign(ActivityLog.task_id)",
+        backref=db.backref("task", viewonly=True),
+        lazy="dynamic",
+        viewonly=True,
     )
     tags = db.relationship(
         "Tag",
@@ -133,9 +252,24 @@ class Task(db.Model):
         backref=db.backref("tasks", lazy="dynamic"),
     )
 
+    # Due-date ordered lookups for GET /api/me/tasks; the stage index also
+    # serves every plain stage_id lookup, the purge worker and the stage
+    # delete cascade, so it covers soft-deleted rows too.
+    __table_args__ = (
+        _live_index("ix_task_assignee_due_date", "assignee", "due_date"),
+        db.Index("ix_task_stage_id_due_date", "stage_id", "due_date"),
+        _tombstone_index("ix_task_deleted_at"),
+        {"sqlite_autoincrement": True},
+    )
+
     def __repr__(self):
         return f"<Task {self.id}>"
 
+    @property
+    def is_deleted(self):
+        """Whether the task, its stage or its project is soft-deleted."""
+        return self.deleted_at is not None or self.stage.is_deleted
+
     def to_dict(self, include_subtasks=False, include_tags=True):
         data = {
             "id": self.id,
@@ -145,6 +279,10 @@ class Task(db.Model):
             "order": self.order,
             "due_date": self.due_date.isoformat() if self.due_date else None,
             "priority": self.priority,
+            "subtask_count": self.subtask_count,
+            "open_subtask_count": self.open_subtask_count,
+            "completed_subtask_count": self.subtask_count - self.open_subtask_count,
+            "comment_count": self.comment_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "tags": [tag.to_dict() for tag in self.tags] if include_tags else [],
@@ -166,51 +304,131 @@ class Tag(db.Model):
         return {"id": self.id, "name": self.name}
 
 
+class Generation(db.Model):
+    """
+    Change counters of whole tables, bumped by every write to the table
+    (see services.tag_service). Lets workers tell whether a memoized
+    listing is still current.
+    """
+
+    __tablename__ = "generation"
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
 # Association table for Task and Tag many-to-many relationship
 task_tag = db.Table(
     "task_tag",
-    db.Column("task_id", db.Integer, db.ForeignKey("task.id"), primary_key=True),
-    db.Column("tag_id", db.Integer, db.ForeignKey("tag.id"), primary_key=True),
+    db.Column(
+        "task_id",
+        db.Integer,
+        db.ForeignKey("task.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    db.Column(
+        "tag_id",
+        db.Integer,
+        db.ForeignKey("tag.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
 )
 
 
+# Activity action names and their stored codes. Codes are persisted, so
+# never renumber them; add new actions at the end.
+ACTION_CODES = {
+    "PROJECT_CREATED": 1,
+    "PROJECT_RESTORED": 2,
+    "STAGE_DELETED": 3,
+    "STAGE_RESTORED": 4,
+    "TASK_CREATED": 5,
+    "TASK_UPDATED": 6,
+    "TASK_DELETED": 7,
+    "TASK_RESTORED": 8,
+    "COMMENT_ADDED": 9,
+    "TAG_ADDED_TO_TASK": 10,
+    "TAG_REMOVED_FROM_TASK": 11,
+}
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+
+
+class _ActionTypeComparator(Comparator):
+    """
+    Compares ``ActivityLog.action_type`` with action names as codes, so
+    filters stay on the indexed ``action`` column. Selected on its own it
+    is the name.
+    """
+
+    def __clause_element__(self):
+        return db.case(ACTION_NAMES, value=self.expression)
+
+    def __eq__(self, name):
+        return self.expression == ACTION_CODES.get(name)
+
+    def __ne__(self, name):
+        return self.expression != ACTION_CODES.get(name)
+
+    def in_(self, names):
+        return self.expression.in_([ACTION_CODES.get(name) for name in names])
+
+
 class ActivityLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    action_type = db.Column(
-        db.String(100), nullable=False
-    )  # e.g., "TASK_CREATED", "COMMENT_ADDED"
-    description = db.Column(
-        db.Text, nullable=False
-    )  # e.g., "User 'X' created task 'Y'"
+    # One of ACTION_CODES. The description is rendered when the log is read
+    # (see services.activity_service), from ``details`` and the current
+    # names of the user, task, stage and tag.
+    action = db.Column(db.SmallInteger, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=True)
-    task_id = db.Column(db.Integer, db.ForeignKey("task.id"), nullable=True)
-    details = db.Column(db.JSON, nullable=True)
+    project_id = db.Column(
+        db.Integer,
+        db.ForeignKey("project.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    task_id = db.Column(db.Integer, nullable=True, index=True)  # See Task.activity_logs
+    details = db.Column(db.JSON(none_as_null=True), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    def __init__(self, action_type, user_id, description, project_id=None, task_id=None, details=None):
+    def __init__(
+        self, action_type, user_id, project_id=None, task_id=None, details=None
+    ):
         self.action_type = action_type
         self.user_id = user_id
-        self.description = description
         self.project_id = project_id
         self.task_id = task_id
         self.details = details
 
+    @hybrid_property
+    def action_type(self):
+        """The action's name, e.g. "TASK_CREATED"."""
+        return ACTION_NAMES.get(self.action)
+
+    @action_type.setter
+    def action_type(self, name):
+        if name not in ACTION_CODES:
+            raise ValueError(f"Unknown activity action {name!r}")
+        self.action = ACTION_CODES[name]
+
+    @action_type.comparator
+    def action_type(cls):
+        return _ActionTypeComparator(cls.action)
+
     def __repr__(self):
         return f"<ActivityLog {self.action_type} by User {self.user_id}>"
 
     def to_dict(self):
+        """
+        The stored fields only; activity_service.activity_dicts adds the
+        rendered description and the username.
+        """
         return {
             "id": self.id,
             "action_type": self.action_type,
-            "description": self.description,
             "user_id": self.user_id,
-            "user_username": (
-                self.user.username if self.user else None
-            ),  # Include username
             "project_id": self.project_id,
             "task_id": self.task_id,
-            "details": self.details,  # Include details in to_dict
+            "details": self.details,
             "created_at": self.created_at.isoformat(),
         }
 
@@ -218,7 +436,12 @@ class ActivityLog(db.Model):
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    task_id = db.Column(db.Integer, db.ForeignKey("task.id"), nullable=False)
+    task_id = db.Column(
+        db.Integer,
+        db.ForeignKey("task.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
@@ -247,7 +470,12 @@ class Comment(db.Model):
 class SubTask(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    parent_task_id = db.Column(db.Integer, db.ForeignKey("task.id"), nullable=False)
+    parent_task_id = db.Column(
+        db.Integer,
+        db.ForeignKey("task.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
     completed = db.Column(db.Boolean, default=False)
     order = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -268,3 +496,111 @@ class SubTask(db.Model):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+
+# === Flow analytics rollups (maintained by services.flow_service) ===
+
+
+class FlowTaskState(db.Model):
+    """Where a task currently is, and when it was created, started and moved."""
+
+    __tablename__ = "flow_task_state"
+    task_id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(
+        db.Integer,
+        db.ForeignKey("project.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    stage_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    # First move out of its first stage
+    started_at = db.Column(db.DateTime, nullable=True)
+    entered_stage_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index(
+            "ix_flow_task_state_project_stage_entered",
+            "project_id",
+            "stage_id",
+            "entered_stage_at",
+        ),
+    )
+
+
+class FlowDaily(db.Model):
+    """Tasks per stage at the end of each day (cumulative flow)."""
+
+    __tablename__ = "flow_daily"
+    project_id = db.Column(
+        db.Integer,
+        db.ForeignKey("project.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = db.Column(db.Date, primary_key=True)
+    stage_id = db.Column(db.Integer, primary_key=True)
+    task_count = db.Column(db.Integer, nullable=False)
+
+
+class FlowWatermark(db.Model):
+    """How far a project's activity log has been rolled up."""
+
+    __tablename__ = "flow_watermark"
+    project_id = db.Column(
+        db.Integer,
+        db.ForeignKey("project.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    last_activity_id = db.Column(db.Integer, nullable=False, default=0)
+    day = db.Column(db.Date, nullable=True)  # Last day with flow_daily rows
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class Job(db.Model):
+    """
+    A background job (see services.job_service). Whoever holds an unexpired
+    lease runs it; a lease that runs out puts the job up for grabs again.
+    """
+
+    __tablename__ = "job"
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    # queued, running, succeeded, failed or cancelled
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    lease_owner = db.Column(db.String(100), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    progress = db.Column(db.Float, nullable=False, default=0.0)  # 0.0-1.0
+    message = db.Column(db.String(200), nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_job_status_run_after", "status", "run_after"),)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "cancel_requested": self.cancel_requested,
+            "progress": self.progress,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "run_after": self.run_after.isoformat() if self.run_after else None,
+        }
@@ -0,0 +1,62 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamps a requested page size to ``1..MAX_PAGE_SIZE``."""
+    if value is None:
+        return default
+    return min(max(value, 1), MAX_PAGE_SIZE)
+
+
+def encode_cursor(*values):
+    """Packs the sort key of the last row on a page into an opaque token."""
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, arity):
+    """
+    Unpacks a token made by ``encode_cursor``. Raises ValueError for anything
+    that is not a cursor with ``arity`` values.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(payload, list) or len(payload) != arity:
+        raise ValueError("Invalid cursor")
+    values = []
+    for value in payload:
+        if isinstance(value, dict):
+            try:
+                value = datetime.fromisoformat(value["dt"])
+            except (KeyError, TypeError, ValueError) as exc:
+                raise ValueError("Invalid cursor") from exc
+        values.append(value)
+    return values
+
+
+def after(columns, values, descending=False):
+    """
+    Keyset condition selecting rows that sort after ``values`` in
+    ``ORDER BY columns`` (all ascending, or all descending). Expanded into
+    ``a > x OR (a = x AND b > y)`` so SQLite can seek an index on the columns.
+    """
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        beyond = column < value if descending else column > value
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, beyond) if equal else beyond)
+    return or_(*clauses)
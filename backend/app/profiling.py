@@ -0,0 +1,283 @@
+import atexit
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, g, request
+
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def collapse_stats(stats):
+    """
+    Converts cProfile stats into collapsed-stack lines (``a;b;c <usec>``) that
+    flamegraph.pl / speedscope accept.
+
+    cProfile only records caller->callee edges, not full stacks, so each
+    function's own time is attributed along its heaviest caller chain.
+    """
+    raw = stats.stats  # func -> (cc, nc, tottime, cumtime, callers)
+
+    def label(func):
+        filename, line, name = func
+        if filename == "~":
+            return name  # Built-ins
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def heaviest_chain(func):
+        chain = [func]
+        seen = {func}
+        while True:
+            callers = raw.get(chain[-1], (0, 0, 0, 0, {}))[4]
+            candidates = [c for c in callers if c not in seen]
+            if not candidates:
+                break
+            # callers maps caller -> (cc, nc, tottime, cumtime) for that edge
+            parent = max(candidates, key=lambda c: callers[c][3])
+            chain.append(parent)
+            seen.add(parent)
+        return list(reversed(chain))
+
+    lines = []
+    for func, (_, _, tottime, _, _) in raw.items():
+        usec = int(tottime * 1_000_000)
+        if usec <= 0:
+            continue
+        stack = ";".join(label(f) for f in heaviest_chain(func))
+        lines.append(f"{stack} {usec}")
+    return "\n".join(sorted(lines)) + "\n"
+
+
+class RequestProfiler:
+    """
+    Opt-in per-request cProfile capture.
+
+    Disabled unless ``PROFILING_ENABLED`` is set, in which case a request is
+    profiled when it sends the ``X-Profile`` header or ``?profile=`` flag
+    carrying ``PROFILING_TOKEN``, or when it is picked by
+    ``PROFILING_SAMPLE_RATE``. Each profile is written to ``PROFILING_DIR`` as
+    ``<endpoint>-<timestamp>.prof`` plus a ``.collapsed`` text file.
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["profiler"] = self
+        if not app.config.get("PROFILING_ENABLED"):
+            return
+
+        self.directory = app.config.get("PROFILING_DIR") or os.path.join(
+            app.instance_path, "profiles"
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _wants_profile(self):
+        token = current_app.config.get("PROFILING_TOKEN")
+        supplied = request.headers.get("X-Profile") or request.args.get("profile")
+        if token and supplied and hmac.compare_digest(supplied, token):
+            return True
+        rate = current_app.config.get("PROFILING_SAMPLE_RATE") or 0.0
+        return rate > 0 and random.random() < rate
+
+    def _before_request(self):
+        if not self._wants_profile():
+            return
+        profiler = cProfile.Profile()
+        g._profiler = profiler
+        g._profiler_request = request._get_current_object()
+        profiler.enable()
+
+    def _after_request(self, response):
+        profiler = g.pop("_profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        path = self.write(profiler, request.endpoint or "unmatched")
+        response.headers["X-Profile-File"] = os.path.basename(path)
+        return response
+
+    def _teardown_request(self, exc):
+        # Nested /api/batch operations share the batch request's g
+        if g.get("_profiler_request") is not request._get_current_object():
+            return
+        del g._profiler_request
+        profiler = g.pop("_profiler", None)
+        if profiler is not None:
+            profiler.disable()  # Request failed before after_request ran
+
+    def write(self, profiler, endpoint):
+        """Writes ``.prof`` and ``.collapsed`` files; returns the .prof path."""
+        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+        base = os.path.join(
+            self.directory, f"{_UNSAFE_RE.sub('_', endpoint)}-{timestamp}-{os.getpid()}"
+        )
+        profiler.dump_stats(f"{base}.prof")
+        stats = pstats.Stats(profiler)
+        with open(f"{base}.collapsed", "w") as handle:
+            handle.write(collapse_stats(stats))
+        return f"{base}.prof"
+
+
+class SamplingProfiler:
+    """
+    Continuous statistical profiler for production workers.
+
+    A daemon thread samples the stacks of all threads that are serving a
+    request ``SAMPLING_PROFILER_HZ`` times per second and counts them as
+    collapsed stacks rooted at the Flask endpoint. Every
+    ``SAMPLING_PROFILER_FLUSH_INTERVAL`` seconds the counts are written to
+    ``SAMPLING_PROFILER_DIR`` as a flamegraph-ready ``.collapsed`` file and
+    reset. The thread starts lazily on the first request, so it runs inside
+    each gunicorn worker rather than in the pre-fork master.
+    """
+
+    max_depth = 128
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.hz = 100
+        self.flush_interval = 60.0
+        self.counts = {}
+        self.samples = 0
+        self.sample_time = 0.0
+        self._active = {}  # thread ident -> endpoint
+        self._labels = {}  # code object -> frame label
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._started_at = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["sampling_profiler"] = self
+        if not app.config.get("SAMPLING_PROFILER_ENABLED"):
+            return
+
+        self.directory = app.config.get("SAMPLING_PROFILER_DIR") or os.path.join(
+            app.instance_path, "profiles", "sampling"
+        )
+        self.hz = app.config.get("SAMPLING_PROFILER_HZ", self.hz)
+        self.flush_interval = app.config.get(
+            "SAMPLING_PROFILER_FLUSH_INTERVAL", self.flush_interval
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        if self._pid != os.getpid():
+            self.start()
+        self._active[threading.get_ident()] = request.endpoint or "unmatched"
+        g._sampling_request = request._get_current_object()
+
+    def _teardown_request(self, exc):
+        # Nested /api/batch operations share the batch request's g and thread;
+        # the thread stays active until the batch request itself ends
+        if g.get("_sampling_request") is request._get_current_object():
+            del g._sampling_request
+            self._active.pop(threading.get_ident(), None)
+
+    def start(self):
+        """Starts the sampler thread in the current process."""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._started_at = time.perf_counter()
+            self.counts = {}
+            self.samples = 0
+            self.sample_time = 0.0
+            self._thread = threading.Thread(
+                target=self._run, name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stops the sampler thread and flushes what it collected."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+        self.flush()
+
+    def _run(self):
+        interval = 1.0 / self.hz
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stop.wait(interval):
+            self.sample()
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (
+                f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                f"{code.co_firstlineno})"
+            )
+        return label
+
+    def sample(self):
+        """Takes one sample of every thread currently serving a request."""
+        started = time.perf_counter()
+        frames = sys._current_frames()
+        own = threading.get_ident()
+        for ident, endpoint in list(self._active.items()):
+            frame = frames.get(ident)
+            if frame is None or ident == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(endpoint)
+            key = ";".join(reversed(stack))
+            with self._lock:
+                self.counts[key] = self.counts.get(key, 0) + 1
+        del frames
+        with self._lock:
+            self.samples += 1
+            self.sample_time += time.perf_counter() - started
+
+    def overhead(self):
+        """Fraction of wall time spent sampling since the sampler started."""
+        if self._started_at is None:
+            return 0.0
+        elapsed = time.perf_counter() - self._started_at
+        return self.sample_time / elapsed if elapsed > 0 else 0.0
+
+    def flush(self):
+        """Writes and resets the collected stacks; returns the file path."""
+        with self._lock:
+            counts, self.counts = self.counts, {}
+        if not counts or not self.directory:
+            return None
+        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+        path = os.path.join(
+            self.directory, f"samples-{os.getpid()}-{timestamp}.collapsed"
+        )
+        with open(path, "w") as handle:
+            for stack, count in sorted(counts.items()):
+                handle.write(f"{stack} {count}\n")
+        return path
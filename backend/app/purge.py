@@ -0,0 +1,107 @@
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeWorker:
+    """
+    Background purge of soft-deleted projects, stages and tasks.
+
+    A daemon thread calls ``services.purge_service.purge_deleted`` every
+    ``PURGE_INTERVAL`` seconds for the rows deleted more than
+    ``PURGE_GRACE_SECONDS`` ago, in batches of ``PURGE_BATCH_SIZE`` and for
+    at most ``PURGE_TIME_BUDGET`` seconds per run. Like the sampling
+    profiler, the thread starts lazily on the first request so it runs
+    inside each gunicorn worker rather than in the pre-fork master.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 300.0
+        self.grace = timedelta(days=7)
+        self.batch_size = 500
+        self.time_budget = 10.0
+        self.runs = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["purge"] = self
+        if not app.config.get("PURGE_ENABLED"):
+            return
+
+        self.app = app
+        self.interval = app.config.get("PURGE_INTERVAL", self.interval)
+        self.grace = timedelta(
+            seconds=app.config.get("PURGE_GRACE_SECONDS", self.grace.total_seconds())
+        )
+        self.batch_size = app.config.get("PURGE_BATCH_SIZE", self.batch_size)
+        self.time_budget = app.config.get("PURGE_TIME_BUDGET", self.time_budget)
+        app.before_request(self._before_request)
+
+    def _before_request(self):
+        if self._pid != os.getpid():
+            self.start()
+
+    def start(self):
+        """Starts the purge thread in the current process."""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, name="purge-worker", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stops the purge thread after its current batch."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Purge run failed")
+
+    def run_once(self):
+        """Purges what is past the grace period, within one time budget."""
+        from backend.app import db
+        from backend.app.services.purge_service import purge_deleted
+
+        with self.app.app_context():
+            try:
+                purged, done = purge_deleted(
+                    db.session,
+                    datetime.utcnow() - self.grace,
+                    batch_size=self.batch_size,
+                    time_budget=self.time_budget,
+                )
+            finally:
+                db.session.remove()
+            metrics = self.app.extensions.get("metrics")
+            if metrics is not None:
+                for table, count in purged.items():
+                    if count:
+                        metrics.registry.inc(
+                            "kanban_purged_rows_total", (("table", table),), count
+                        )
+        self.runs += 1
+        return purged, done
@@ -0,0 +1,191 @@
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+# Frames below this directory (and outside site-packages) count as call sites.
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*(?:\?\s*,\s*)*\?\s*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+_local = threading.local()
+
+
+def normalize_statement(statement):
+    """
+    Reduces a SQL statement to its shape: literals become ``?``, IN lists
+    collapse to ``IN (?)`` and whitespace is normalized, so statements that
+    only differ in their parameters compare equal.
+    """
+    shape = _STRING_RE.sub("?", statement)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("IN (?)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+def _call_site():
+    """Returns ``path:line in function`` of the innermost project frame."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_PROJECT_ROOT)
+            and "site-packages" not in filename
+            and filename != __file__
+        ):
+            relative = os.path.relpath(filename, _PROJECT_ROOT)
+            return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class QueryCollector:
+    """Counts statements and groups them by shape to spot N+1 patterns."""
+
+    def __init__(self, threshold=5):
+        self.threshold = threshold
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = {}  # shape -> [count, call site]
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        shape = normalize_statement(statement)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            self.shapes[shape] = [1, None]
+            return
+        entry[0] += 1
+        # The stack is only walked once per repeated shape, when it first
+        # crosses the threshold.
+        if entry[0] == self.threshold:
+            entry[1] = _call_site()
+
+    @property
+    def n_plus_one(self):
+        """``[(shape, count, call_site)]`` for shapes at or above the threshold."""
+        return [
+            (shape, count, site)
+            for shape, (count, site) in self.shapes.items()
+            if count >= self.threshold
+        ]
+
+    def summary(self):
+        lines = [f"{self.count} queries in {self.duration * 1000:.1f}ms"]
+        for shape, count, site in self.n_plus_one:
+            lines.append(f"  N+1 ({count}x) at {site}: {shape[:200]}")
+        return "\n".join(lines)
+
+
+def _collectors():
+    stack = getattr(_local, "collectors", None)
+    if stack is None:
+        stack = _local.collectors = []
+    return stack
+
+
+@contextmanager
+def count_queries(threshold=5):
+    """Collects every statement the current thread runs inside the block."""
+    collector = QueryCollector(threshold)
+    stack = _collectors()
+    stack.append(collector)
+    try:
+        yield collector
+    finally:
+        stack.remove(collector)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, "collectors", None):
+        context._query_counter_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = getattr(_local, "collectors", None)
+    if not collectors:
+        return
+    started = getattr(context, "_query_counter_started", None)
+    duration = time.perf_counter() - started if started is not None else 0.0
+    for collector in collectors:
+        collector.record(statement, duration)
+
+
+class QueryCounter:
+    """
+    Per-request SQL statement counter and N+1 detector.
+
+    Enabled by ``QUERY_COUNTER_ENABLED``. Every request gets a collector;
+    statement shapes repeated ``N_PLUS_ONE_THRESHOLD`` times or more are
+    logged as a warning with their call site. With ``QUERY_COUNT_HEADERS``
+    (defaults to ``app.debug``) the counts are also returned as
+    ``X-Query-Count``, ``X-Query-Time-Ms`` and ``X-N-Plus-One`` headers.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["query_counter"] = self
+        if not app.config.get("QUERY_COUNTER_ENABLED"):
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+        from backend.app import db
+
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(db.engine, "after_cursor_execute", _after_cursor_execute)
+
+    def _before_request(self):
+        collector = QueryCollector(current_app.config.get("N_PLUS_ONE_THRESHOLD", 5))
+        _collectors().append(collector)
+        g._query_collector = collector
+        g._query_collector_request = request._get_current_object()
+
+    def _after_request(self, response):
+        collector = g.get("_query_collector")
+        if collector is None:
+            return response
+        suspects = collector.n_plus_one
+        if suspects:
+            current_app.logger.warning(
+                "Possible N+1 queries in %s %s (%s): %s",
+                request.method,
+                request.path,
+                request.endpoint,
+                collector.summary(),
+            )
+        show_headers = current_app.config.get("QUERY_COUNT_HEADERS")
+        if show_headers is None:
+            show_headers = current_app.debug
+        if show_headers:
+            response.headers["X-Query-Count"] = str(collector.count)
+            response.headers["X-Query-Time-Ms"] = f"{collector.duration * 1000:.2f}"
+            if suspects:
+                response.headers["X-N-Plus-One"] = "; ".join(
+                    f"{count}x {site}" for _, count, site in suspects
+                )
+        return response
+
+    def _teardown_request(self, exc):
+        # Nested /api/batch operations share the batch request's g
+        if g.get("_query_collector_request") is not request._get_current_object():
+            return
+        del g._query_collector_request
+        collector = g.pop("_query_collector", None)
+        if collector is not None and collector in _collectors():
+            _collectors().remove(collector)
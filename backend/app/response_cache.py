@@ -0,0 +1,386 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from flask import current_app, jsonify
+
+CACHE_HEADER = "X-Cache"
+
+
+class MemoryCache:
+    """Serialized responses in an LRU holding at most ``max_bytes`` of bodies."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Stores ``value`` and returns the number of entries evicted for it."""
+        if len(value) > self.max_bytes:
+            return 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = value
+            self.size += len(value)
+            evicted = 0
+            while self.size > self.max_bytes:
+                _, dropped = self._entries.popitem(last=False)
+                self.size -= len(dropped)
+                evicted += 1
+            self.evictions += evicted
+            return evicted
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class DiskCache:
+    """
+    Serialized responses in a SQLite file shared by every worker that opens
+    it. Least recently read entries are dropped once the stored bodies pass
+    ``max_bytes``.
+    """
+
+    name = "disk"
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_response_cache_accessed "
+            "ON response_cache (accessed)"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, attribute, amount=1):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + amount)
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value FROM response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        conn.execute(
+            "UPDATE response_cache SET accessed = ? WHERE key = ?", (time.time(), key)
+        )
+        self._count("hits")
+        return bytes(row[0])
+
+    def set(self, key, value):
+        """Stores ``value`` and returns the number of entries evicted for it."""
+        if len(value) > self.max_bytes:
+            return 0
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, size, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            excess = (
+                conn.execute("SELECT total(size) FROM response_cache").fetchone()[0]
+                - self.max_bytes
+            )
+            evicted = []
+            if excess > 0:
+                for old_key, size in conn.execute(
+                    "SELECT key, size FROM response_cache WHERE key != ? "
+                    "ORDER BY accessed",
+                    (key,),
+                ):
+                    evicted.append((old_key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM response_cache WHERE key = ?", evicted)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._count("evictions", len(evicted))
+        return len(evicted)
+
+    def stats(self):
+        entries, size = (
+            self._connection()
+            .execute("SELECT count(*), total(size) FROM response_cache")
+            .fetchone()
+        )
+        with self._lock:
+            return {
+                "entries": entries,
+                "bytes": int(size),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class RedisError(Exception):
+    """An error reply from the Redis server."""
+
+
+class RedisCache:
+    """
+    Serialized responses in Redis (or anything speaking its protocol), shared
+    by every worker and host. Entries expire after ``ttl`` seconds; the
+    memory cap and eviction are the server's (``maxmemory`` with an LRU
+    policy). While the server cannot be reached every lookup is a miss and
+    it is only retried every ``retry_interval`` seconds.
+    """
+
+    name = "redis"
+
+    def __init__(self, url, ttl=3600, timeout=1.0, retry_interval=5.0):
+        parsed = urlparse(url)
+        self.address = (parsed.hostname or "localhost", parsed.port or 6379)
+        self.password = parsed.password
+        self.database = int(parsed.path.lstrip("/") or 0)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._down_until = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+            conn = self._local.conn = (sock, sock.makefile("rb"))
+            if self.password:
+                self._command("AUTH", self.password)
+            if self.database:
+                self._command("SELECT", self.database)
+        return conn
+
+    def _command(self, *args):
+        sock, reader = self._connection()
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        try:
+            sock.sendall(b"".join(parts))
+            return _read_reply(reader)
+        except OSError:
+            self._local.conn = None
+            sock.close()
+            raise
+
+    def _call(self, *args):
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return self._command(*args)
+        except (OSError, RedisError) as exc:
+            with self._lock:
+                self.errors += 1
+            if isinstance(exc, OSError):
+                self._down_until = time.monotonic() + self.retry_interval
+            return None
+
+    def get(self, key):
+        value = self._call("GET", key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._call("SET", key, value, "EX", self.ttl)
+        return 0  # Evictions happen on the server
+
+    def stats(self):
+        info = self._call("INFO", "stats") or b""
+        server = dict(
+            line.split(":", 1)
+            for line in info.decode().splitlines()
+            if ":" in line and not line.startswith("#")
+        )
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "evictions": int(server.get("evicted_keys", 0)),
+            }
+
+
+def _read_reply(reader):
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by the server")
+    prefix, payload = line[:1], line[1:-2]
+    if prefix == b"+":
+        return payload
+    if prefix == b"-":
+        raise RedisError(payload.decode())
+    if prefix == b":":
+        return int(payload)
+    if prefix == b"$":
+        length = int(payload)
+        return None if length < 0 else reader.read(length + 2)[:-2]
+    if prefix == b"*":
+        length = int(payload)
+        return None if length < 0 else [_read_reply(reader) for _ in range(length)]
+    raise RedisError(f"Unexpected reply {line!r}")
+
+
+def cache_key(kind, project):
+    """
+    ``kind`` plus the project's id, creation time and version. The creation
+    time keeps a new project that reuses a deleted one's id (SQLite hands out
+    the highest id again) from finding the deleted project's responses.
+    """
+    created = project.created_at.isoformat() if project.created_at else ""
+    return f"{kind}:{project.id}:{created}:{project.version}"
+
+
+class ResponseCache:
+    """
+    Caches the JSON bodies of per-project read endpoints (board, stage list,
+    activity page).
+
+    Entries are keyed by the project's version, which every mutating handler
+    bumps in the transaction that makes the change, so a write invalidates
+    exactly that project's entries and stale versions simply age out of the
+    backend. ``RESPONSE_CACHE_BACKEND`` is ``memory`` (per worker),
+    ``disk`` (a SQLite file shared by workers), ``redis`` or ``none``.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["response_cache"] = self
+        kind = app.config.get("RESPONSE_CACHE_BACKEND", "memory")
+        max_bytes = app.config.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+        if not kind or kind == "none":
+            return
+        if kind == "memory":
+            self.backend = MemoryCache(max_bytes)
+        elif kind == "disk":
+            path = app.config.get("RESPONSE_CACHE_PATH") or os.path.join(
+                app.instance_path, "response_cache.db"
+            )
+            self.backend = DiskCache(path, max_bytes)
+        elif kind == "redis":
+            self.backend = RedisCache(
+                app.config.get("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0"),
+                ttl=app.config.get("RESPONSE_CACHE_TTL", 3600),
+            )
+        else:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND {kind!r}")
+
+    def _count(self, name, labels, amount=1):
+        metrics = current_app.extensions.get("metrics")
+        if metrics is not None and amount:
+            metrics.registry.inc(name, labels, amount)
+
+    def response(self, kind, project, build):
+        """
+        Returns the JSON response of ``build()`` for the current version of
+        ``project``, calling ``build`` only on a cache miss.
+
+        Inside ``/api/batch`` the cache is bypassed: earlier operations' writes
+        are not committed yet, and a rolled-back batch hands its version
+        numbers out again, so a response built there could later be served
+        for a different state of the project.
+        """
+        from backend.app import db
+
+        if self.backend is None or db.session().info.get("batch"):
+            return jsonify(build())
+        key = cache_key(kind, project)
+        body = self.backend.get(key)
+        result = "hit" if body is not None else "miss"
+        self._count(
+            "kanban_response_cache_requests_total", (("kind", kind), ("result", result))
+        )
+        if body is None:
+            response = jsonify(build())
+            evicted = self.backend.set(key, response.get_data())
+            self._count(
+                "kanban_response_cache_evictions_total",
+                (("backend", self.backend.name),),
+                evicted,
+            )
+        else:
+            response = current_app.response_class(
+                body, mimetype=current_app.json.mimetype
+            )
+        response.headers[CACHE_HEADER] = result.upper()
+        return response
+
+
+def cached_json(kind, project, build):
+    """``ResponseCache.response`` of the current app."""
+    return current_app.extensions["response_cache"].response(kind, project, build)
@@ -1,11 +1,38 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
 from backend.app import db
-from backend.app.models import ActivityLog
+from backend.app.models import ActivityLog, Project, Stage, Tag, Task, User
+from backend.app.services.counter_service import project_changed
+
+# Description templates by action. The placeholders are filled from the
+# current names of the rows an entry refers to when the log is read.
+TEMPLATES = {
+    "PROJECT_CREATED": "User '{user}' created project '{project}'",
+    "PROJECT_CLONED": "User '{user}' created project '{project}' from '{source}'",
+    "PROJECT_RESTORED": "User '{user}' restored project '{project}'",
+    "STAGE_DELETED": "User '{user}' deleted stage '{stage}'",
+    "STAGE_RESTORED": "User '{user}' restored stage '{stage}'",
+    "TASK_CREATED": "User '{user}' created task '{task}...' in stage '{stage}'",
+    "TASK_UPDATED": "User '{user}' updated task '{task}...'",
+    "TASK_DELETED": "User '{user}' deleted task '{task}...' from stage '{stage}'",
+    "TASK_RESTORED": "User '{user}' restored task '{task}...' in stage '{stage}'",
+    "COMMENT_ADDED": "User '{user}' commented on task '{task}...'",
+    "TAG_ADDED_TO_TASK": "User '{user}' added tag '{tag}' to task '{task}...'",
+    "TAG_REMOVED_FROM_TASK": (
+        "User '{user}' removed tag '{tag}' from task '{task}...'"
+    ),
+}
+
+# Stands in for the name of a row that has been purged since
+MISSING = "(deleted)"
 
 
 def record_activity(
     action_type: str,
     user_id: int,
-    description: str,
     project_id: int = None,
     task_id: int = None,
     details: dict = None,
@@ -13,10 +40,15 @@ def record_activity(
     """
     Records an activity in the ActivityLog.
 
+    Only ids are stored; the description is rendered on read (see
+    activity_dicts). Events that delete something snapshot its name in
+    ``details`` so the description survives the purge. A TASK_UPDATED
+    entry may be merged into the task's previous one instead (see
+    _coalesce).
+
     Args:
         action_type (str): The type of action performed (e.g., "TASK_CREATED").
         user_id (int): The ID of the user who performed the action.
-        description (str): A description of the activity.
         project_id (int, optional): The ID of the project related to the
             activity. Defaults to None.
         task_id (int, optional): The ID of the task related to the activity.
@@ -24,18 +56,197 @@ def record_activity(
         details (dict, optional): Additional details about the activity.
             Defaults to None.
     """
-    activity = ActivityLog(  # This instantiation should be correct now
-        action_type=action_type,
-        user_id=user_id,
-        description=description,
-        project_id=project_id,
-        task_id=task_id,
-        details=details,
-    )
     try:
-        db.session.add(activity)
+        activity = None
+        if action_type == "TASK_UPDATED" and task_id is not None:
+            activity = _coalesce(user_id, task_id, details)
+        result = "coalesced" if activity is not None else "inserted"
+        if activity is None:
+            activity = ActivityLog(
+                action_type=action_type,
+                user_id=user_id,
+                project_id=project_id,
+                task_id=task_id,
+                details=details,
+            )
+            db.session.add(activity)
+        if project_id is not None:
+            project_changed(project_id)  # Invalidates the cached activity page
         db.session.commit()  # Ensure commit is attempted
     except Exception:
         db.session.rollback()
         # Optional: Log the error e.g., current_app.logger.error(f"Error recording activity: {e}")
         raise  # Re-raise to allow calling transaction to handle it
+    metrics = current_app.extensions.get("metrics")
+    if metrics is not None:
+        metrics.registry.inc(
+            "kanban_activity_writes_total",
+            (("action", action_type), ("result", result)),
+        )
+    return activity
+
+
+def field_changes(before, after):
+    """
+    ``{field: [old, new]}`` of the fields whose value differs between the
+    ``before`` and ``after`` dicts, with datetimes in ISO format.
+    """
+    changes = {}
+    for field, old in before.items():
+        new = after[field]
+        if old != new:
+            changes[field] = [_json_value(old), _json_value(new)]
+    return changes
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _is_move(details):
+    return bool(details) and "to_stage_id" in details
+
+
+def _coalesce(user_id, task_id, details):
+    """
+    Merges a TASK_UPDATED by ``user_id`` into the task's latest entry when
+    that is a TASK_UPDATED by the same user less than
+    ACTIVITY_COALESCE_SECONDS old. The merged entry keeps each field's
+    value from before the first update and after the last one (a field
+    changed back stays listed, with equal values), counts the updates it
+    stands for in ``details["updates"]`` and records when the last one
+    happened in ``details["last_updated_at"]``. Moves between
+    stages are never merged, so every move stays in the log (flow analytics
+    replays them).
+
+    Returns:
+        ActivityLog: the merged entry, or None if a new one is needed.
+    """
+    window = current_app.config.get("ACTIVITY_COALESCE_SECONDS", 0)
+    if not window or _is_move(details):
+        return None
+    last = db.session.execute(
+        select(ActivityLog)
+        .where(ActivityLog.task_id == task_id)
+        .order_by(ActivityLog.id.desc())
+        .limit(1)
+    ).scalar()
+    now = datetime.utcnow()
+    if (
+        last is None
+        or last.action_type != "TASK_UPDATED"
+        or last.user_id != user_id
+        or _is_move(last.details)
+        or last.created_at < now - timedelta(seconds=window)
+    ):
+        return None
+
+    previous = last.details or {}
+    changes = dict(previous.get("changes", {}))
+    for field, (old, new) in (details or {}).get("changes", {}).items():
+        changes[field] = [changes[field][0] if field in changes else old, new]
+    last.details = {
+        "changes": changes,
+        "updates": previous.get("updates", 1) + 1,
+        "last_updated_at": now.isoformat(),
+    }
+    return last
+
+
+def _names(session, columns, ids):
+    """``{id: row}`` of ``columns`` (id first) for ``ids``, in one query."""
+    if not ids:
+        return {}
+    rows = session.execute(select(*columns).where(columns[0].in_(ids)))
+    return {row[0]: row for row in rows}
+
+
+def activity_dicts(session, activities):
+    """
+    ``to_dict()`` of each entry plus its ``user_username`` and rendered
+    ``description``.
+
+    The names the templates need are loaded with one query per table for
+    the whole page, soft-deleted rows included. A purged task or stage
+    falls back to the name snapshotted in ``details`` by the entry itself
+    or by the TASK_DELETED or STAGE_DELETED entry that removed it.
+    """
+    user_ids, task_ids, stage_ids, project_ids, tag_ids = (set() for _ in range(5))
+    for activity in activities:
+        details = activity.details or {}
+        user_ids.add(activity.user_id)
+        project_ids.update(
+            i for i in (activity.project_id, details.get("source_project_id")) if i
+        )
+        if activity.task_id is not None:
+            task_ids.add(activity.task_id)
+        if details.get("stage_id") is not None:
+            stage_ids.add(details["stage_id"])
+        if details.get("tag_id") is not None:
+            tag_ids.add(details["tag_id"])
+
+    users = _names(session, (User.id, User.username), user_ids)
+    projects = _names(session, (Project.id, Project.name), project_ids)
+    tags = _names(session, (Tag.id, Tag.name), tag_ids)
+    tasks = {
+        task_id: (row.content[:30], row.stage_id)
+        for task_id, row in _names(
+            session, (Task.id, Task.content, Task.stage_id), task_ids
+        ).items()
+    }
+    stage_snapshots = {}
+    purged = task_ids - tasks.keys()
+    if purged:
+        deletions = session.execute(
+            select(ActivityLog.task_id, ActivityLog.details).where(
+                ActivityLog.task_id.in_(purged),
+                ActivityLog.action_type == "TASK_DELETED",
+            )
+        )
+        for task_id, details in deletions:
+            details = details or {}
+            tasks[task_id] = (details.get("task", MISSING), details.get("stage_id"))
+            stage_snapshots[details.get("stage_id")] = details.get("stage")
+    stage_ids.update(stage_id for _, stage_id in tasks.values() if stage_id)
+    stages = _names(session, (Stage.id, Stage.name), stage_ids)
+    if stage_ids - stages.keys() - stage_snapshots.keys():
+        deletions = session.execute(
+            select(ActivityLog.details).where(
+                ActivityLog.project_id.in_(project_ids),
+                ActivityLog.action_type == "STAGE_DELETED",
+            )
+        )
+        for (details,) in deletions:
+            details = details or {}
+            stage_snapshots.setdefault(details.get("stage_id"), details.get("stage"))
+
+    result = []
+    for activity in activities:
+        details = activity.details or {}
+        task, task_stage_id = tasks.get(activity.task_id, (MISSING, None))
+        stage_id = details.get("stage_id", task_stage_id)
+        values = {
+            "user": _name(users, activity.user_id),
+            "project": _name(projects, activity.project_id),
+            "source": _name(projects, details.get("source_project_id")),
+            "stage": _name(
+                stages, stage_id, details.get("stage") or stage_snapshots.get(stage_id)
+            ),
+            "tag": _name(tags, details.get("tag_id")),
+            "task": details.get("task", task),
+        }
+        action = activity.action_type
+        if action == "PROJECT_CREATED" and "source_project_id" in details:
+            action = "PROJECT_CLONED"
+        data = activity.to_dict()
+        data["user_username"] = values["user"]
+        data["description"] = TEMPLATES[action].format(**values)
+        result.append(data)
+    return result
+
+
+def _name(rows, row_id, snapshot=None):
+    row = rows.get(row_id)
+    if row is not None:
+        return row[-1]
+    return snapshot or MISSING
@@ -0,0 +1,139 @@
+import re
+
+from flask import current_app, request
+from sqlalchemy.orm import Session
+
+from backend.app import db
+
+METHODS = ("GET", "POST", "PUT", "DELETE")
+# Status reported for operations that did not run because an earlier one failed
+NOT_RUN = 424
+
+_REFERENCE_RE = re.compile(r"\$\{(\d+)((?:\.[\w-]+)+)\}")
+
+
+class BatchError(Exception):
+    """An operation that cannot be dispatched at all (bad shape or reference)."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _lookup(results, index, path):
+    if index >= len(results):
+        raise BatchError(f"Reference to operation {index}, which has not run yet")
+    value = results[index]["body"]
+    for key in path.strip(".").split("."):
+        if isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        elif isinstance(value, dict) and key in value:
+            value = value[key]
+        else:
+            raise BatchError(f"Unresolved reference ${{{index}{path}}}")
+    return value
+
+
+def resolve(value, results):
+    """
+    Substitutes ``${<index>.<key>[.<key>...]}`` references to earlier
+    operations' response bodies. A string that is exactly one reference
+    becomes the referenced value itself (keeping ints as ints).
+    """
+    if isinstance(value, dict):
+        return {key: resolve(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve(item, results) for item in value]
+    if not isinstance(value, str):
+        return value
+    whole = _REFERENCE_RE.fullmatch(value)
+    if whole:
+        return _lookup(results, int(whole.group(1)), whole.group(2))
+    return _REFERENCE_RE.sub(
+        lambda match: str(_lookup(results, int(match.group(1)), match.group(2))),
+        value,
+    )
+
+
+def _dispatch(app, method, path, body, headers):
+    """Runs one api_bp view in a nested request context, without HTTP."""
+    with app.test_request_context(path, method=method, json=body, headers=headers):
+        if request.routing_exception is None and (
+            request.blueprint != "api" or request.endpoint == "api.batch"
+        ):
+            raise BatchError(f"{path} is not a batchable API route")
+        try:
+            rv = app.dispatch_request()
+        except Exception as exc:  # JWT and HTTP errors have registered handlers
+            rv = app.handle_user_exception(exc)
+        response = app.make_response(rv)
+        body = response.get_json(silent=True) if response.data else None
+        return response.status_code, body
+
+
+def run_batch(operations, headers):
+    """
+    Executes ``operations`` in order inside one database transaction.
+
+    Each operation is ``{"method", "path", "body"}`` against an api_bp
+    route and is dispatched to the view directly. The views' own commits
+    only release a savepoint; the transaction commits after the last
+    operation succeeds and is rolled back as soon as one returns an error
+    status, in which case the remaining operations are not run.
+
+    Returns:
+        tuple: ``(failed, results)``: the index of the failed operation
+        (None when the batch committed) and one ``{"status", "body"}`` per
+        operation.
+    """
+    app = current_app._get_current_object()
+    outer = db.session()
+    connection = outer.connection()
+    transaction = connection.begin_nested()
+    # Views call db.session.commit(); in this session that only releases a
+    # savepoint inside ``transaction``. A plain Session, because
+    # Flask-SQLAlchemy's picks its engine by bind key and ignores ``bind``.
+    session = Session(
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+        # See response_cache.ResponseCache.response and tag_service.tags_changed
+        info={"batch": True, "outer": outer},
+    )
+    db.session.registry.set(session)
+    results = []
+    failed = None
+    try:
+        for operation in operations:
+            try:
+                if not isinstance(operation, dict):
+                    raise BatchError("Each operation must be an object")
+                method = str(operation.get("method", "GET")).upper()
+                path = resolve(operation.get("path"), results)
+                if method not in METHODS or not isinstance(path, str):
+                    raise BatchError("Each operation needs a method and a path")
+                body = resolve(operation.get("body"), results)
+                status, body = _dispatch(app, method, path, body, headers)
+            except BatchError as exc:
+                status, body = exc.status, {"message": str(exc)}
+            results.append({"status": status, "body": body})
+            if status >= 400:
+                failed = len(results) - 1
+                break
+    except BaseException:
+        failed = len(results)
+        raise
+    finally:
+        session.close()
+        db.session.registry.set(outer)
+        if failed is None:
+            transaction.commit()
+        else:
+            transaction.rollback()
+        # After a rollback to the savepoint there is nothing left to commit,
+        # but this still ends the transaction.
+        outer.commit()
+
+    results.extend(
+        {"status": NOT_RUN, "body": None} for _ in operations[len(results) :]
+    )
+    return failed, results
@@ -0,0 +1,181 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    func,
+    insert,
+    literal,
+    null,
+    select,
+)
+
+from backend.app.ids import max_used_id
+from backend.app.models import Project, Stage, SubTask, Task, task_tag
+
+# Old id -> new id for the stages and tasks of one clone. Temporary tables
+# are per connection, so concurrent clones never see each other's rows.
+_maps = MetaData()
+stage_id_map = Table(
+    "clone_stage_map",
+    _maps,
+    Column("old_id", Integer, primary_key=True),
+    Column("new_id", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+task_id_map = Table(
+    "clone_task_map",
+    _maps,
+    Column("old_id", Integer, primary_key=True),
+    Column("new_id", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+
+def _fill_map(connection, id_map, model, where):
+    """
+    Assigns the rows of ``model`` matching ``where`` consecutive new ids
+    above the highest id the table has handed out, in old-id order.
+    """
+    base = max_used_id(connection, model.__table__)
+    connection.execute(
+        insert(id_map).from_select(
+            ["old_id", "new_id"],
+            select(model.id, func.row_number().over(order_by=model.id) + base).where(
+                where
+            ),
+        )
+    )
+
+
+def clone_project(
+    connection,
+    project_id,
+    user_id,
+    name,
+    description=None,
+    include_tasks=True,
+    include_subtasks=True,
+    include_tags=True,
+    reset_due_dates=False,
+):
+    """
+    Copies a project's stages and, optionally, its tasks, subtasks and task
+    tags into a new project owned by ``user_id``.
+
+    Each level is one ``INSERT ... SELECT``; stage and task ids are assigned
+    up front in temporary old-id -> new-id tables that the next level joins
+    through, so the statement count does not depend on the board's size.
+    Soft-deleted stages and tasks, comments and activity are not copied.
+    Counters are carried over (or zeroed for levels that are left out).
+
+    Returns:
+        tuple: ``(new project id, {"stages": n, "tasks": n, "subtasks": n,
+        "tags": n})``
+    """
+    now = datetime.utcnow()
+    include_subtasks = include_subtasks and include_tasks
+    include_tags = include_tags and include_tasks
+    source = connection.execute(
+        select(Project.description, Project.task_count).where(Project.id == project_id)
+    ).one()
+    new_project_id = connection.execute(
+        insert(Project).values(
+            name=name,
+            description=source.description if description is None else description,
+            user_id=user_id,
+            task_count=source.task_count if include_tasks else 0,
+            created_at=now,
+            updated_at=now,
+        )
+    ).inserted_primary_key[0]
+
+    _maps.create_all(connection)
+    try:
+        _fill_map(
+            connection,
+            stage_id_map,
+            Stage,
+            (Stage.project_id == project_id) & Stage.deleted_at.is_(None),
+        )
+        copied = {"stages": 0, "tasks": 0, "subtasks": 0, "tags": 0}
+        copied["stages"] = connection.execute(
+            insert(Stage).from_select(
+                ["id", "name", "project_id", "order", "task_count"]
+                + ["created_at", "updated_at"],
+                select(
+                    stage_id_map.c.new_id,
+                    Stage.name,
+                    literal(new_project_id),
+                    Stage.order,
+                    Stage.task_count if include_tasks else literal(0),
+                    literal(now),
+                    literal(now),
+                ).join(stage_id_map, stage_id_map.c.old_id == Stage.id),
+            )
+        ).rowcount
+
+        if include_tasks:
+            _fill_map(
+                connection,
+                task_id_map,
+                Task,
+                Task.stage_id.in_(select(stage_id_map.c.old_id))
+                & Task.deleted_at.is_(None),
+            )
+            copied["tasks"] = connection.execute(
+                insert(Task).from_select(
+                    ["id", "content", "stage_id", "assignee", "order", "due_date"]
+                    + ["priority", "subtask_count", "open_subtask_count"]
+                    + ["comment_count", "created_at", "updated_at"],
+                    select(
+                        task_id_map.c.new_id,
+                        Task.content,
+                        stage_id_map.c.new_id,
+                        Task.assignee,
+                        Task.order,
+                        null() if reset_due_dates else Task.due_date,
+                        Task.priority,
+                        Task.subtask_count if include_subtasks else literal(0),
+                        Task.open_subtask_count if include_subtasks else literal(0),
+                        literal(0),
+                        literal(now),
+                        literal(now),
+                    )
+                    .join(task_id_map, task_id_map.c.old_id == Task.id)
+                    .join(stage_id_map, stage_id_map.c.old_id == Task.stage_id),
+                )
+            ).rowcount
+
+        if include_subtasks:
+            copied["subtasks"] = connection.execute(
+                insert(SubTask).from_select(
+                    ["content", "parent_task_id", "completed", "order"]
+                    + ["created_at", "updated_at"],
+                    select(
+                        SubTask.content,
+                        task_id_map.c.new_id,
+                        SubTask.completed,
+                        SubTask.order,
+                        literal(now),
+                        literal(now),
+                    )
+                    .join(task_id_map, task_id_map.c.old_id == SubTask.parent_task_id)
+                    .order_by(SubTask.id),
+                )
+            ).rowcount
+
+        if include_tags:
+            copied["tags"] = connection.execute(
+                insert(task_tag).from_select(
+                    ["task_id", "tag_id"],
+                    select(task_id_map.c.new_id, task_tag.c.tag_id).join(
+                        task_id_map, task_id_map.c.old_id == task_tag.c.task_id
+                    ),
+                )
+            ).rowcount
+    finally:
+        _maps.drop_all(connection)
+    return new_project_id, copied
@@ -0,0 +1,190 @@
+from sqlalchemy import func, select, update
+
+from backend.app import db
+from backend.app.models import Comment, Project, Stage, SubTask, Task
+
+# Maintained counter columns, counting rows that are not soft-deleted; the
+# routes adjust them in the same transaction as the change they count,
+# reconcile_counters() recomputes them.
+
+
+def _bump(model, row_id, **deltas):
+    """Atomically adds ``deltas`` to counter columns of one row."""
+    if row_id is None or not any(deltas.values()):
+        return
+    values = {
+        name: getattr(model, name) + delta for name, delta in deltas.items() if delta
+    }
+    db.session.execute(update(model).where(model.id == row_id).values(**values))
+
+
+def task_added(stage):
+    _bump(Stage, stage.id, task_count=1)
+    _bump(Project, stage.project_id, task_count=1)
+
+
+def task_removed(task):
+    _bump(Stage, task.stage_id, task_count=-1)
+    _bump(Project, task.stage.project_id, task_count=-1)
+
+
+def task_moved(old_stage, new_stage):
+    _bump(Stage, old_stage.id, task_count=-1)
+    _bump(Stage, new_stage.id, task_count=1)
+    if old_stage.project_id != new_stage.project_id:
+        _bump(Project, old_stage.project_id, task_count=-1)
+        _bump(Project, new_stage.project_id, task_count=1)
+
+
+def stage_removed(stage):
+    """Subtracts the stage's tasks from its project before the stage is deleted."""
+    task_count = (
+        select(func.count(Task.id))
+        .where(Task.stage_id == stage.id, Task.deleted_at.is_(None))
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(Project)
+        .where(Project.id == stage.project_id)
+        .values(task_count=Project.task_count - task_count)
+    )
+
+
+def stage_restored(stage):
+    """Adds the tasks of a restored stage back to its project."""
+    task_count = (
+        select(func.count(Task.id))
+        .where(Task.stage_id == stage.id, Task.deleted_at.is_(None))
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(Project)
+        .where(Project.id == stage.project_id)
+        .values(task_count=Project.task_count + task_count)
+    )
+
+
+def subtask_added(task_id, completed):
+    _bump(Task, task_id, subtask_count=1, open_subtask_count=0 if completed else 1)
+
+
+def subtask_removed(subtask):
+    _bump(
+        Task,
+        subtask.parent_task_id,
+        subtask_count=-1,
+        open_subtask_count=0 if subtask.completed else -1,
+    )
+
+
+def subtask_completed_changed(subtask, was_completed):
+    if bool(subtask.completed) != bool(was_completed):
+        delta = -1 if subtask.completed else 1
+        _bump(Task, subtask.parent_task_id, open_subtask_count=delta)
+
+
+def comment_added(task_id):
+    _bump(Task, task_id, comment_count=1)
+
+
+def _version_bump(where):
+    # A new version is not an edit of the project, so updated_at is kept
+    return (
+        update(Project)
+        .where(where)
+        .values(version=Project.version + 1, updated_at=Project.updated_at)
+    )
+
+
+def project_changed(project_id):
+    """Bumps the project's version, so responses cached for the old one expire."""
+    db.session.execute(_version_bump(Project.id == project_id))
+
+
+def _counter_definitions():
+    """``(model, column name, correlated subquery computing the true value)``"""
+    return [
+        (
+            Project,
+            "task_count",
+            select(func.count(Task.id))
+            .join(Stage, Task.stage_id == Stage.id)
+            .where(
+                Stage.project_id == Project.id,
+                Stage.deleted_at.is_(None),
+                Task.deleted_at.is_(None),
+            )
+            .scalar_subquery(),
+        ),
+        (
+            Stage,
+            "task_count",
+            select(func.count(Task.id))
+            .where(Task.stage_id == Stage.id, Task.deleted_at.is_(None))
+            .scalar_subquery(),
+        ),
+        (
+            Task,
+            "subtask_count",
+            select(func.count(SubTask.id))
+            .where(SubTask.parent_task_id == Task.id)
+            .scalar_subquery(),
+        ),
+        (
+            Task,
+            "open_subtask_count",
+            select(func.count(SubTask.id))
+            .where(
+                SubTask.parent_task_id == Task.id,
+                SubTask.completed.isnot(True),
+            )
+            .scalar_subquery(),
+        ),
+        (
+            Task,
+            "comment_count",
+            select(func.count(Comment.id))
+            .where(Comment.task_id == Task.id)
+            .scalar_subquery(),
+        ),
+    ]
+
+
+def reconcile_counters(connection, fix=False, limit=None):
+    """
+    Recomputes every maintained counter from the underlying rows.
+
+    Args:
+        connection: SQLAlchemy connection to run on.
+        fix (bool): Overwrite drifted counters with the recomputed values.
+        limit (int, optional): Maximum number of drifted rows reported per
+            counter (all drifted rows are fixed regardless).
+
+    Returns:
+        dict: ``{"table.column": {"drifted": n, "rows": [(id, stored, actual)]}}``
+    """
+    report = {}
+    for model, name, actual in _counter_definitions():
+        column = getattr(model, name)
+        drift = (
+            select(model.id, column, actual).where(column != actual).order_by(model.id)
+        )
+        rows = [tuple(row) for row in connection.execute(drift)]
+        report[f"{model.__tablename__}.{name}"] = {
+            "drifted": len(rows),
+            "rows": rows[:limit] if limit is not None else rows,
+        }
+        if fix and rows:
+            connection.execute(
+                update(model).where(column != actual).values({name: actual})
+            )
+            # Board and stage-list responses show project and stage counts
+            if model is Stage:
+                drifted = select(Stage.project_id).where(
+                    Stage.id.in_([row[0] for row in rows])
+                )
+                connection.execute(_version_bump(Project.id.in_(drifted)))
+            elif model is Project:
+                drifted = [row[0] for row in rows]
+                connection.execute(_version_bump(Project.id.in_(drifted)))
+    return report
@@ -0,0 +1,513 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, create_engine, delete, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from backend.app.models import (
+    ActivityLog,
+    FlowDaily,
+    FlowTaskState,
+    FlowWatermark,
+    Stage,
+    Task,
+)
+
+FLOW_ACTIONS = (
+    "TASK_CREATED",
+    "TASK_RESTORED",
+    "TASK_UPDATED",
+    "TASK_DELETED",
+    "STAGE_DELETED",
+    "STAGE_RESTORED",
+    "PROJECT_RESTORED",
+)
+RESTORE_ACTIONS = ("STAGE_RESTORED", "PROJECT_RESTORED")
+PERCENTILES = (50, 85, 95)
+
+
+class FlowState:
+    """Replay state of one project: task positions and per-stage counts."""
+
+    def __init__(self, day=None, counts=None, tasks=None, last_activity_id=0):
+        self.day = day
+        self.counts = dict(counts or {})
+        # task_id -> [stage_id, created_at, started_at, entered_stage_at]
+        self.tasks = dict(tasks or {})
+        self.last_activity_id = last_activity_id
+        self.changed = set()
+        self.removed = set()
+
+    def _move(self, stage_id, delta):
+        if stage_id is None:
+            return
+        count = self.counts.get(stage_id, 0) + delta
+        if count > 0:
+            self.counts[stage_id] = count
+        else:
+            self.counts.pop(stage_id, None)
+
+    def _remove(self, task_id):
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            self._move(task[0], -1)
+        self.changed.discard(task_id)
+        self.removed.add(task_id)
+
+    def _add(self, task_id, stage_id, created_at):
+        self.tasks[task_id] = [stage_id, created_at, None, created_at]
+        self._move(stage_id, 1)
+
+    def apply(self, action, task_id, created_at, details, fallback_stage_id):
+        details = details or {}
+        if action in ("TASK_CREATED", "TASK_RESTORED"):
+            # A restored task re-enters its stage as if it were new
+            if task_id is None or task_id in self.tasks:
+                return
+            self._add(task_id, details.get("stage_id", fallback_stage_id), created_at)
+        elif action == "TASK_UPDATED" and "to_project_id" in details:
+            # Moved to another project, whose log has the move as well
+            if task_id in self.tasks:
+                self._remove(task_id)
+            else:
+                # Its row may already be gone: the other project took it over
+                self._move(details.get("from_stage_id"), -1)
+                self.removed.add(task_id)
+            return
+        elif action == "TASK_UPDATED" and "from_project_id" in details:
+            # Moved in from another project: counts as created on arrival
+            stage_id = details.get("to_stage_id")
+            if task_id is None or task_id in self.tasks:
+                return
+            self._add(task_id, stage_id, created_at)
+        elif action == "TASK_UPDATED":
+            task = self.tasks.get(task_id)
+            to_stage = details.get("to_stage_id")
+            if task is None or to_stage is None or to_stage == task[0]:
+                return
+            self._move(task[0], -1)
+            self._move(to_stage, 1)
+            task[0] = to_stage
+            task[2] = task[2] or created_at
+            task[3] = created_at
+        elif action == "TASK_DELETED":
+            self._remove(task_id)
+            return
+        elif action == "STAGE_DELETED":
+            stage_id = details.get("stage_id")
+            for other_id, task in list(self.tasks.items()):
+                if task[0] == stage_id:
+                    self._remove(other_id)
+            self.counts.pop(stage_id, None)
+            return
+        elif action in RESTORE_ACTIONS:
+            # The live tasks of a restored stage or project (attached by
+            # _with_restored_tasks) re-enter their stages as if they were new
+            for other_id, stage_id in details.get("tasks", ()):
+                if other_id in self.tasks:
+                    continue
+                self._add(other_id, stage_id, created_at)
+                self.changed.add(other_id)
+                self.removed.discard(other_id)
+            return
+        else:
+            return
+        self.changed.add(task_id)
+        self.removed.discard(task_id)
+
+
+def replay(events, state, until):
+    """
+    Applies ``events`` to ``state`` and returns ``{day: {stage_id: count}}``
+    end-of-day snapshots from the state's current day through ``until``.
+
+    ``events`` are ``(id, action, task_id, created_at, details,
+    fallback_stage_id)`` tuples in chronological order. An event dated before
+    the state's current day (which can only happen to late writes) counts on
+    the current day, since earlier days are already rolled up.
+    """
+    snapshots = {}
+    for event_id, action, task_id, created_at, details, fallback in events:
+        day = created_at.date()
+        if state.day is None:
+            state.day = day
+        while state.day < day:
+            snapshots[state.day] = dict(state.counts)
+            state.day += timedelta(days=1)
+        state.apply(action, task_id, created_at, details, fallback)
+        state.last_activity_id = max(state.last_activity_id, event_id)
+    if state.day is None:
+        return snapshots
+    while True:
+        snapshots[state.day] = dict(state.counts)
+        if state.day >= until:
+            break
+        state.day += timedelta(days=1)
+    return snapshots
+
+
+def _event_query(project_id, after_id=0):
+    return (
+        select(
+            ActivityLog.id,
+            ActivityLog.action_type,
+            ActivityLog.task_id,
+            ActivityLog.created_at,
+            ActivityLog.details,
+            Task.stage_id,
+        )
+        .outerjoin(Task, Task.id == ActivityLog.task_id)
+        .where(
+            ActivityLog.project_id == project_id,
+            ActivityLog.id > after_id,
+            ActivityLog.action_type.in_(FLOW_ACTIONS),
+        )
+    )
+
+
+def _with_restored_tasks(connection, project_id, events):
+    """
+    Attaches to each restore event the ``[task_id, stage_id]`` pairs of the
+    live tasks it brought back: those of the restored stage (or, for the
+    project, of all its live stages) created before the restore. The log
+    does not record them, so they are read from the tasks as they are now.
+    """
+    if not any(event[1] in RESTORE_ACTIONS for event in events):
+        return events
+    live = connection.execute(
+        select(Task.id, Task.stage_id, Task.created_at)
+        .join(Stage, Stage.id == Task.stage_id)
+        .where(
+            Stage.project_id == project_id,
+            Stage.deleted_at.is_(None),
+            Task.deleted_at.is_(None),
+        )
+        .order_by(Task.id)
+    ).all()
+    enriched = []
+    for event in events:
+        event_id, action, task_id, created_at, details, fallback = event
+        if action in RESTORE_ACTIONS:
+            stage_id = (details or {}).get("stage_id")
+            tasks = [
+                [live_id, live_stage_id]
+                for live_id, live_stage_id, live_created_at in live
+                if live_created_at <= created_at
+                and (action == "PROJECT_RESTORED" or live_stage_id == stage_id)
+            ]
+            details = dict(details or {}, tasks=tasks)
+            event = (event_id, action, task_id, created_at, details, fallback)
+        enriched.append(event)
+    return enriched
+
+
+def _load_state(connection, project_id, watermark, events):
+    """Loads the rolled-up state that ``events`` can touch."""
+    if watermark is None:
+        return FlowState()
+    last_activity_id, day = watermark
+    counts = dict(
+        connection.execute(
+            select(FlowDaily.stage_id, FlowDaily.task_count).where(
+                FlowDaily.project_id == project_id, FlowDaily.day == day
+            )
+        ).all()
+    )
+    task_ids = {event[2] for event in events if event[2] is not None}
+    for event in events:
+        if event[1] in RESTORE_ACTIONS:
+            task_ids.update(task_id for task_id, _ in event[4]["tasks"])
+    stage_ids = {
+        (event[4] or {}).get("stage_id")
+        for event in events
+        if event[1] == "STAGE_DELETED"
+    }
+    tasks = {}
+    if task_ids or stage_ids:
+        rows = connection.execute(
+            select(
+                FlowTaskState.task_id,
+                FlowTaskState.stage_id,
+                FlowTaskState.created_at,
+                FlowTaskState.started_at,
+                FlowTaskState.entered_stage_at,
+            ).where(
+                FlowTaskState.project_id == project_id,
+                or_(
+                    FlowTaskState.task_id.in_(task_ids),
+                    FlowTaskState.stage_id.in_(stage_ids),
+                ),
+            )
+        )
+        tasks = {row[0]: list(row[1:]) for row in rows}
+    return FlowState(day, counts, tasks, last_activity_id)
+
+
+def _save_state(connection, project_id, state, snapshots, previous_id, exists):
+    """
+    Writes changed task rows and daily snapshots and advances the watermark.
+    Returns False (writing nothing) when another process advanced the
+    watermark first.
+    """
+    now = datetime.utcnow()
+    if exists:
+        result = connection.execute(
+            update(FlowWatermark)
+            .where(
+                FlowWatermark.project_id == project_id,
+                FlowWatermark.last_activity_id == previous_id,
+            )
+            .values(
+                last_activity_id=state.last_activity_id,
+                day=state.day,
+                updated_at=now,
+            )
+        )
+        if result.rowcount != 1:
+            return False
+    else:
+        # Two first readers of a project race to create its watermark; the
+        # loser's rollup is the winner's, so it backs off like an update would
+        result = connection.execute(
+            _insert_ignore(connection, FlowWatermark).values(
+                project_id=project_id,
+                last_activity_id=state.last_activity_id,
+                day=state.day,
+                updated_at=now,
+            )
+        )
+        if result.rowcount != 1:
+            return False
+
+    if state.removed:
+        connection.execute(
+            delete(FlowTaskState).where(
+                FlowTaskState.project_id == project_id,
+                FlowTaskState.task_id.in_(state.removed),
+            )
+        )
+    if state.changed:
+        # Also drops the row of a project the task moved out of, if that
+        # project has not rolled the move up yet
+        connection.execute(
+            delete(FlowTaskState).where(FlowTaskState.task_id.in_(state.changed))
+        )
+    if state.changed:
+        connection.execute(
+            insert(FlowTaskState),
+            [
+                {
+                    "task_id": task_id,
+                    "project_id": project_id,
+                    "stage_id": state.tasks[task_id][0],
+                    "created_at": state.tasks[task_id][1],
+                    "started_at": state.tasks[task_id][2],
+                    "entered_stage_at": state.tasks[task_id][3],
+                }
+                for task_id in state.changed
+            ],
+        )
+    if snapshots:
+        connection.execute(
+            delete(FlowDaily).where(
+                FlowDaily.project_id == project_id, FlowDaily.day >= min(snapshots)
+            )
+        )
+        rows = [
+            {
+                "project_id": project_id,
+                "day": day,
+                "stage_id": stage_id,
+                "task_count": n,
+            }
+            for day, counts in snapshots.items()
+            for stage_id, n in counts.items()
+        ]
+        if rows:
+            connection.execute(insert(FlowDaily), rows)
+    return True
+
+
+def _insert_ignore(connection, model):
+    """An INSERT that skips rows whose primary key already exists."""
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(connection.dialect.name)
+    if dialect is None:
+        return insert(model)
+    return dialect.insert(model).on_conflict_do_nothing()
+
+
+def refresh_project(connection, project_id, until=None):
+    """
+    Incrementally rolls up activity newer than the project's watermark.
+    Returns the number of new events applied.
+    """
+    until = until or datetime.utcnow().date()
+    watermark = connection.execute(
+        select(FlowWatermark.last_activity_id, FlowWatermark.day).where(
+            FlowWatermark.project_id == project_id
+        )
+    ).first()
+    exists = watermark is not None
+    events = connection.execute(
+        _event_query(project_id, watermark[0] if exists else 0).order_by(ActivityLog.id)
+    ).all()
+    if exists and not events and (watermark[1] is None or watermark[1] >= until):
+        return 0
+    events = _with_restored_tasks(connection, project_id, events)
+    state = _load_state(connection, project_id, watermark, events)
+    previous_id = state.last_activity_id
+    snapshots = replay(events, state, until)
+    if not _save_state(connection, project_id, state, snapshots, previous_id, exists):
+        return 0
+    return len(events)
+
+
+def rebuild_project(connection, project_id, until=None):
+    """Discards a project's rollups and replays its whole activity log."""
+    until = until or datetime.utcnow().date()
+    for model in (FlowTaskState, FlowDaily, FlowWatermark):
+        connection.execute(delete(model).where(model.project_id == project_id))
+    events = connection.execute(
+        _event_query(project_id).order_by(ActivityLog.created_at, ActivityLog.id)
+    ).all()
+    events = _with_restored_tasks(connection, project_id, events)
+    state = FlowState()
+    snapshots = replay(events, state, until)
+    _save_state(connection, project_id, state, snapshots, 0, False)
+    return len(events)
+
+
+def _rebuild_worker(job):
+    engine = create_engine(job["database_url"], connect_args={"timeout": 60})
+    try:
+        with engine.begin() as conn:
+            return job["project_id"], rebuild_project(
+                conn, job["project_id"], job["until"]
+            )
+    finally:
+        engine.dispose()
+
+
+def rebuild_projects(engine, project_ids, workers=None, until=None):
+    """
+    Rebuilds several projects' rollups. Replaying a year of activity is CPU
+    bound, so projects are spread over a process pool, each worker with its
+    own connection; in-memory databases are rebuilt inline.
+    Returns ``{project_id: events replayed}``.
+    """
+    until = until or datetime.utcnow().date()
+    project_ids = list(project_ids)
+    database = engine.url.database
+    workers = max(1, min(workers or os.cpu_count() or 1, len(project_ids) or 1))
+    if workers == 1 or not database or database == ":memory:":
+        results = {}
+        with engine.begin() as conn:
+            for project_id in project_ids:
+                results[project_id] = rebuild_project(conn, project_id, until)
+        return results
+
+    url = engine.url.render_as_string(hide_password=False)
+    jobs = [
+        {"database_url": url, "project_id": project_id, "until": until}
+        for project_id in project_ids
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_rebuild_worker, jobs))
+
+
+def percentiles(values, points=PERCENTILES):
+    """Linear-interpolated percentiles of ``values`` (``None`` when empty)."""
+    ordered = sorted(values)
+    result = {}
+    for point in points:
+        if not ordered:
+            result[f"p{point}"] = None
+            continue
+        rank = (len(ordered) - 1) * point / 100.0
+        low = int(rank)
+        high = min(low + 1, len(ordered) - 1)
+        value = ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+        result[f"p{point}"] = round(value, 2)
+    return result
+
+
+def _summary(hours):
+    summary = {"count": len(hours)}
+    summary.update(percentiles(hours))
+    summary["mean"] = round(sum(hours) / len(hours), 2) if hours else None
+    return summary
+
+
+def flow_metrics(connection, project_id, days=90, until=None):
+    """
+    Lead time, cycle time and cumulative flow for the ``days`` ending ``until``.
+
+    A task is done when it sits in the project's last stage (highest order).
+    Lead time runs from creation to entering that stage; cycle time from the
+    task's first move out of its initial stage to entering the done stage
+    (tasks that went straight to the done stage have no cycle time). Times
+    are in hours.
+    """
+    until = until or datetime.utcnow().date()
+    since = until - timedelta(days=days - 1)
+    stages = connection.execute(
+        select(Stage.id, Stage.name)
+        .where(Stage.project_id == project_id, Stage.deleted_at.is_(None))
+        .order_by(Stage.order, Stage.id)
+    ).all()
+    done_stage_id = stages[-1][0] if stages else None
+
+    lead, cycle = [], []
+    if done_stage_id is not None:
+        window_start = datetime.combine(since, datetime.min.time())
+        window_end = datetime.combine(until + timedelta(days=1), datetime.min.time())
+        rows = connection.execute(
+            select(
+                FlowTaskState.created_at,
+                FlowTaskState.started_at,
+                FlowTaskState.entered_stage_at,
+            ).where(
+                and_(
+                    FlowTaskState.project_id == project_id,
+                    FlowTaskState.stage_id == done_stage_id,
+                    FlowTaskState.entered_stage_at >= window_start,
+                    FlowTaskState.entered_stage_at < window_end,
+                )
+            )
+        )
+        for created_at, started_at, done_at in rows:
+            lead.append((done_at - created_at).total_seconds() / 3600.0)
+            if started_at is not None and started_at < done_at:
+                cycle.append((done_at - started_at).total_seconds() / 3600.0)
+
+    day_list = [since + timedelta(days=i) for i in range(days)]
+    index = {day: i for i, day in enumerate(day_list)}
+    names = dict(stages)
+    series = {stage_id: [0] * days for stage_id, _ in stages}
+    daily = connection.execute(
+        select(FlowDaily.day, FlowDaily.stage_id, FlowDaily.task_count).where(
+            FlowDaily.project_id == project_id,
+            FlowDaily.day >= since,
+            FlowDaily.day <= until,
+        )
+    )
+    for day, stage_id, count in daily:
+        series.setdefault(stage_id, [0] * days)[index[day]] = count
+
+    return {
+        "project_id": project_id,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "done_stage_id": done_stage_id,
+        "throughput": len(lead),
+        "lead_time_hours": _summary(lead),
+        "cycle_time_hours": _summary(cycle),
+        "cumulative_flow": {
+            "days": [day.isoformat() for day in day_list],
+            "stages": [
+                {"stage_id": stage_id, "name": names.get(stage_id), "counts": counts}
+                for stage_id, counts in series.items()
+            ],
+        },
+    }
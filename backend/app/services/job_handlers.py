@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from backend.app.models import Project
+from backend.app.services.counter_service import reconcile_counters
+from backend.app.services.flow_service import rebuild_project, refresh_project
+from backend.app.services.purge_service import purge_deleted
+
+
+def purge_deleted_job(context, grace_seconds=None, batch_size=None):
+    """Purges soft-deleted rows past the grace period, a second at a time."""
+    config = current_app.config
+    if grace_seconds is None:
+        grace_seconds = config.get("PURGE_GRACE_SECONDS", 604800)
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    totals = {}
+    done = False
+    while not done:
+        purged, done = purge_deleted(
+            context.session,
+            cutoff,
+            batch_size=batch_size or config.get("PURGE_BATCH_SIZE", 500),
+            time_budget=1.0,
+        )
+        for table, count in purged.items():
+            totals[table] = totals.get(table, 0) + count
+        context.progress(
+            message=", ".join(f"{count} {table}" for table, count in totals.items())
+        )
+    return totals
+
+
+def reconcile_counters_job(context, fix=False):
+    """Recomputes the maintained counters; returns drifted rows per counter."""
+    report = reconcile_counters(context.session.connection(), fix=fix)
+    context.session.commit()
+    return {counter: result["drifted"] for counter, result in report.items()}
+
+
+def flow_rollup_job(context, project_ids=None, rebuild=False):
+    """Rolls up (or rebuilds) the flow analytics of some or all projects."""
+    if project_ids is None:
+        project_ids = (
+            context.session.execute(select(Project.id).order_by(Project.id))
+            .scalars()
+            .all()
+        )
+    roll_up = rebuild_project if rebuild else refresh_project
+    events = 0
+    for done, project_id in enumerate(project_ids, 1):
+        events += roll_up(context.session.connection(), project_id)
+        context.progress(done / len(project_ids), f"{done}/{len(project_ids)} projects")
+    return {"projects": len(project_ids), "events": events}
+
+
+# Job kind -> handler. Each is called as ``handler(context, **params)`` in
+# an app context; ``context.progress`` (see job_service.JobContext) commits
+# and is where a cancelled job stops. The return value is the job's result.
+HANDLERS = {
+    "purge_deleted": purge_deleted_job,
+    "reconcile_counters": reconcile_counters_job,
+    "flow_rollup": flow_rollup_job,
+}
@@ -0,0 +1,224 @@
+import inspect
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select, update
+
+from backend.app.models import Job
+from backend.app.services.job_handlers import HANDLERS
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once it is cancelled or its lease is lost."""
+
+
+def enqueue(session, kind, params=None, user_id=None, max_attempts=3):
+    """
+    Queues a job of ``kind`` (a key of ``job_handlers.HANDLERS``) and
+    returns it. Raises ValueError for an unknown kind or parameters the
+    handler does not take.
+    """
+    handler = HANDLERS.get(kind)
+    if handler is None:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    params = params or {}
+    try:
+        inspect.signature(handler).bind(None, **params)
+    except TypeError as e:
+        raise ValueError(f"Invalid params for {kind}: {e}")
+    job = Job(
+        kind=kind,
+        params=params,
+        user_id=user_id,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=datetime.utcnow(),
+        cancel_requested=False,
+        progress=0.0,
+    )
+    session.add(job)
+    session.commit()
+    return job
+
+
+def claim(session, owner, lease_seconds, now=None):
+    """
+    Leases the next due job to ``owner`` for ``lease_seconds``.
+
+    Due jobs are queued ones whose ``run_after`` has passed and running
+    ones whose lease ran out (their runner died). The claim is a single
+    conditional UPDATE, so when several workers race for a job exactly one
+    of them gets it. An expired job with no attempts left, or that was being
+    cancelled, is finished instead. Nothing is written while no job is due.
+
+    Returns:
+        tuple: ``(job id, kind)``, or None if no job is due.
+    """
+    now = now or datetime.utcnow()
+    expired = (Job.status == "running") & (Job.lease_expires_at < now)
+    dead = expired & ((Job.attempts >= Job.max_attempts) | Job.cancel_requested)
+    claimable = (
+        ((Job.status == "queued") & (Job.run_after <= now))
+        | (expired & ~Job.cancel_requested)
+    ) & (Job.attempts < Job.max_attempts)
+
+    due = session.execute(select(Job.id).where(claimable | dead).limit(1)).first()
+    if due is None:
+        session.commit()
+        return None
+    session.execute(
+        update(Job)
+        .where(dead)
+        .values(
+            status=case((Job.cancel_requested, "cancelled"), else_="failed"),
+            error=func.coalesce(Job.error, "Lease expired"),
+            lease_owner=None,
+            finished_at=now,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    next_id = (
+        select(Job.id)
+        .where(claimable)
+        .order_by(Job.run_after, Job.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    claimed = session.execute(
+        update(Job)
+        .where(Job.id == next_id, claimable)
+        .values(
+            status="running",
+            attempts=Job.attempts + 1,
+            lease_owner=owner,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            started_at=func.coalesce(Job.started_at, now),
+        )
+        .returning(Job.id, Job.kind),
+        execution_options={"synchronize_session": False},
+    ).first()
+    session.commit()
+    return None if claimed is None else tuple(claimed)
+
+
+def renew(session, owner, job_ids, lease_seconds):
+    """Extends ``owner``'s leases on ``job_ids``."""
+    session.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.lease_owner == owner, Job.status == "running")
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds)),
+        execution_options={"synchronize_session": False},
+    )
+    session.commit()
+
+
+def request_cancel(session, job):
+    """
+    Cancels a queued job at once; a running one stops at its next progress
+    report. Returns False if the job has already finished.
+    """
+    if job.status in FINISHED:
+        return False
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+    job.cancel_requested = True
+    session.commit()
+    return True
+
+
+class JobContext:
+    """What a handler gets to report progress and notice cancellation."""
+
+    def __init__(self, session, job, owner):
+        self.session = session
+        self.job_id = job.id
+        self.attempt = job.attempts
+        self.owner = owner
+
+    def progress(self, fraction=None, message=None):
+        """
+        Records how far the job has got and commits the session. Raises
+        JobCancelled if the job was cancelled or is no longer ours.
+        """
+        row = self.session.execute(
+            update(Job)
+            .where(
+                Job.id == self.job_id,
+                Job.lease_owner == self.owner,
+                Job.status == "running",
+            )
+            .values(
+                progress=Job.progress if fraction is None else min(fraction, 1.0),
+                message=Job.message if message is None else message[:200],
+            )
+            .returning(Job.cancel_requested),
+            execution_options={"synchronize_session": False},
+        ).first()
+        self.session.commit()
+        if row is None or row.cancel_requested:
+            raise JobCancelled()
+
+
+def execute_job(session, job_id, owner, retry_backoff=10.0):
+    """
+    Runs a job claimed by ``owner`` and records the outcome. A failed
+    attempt is queued again after ``retry_backoff`` seconds, doubling with
+    every attempt, until ``max_attempts`` is reached.
+
+    Returns:
+        str: the job's new status, or None if the lease was lost meanwhile.
+    """
+    job = session.get(Job, job_id)
+    kind, attempts, max_attempts = job.kind, job.attempts, job.max_attempts
+    context = JobContext(session, job, owner)
+    now = None
+    try:
+        result = HANDLERS[kind](context, **(job.params or {}))
+    except JobCancelled:
+        session.rollback()
+        values = {"status": "cancelled"}
+    except Exception as e:
+        session.rollback()
+        logger.exception("Job %s (%s) failed", job_id, kind)
+        now = datetime.utcnow()
+        values = {"error": f"{type(e).__name__}: {e}"}
+        if attempts < max_attempts:
+            delay = retry_backoff * 2 ** (attempts - 1)
+            values.update(status="queued", run_after=now + timedelta(seconds=delay))
+        else:
+            values["status"] = "failed"
+    else:
+        values = {"status": "succeeded", "result": result, "progress": 1.0}
+
+    if values["status"] != "queued":
+        values["finished_at"] = now or datetime.utcnow()
+    finished = session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == owner, Job.status == "running")
+        .values(lease_owner=None, lease_expires_at=None, **values),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    session.commit()
+    return values["status"] if finished else None
+
+
+def run_pending(session, owner, lease_seconds=60.0, retry_backoff=10.0):
+    """
+    Claims and runs due jobs one after another in the calling thread until
+    none is left. Returns ``[(job id, kind, status)]``.
+    """
+    results = []
+    while True:
+        claimed = claim(session, owner, lease_seconds)
+        if claimed is None:
+            return results
+        job_id, kind = claimed
+        results.append(
+            (job_id, kind, execute_job(session, job_id, owner, retry_backoff))
+        )
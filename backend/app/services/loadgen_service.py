@@ -0,0 +1,548 @@
+import asyncio
+import bisect
+import json
+import random
+import re
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+# Relative weights of the operations a synthetic user performs.
+DEFAULT_MIX = {
+    "open_board": 40,
+    "list_projects": 10,
+    "drag_task": 20,
+    "add_comment": 15,
+    "edit_tags": 10,
+    "read_activity": 5,
+}
+
+# Upper bounds (ms) of the latency histogram buckets.
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+LOCKED_MARKER = b"database is locked"
+BOARD_NAME = "Load Test Board"
+
+_ACCESS_LOG_RE = re.compile(
+    r"\[(?P<time>[^\]]+)\]\s+\"(?P<method>GET|POST|PUT|DELETE|PATCH) "
+    r"(?P<path>\S+) HTTP/[\d.]+\""
+)
+
+
+def parse_mix(spec):
+    """Parses ``"open_board=40,drag_task=20"`` into an operation weight dict."""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown operation '{name}' in workload mix")
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight for '{name}' in workload mix")
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("Workload mix needs at least one positive weight")
+    return mix
+
+
+def parse_request_log(lines):
+    """
+    Parses a captured request log into replay entries.
+
+    Accepts the JSON lines written by ``--record`` as well as access-log lines
+    in common/combined log format (as written by gunicorn ``--access-logfile``).
+    Access-log entries carry no request body, so writes are replayed with an
+    empty JSON object. Auth requests are skipped: replay logs users in itself.
+    """
+    entries = []
+    first_seen = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            record = json.loads(line)
+            entry = {
+                "offset": float(record.get("offset", 0.0)),
+                "user": record.get("user"),
+                "op": record.get("op", "replay"),
+                "method": record["method"],
+                "path": record["path"],
+                "body": record.get("body"),
+            }
+        else:
+            match = _ACCESS_LOG_RE.search(line)
+            if not match:
+                continue
+            seen = datetime.strptime(match.group("time"), "%d/%b/%Y:%H:%M:%S %z")
+            if first_seen is None:
+                first_seen = seen
+            method = match.group("method")
+            entry = {
+                "offset": (seen - first_seen).total_seconds(),
+                "user": None,
+                "op": "replay",
+                "method": method,
+                "path": match.group("path"),
+                "body": {} if method in ("POST", "PUT", "PATCH") else None,
+            }
+        if entry["path"].startswith("/api/auth/"):
+            continue
+        entries.append(entry)
+    entries.sort(key=lambda entry: entry["offset"])
+    return entries
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram that also keeps raw samples for percentiles."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.samples = []
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, ms)] += 1
+        self.samples.append(ms)
+
+    @property
+    def count(self):
+        return len(self.samples)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def merge(self, other):
+        for i, value in enumerate(other.buckets):
+            self.buckets[i] += value
+        self.samples.extend(other.samples)
+
+
+class LoadStats:
+    """Aggregated results of a load run, keyed by operation name."""
+
+    def __init__(self):
+        self.latency = {}
+        self.statuses = {}
+        self.errors = {}
+        self.locked = 0
+        self.connection_errors = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, op, status, seconds, body=b""):
+        self.latency.setdefault(op, LatencyHistogram()).record(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status == 0:
+            self.connection_errors += 1
+        if status == 0 or status >= 400:
+            self.errors[op] = self.errors.get(op, 0) + 1
+        if body and LOCKED_MARKER in body:
+            self.locked += 1
+
+    @property
+    def elapsed(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return max(end - self.started, 1e-9)
+
+    @property
+    def total(self):
+        return sum(hist.count for hist in self.latency.values())
+
+    def overall(self):
+        merged = LatencyHistogram()
+        for hist in self.latency.values():
+            merged.merge(hist)
+        return merged
+
+    def to_dict(self):
+        overall = self.overall()
+        return {
+            "elapsed_seconds": round(self.elapsed, 3),
+            "requests": self.total,
+            "throughput_rps": round(self.total / self.elapsed, 2),
+            "error_rate": round(sum(self.errors.values()) / max(self.total, 1), 4),
+            "database_locked": self.locked,
+            "connection_errors": self.connection_errors,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "histogram_ms": {
+                (f"<={bound}" if i < len(HISTOGRAM_BOUNDS_MS) else "inf"): count
+                for i, (bound, count) in enumerate(
+                    zip(HISTOGRAM_BOUNDS_MS + [None], overall.buckets)
+                )
+            },
+            "operations": {
+                op: {
+                    "count": hist.count,
+                    "errors": self.errors.get(op, 0),
+                    "p50_ms": round(hist.percentile(50), 2),
+                    "p90_ms": round(hist.percentile(90), 2),
+                    "p99_ms": round(hist.percentile(99), 2),
+                    "max_ms": round(max(hist.samples), 2),
+                }
+                for op, hist in sorted(self.latency.items())
+            },
+        }
+
+
+def format_report(stats):
+    """Renders LoadStats as a plain-text report."""
+    data = stats.to_dict()
+    lines = [
+        f"Requests:      {data['requests']} in {data['elapsed_seconds']}s "
+        f"({data['throughput_rps']} req/s)",
+        f"Error rate:    {data['error_rate'] * 100:.2f}% "
+        f"(connection errors: {data['connection_errors']})",
+        f"DB locked:     {data['database_locked']}",
+        "Statuses:      " + ", ".join(f"{k}={v}" for k, v in data["statuses"].items()),
+        "",
+        f"{'operation':<15}{'count':>8}{'errors':>8}{'p50':>10}{'p90':>10}"
+        f"{'p99':>10}{'max':>10}",
+    ]
+    for op, row in data["operations"].items():
+        lines.append(
+            f"{op:<15}{row['count']:>8}{row['errors']:>8}{row['p50_ms']:>10.1f}"
+            f"{row['p90_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+    lines.append("")
+    lines.append("Latency histogram (ms):")
+    peak = max(data["histogram_ms"].values()) or 1
+    for bucket, count in data["histogram_ms"].items():
+        lines.append(f"  {bucket:>7} {count:>8} {'#' * int(40 * count / peak)}")
+    return "\n".join(lines)
+
+
+class HttpConnection:
+    """Minimal HTTP/1.1 client on asyncio streams with keep-alive reuse."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Accept: application/json",
+            f"Content-Length: {len(payload)}",
+        ]
+        if body is not None:
+            head.append("Content-Type: application/json")
+        for name, value in (headers or {}).items():
+            head.append(f"{name}: {value}")
+        raw = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload
+
+        # A kept-alive connection may have been closed by the server while
+        # idle; retry once on a fresh connection in that case.
+        for attempt in range(2):
+            reused = self.writer is not None
+            if not reused:
+                self.reader, self.writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+            try:
+                self.writer.write(raw)
+                await self.writer.drain()
+                return await self._read_response(method)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if not reused or attempt:
+                    raise
+
+    async def _read_response(self, method):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by server")
+        version, status = status_line.split()[:2]
+        status = int(status)
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status in (204, 304):
+            body = b""
+        elif "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            body = b"".join(chunks)
+        else:
+            body = await self.reader.read()
+            headers["connection"] = "close"
+
+        if headers.get("connection", "").lower() == "close" or version == b"HTTP/1.0":
+            await self.close()
+        return status, headers, body
+
+
+class SyntheticUser:
+    """One logged-in user with its own connection and board to operate on."""
+
+    def __init__(self, index, host, port, password, rng, stats, recorder=None):
+        self.index = index
+        self.conn = HttpConnection(host, port)
+        self.password = password
+        self.rng = rng
+        self.stats = stats
+        self.recorder = recorder
+        self.token = None
+        self.project_id = None
+        self.stage_ids = []
+        self.task_ids = []
+        self.task_tags = {}
+
+    @property
+    def email(self):
+        return f"loadgen-{self.index}@example.com"
+
+    async def call(self, op, method, path, body=None, record=True):
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else None
+        started = time.perf_counter()
+        try:
+            status, _, payload = await self.conn.request(method, path, body, headers)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            await self.conn.close()
+            status, payload = 0, b""
+        if record:
+            self.stats.record(op, status, time.perf_counter() - started, payload)
+            if self.recorder is not None:
+                self.recorder(self.index, op, method, path, body)
+        try:
+            data = json.loads(payload) if payload else None
+        except ValueError:
+            data = None
+        return status, data
+
+    async def login(self):
+        credentials = {"email": self.email, "password": self.password}
+        status, data = await self.call(
+            "login", "POST", "/api/auth/login", credentials, record=False
+        )
+        if status == 401:
+            await self.call(
+                "register",
+                "POST",
+                "/api/auth/register",
+                dict(credentials, username=f"loadgen-{self.index}"),
+                record=False,
+            )
+            status, data = await self.call(
+                "login", "POST", "/api/auth/login", credentials, record=False
+            )
+        if status != 200:
+            raise RuntimeError(f"Login failed for {self.email} (HTTP {status})")
+        self.token = data["access_token"]
+
+    async def setup_call(self, method, path, body=None):
+        """An unrecorded request that must succeed; returns its JSON body."""
+        status, data = await self.call("setup", method, path, body, record=False)
+        if not 200 <= status < 300:
+            raise RuntimeError(
+                f"Board setup failed: {method} {path} returned HTTP {status}: {data}"
+            )
+        return data
+
+    async def prepare_board(self, stages=4, tasks_per_stage=10):
+        """Reuses this user's load test board or creates one."""
+        projects = await self.setup_call("GET", "/api/projects")
+        board = next((p for p in projects or [] if p["name"] == BOARD_NAME), None)
+        if board is None:
+            board = await self.setup_call("POST", "/api/projects", {"name": BOARD_NAME})
+        self.project_id = board["id"]
+
+        stage_list = await self.setup_call(
+            "GET", f"/api/projects/{self.project_id}/stages"
+        )
+        for order in range(len(stage_list or []), stages):
+            stage = await self.setup_call(
+                "POST",
+                f"/api/projects/{self.project_id}/stages",
+                {"name": f"Stage {order + 1}", "order": order},
+            )
+            stage_list.append(stage)
+        self.stage_ids = [stage["id"] for stage in stage_list]
+
+        for stage_id in self.stage_ids:
+            tasks = await self.setup_call("GET", f"/api/stages/{stage_id}/tasks")
+            for order in range(len(tasks or []), tasks_per_stage):
+                task = await self.setup_call(
+                    "POST",
+                    f"/api/stages/{stage_id}/tasks",
+                    {"content": f"Load test task {order + 1}", "order": order},
+                )
+                tasks.append(task)
+            for task in tasks:
+                self.task_ids.append(task["id"])
+                self.task_tags[task["id"]] = [tag["id"] for tag in task["tags"]]
+
+    async def run_operation(self, op):
+        task_id = self.rng.choice(self.task_ids)
+        if op == "open_board":
+            await self.call(op, "GET", f"/api/projects/{self.project_id}")
+        elif op == "list_projects":
+            await self.call(op, "GET", "/api/projects")
+        elif op == "drag_task":
+            body = {
+                "stage_id": self.rng.choice(self.stage_ids),
+                "order": self.rng.randint(0, 20),
+            }
+            await self.call(op, "PUT", f"/api/tasks/{task_id}", body)
+        elif op == "add_comment":
+            body = {"content": f"Load test comment {self.rng.randint(0, 10**6)}"}
+            await self.call(op, "POST", f"/api/tasks/{task_id}/comments", body)
+        elif op == "edit_tags":
+            tags = self.task_tags.setdefault(task_id, [])
+            if tags and self.rng.random() < 0.5:
+                tag_id = tags.pop()
+                await self.call(op, "DELETE", f"/api/tasks/{task_id}/tags/{tag_id}")
+            else:
+                body = {"tag_name": f"loadgen-{self.rng.randint(0, 9)}"}
+                status, data = await self.call(
+                    op, "POST", f"/api/tasks/{task_id}/tags", body
+                )
+                if status == 200 and data:
+                    task = data.get("task", data)
+                    self.task_tags[task_id] = [tag["id"] for tag in task["tags"]]
+        elif op == "read_activity":
+            await self.call(op, "GET", f"/api/projects/{self.project_id}/activities")
+
+
+class _Recorder:
+    def __init__(self, path):
+        self.handle = open(path, "w")
+        self.started = time.perf_counter()
+
+    def __call__(self, user, op, method, path, body):
+        record = {
+            "offset": round(time.perf_counter() - self.started, 6),
+            "user": user,
+            "op": op,
+            "method": method,
+            "path": path,
+            "body": body,
+        }
+        self.handle.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.handle.close()
+
+
+async def _start_users(base_url, users, password, seed, stats, recorder=None):
+    parts = urlsplit(base_url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    rng = random.Random(seed)
+    synthetic = [
+        SyntheticUser(
+            i, host, port, password, random.Random(rng.random()), stats, recorder
+        )
+        for i in range(users)
+    ]
+    await asyncio.gather(*(user.login() for user in synthetic))
+    return synthetic
+
+
+async def run_load(
+    base_url,
+    users=10,
+    duration=30.0,
+    mix=None,
+    think_time=0.0,
+    password="loadgen-password",
+    seed=None,
+    record_path=None,
+):
+    """
+    Runs a closed-loop load test: every synthetic user sends one request,
+    waits for the response (plus ``think_time``), then picks the next
+    operation from the weighted ``mix`` until ``duration`` seconds pass.
+    """
+    mix = mix or dict(DEFAULT_MIX)
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    stats = LoadStats()
+    recorder = _Recorder(record_path) if record_path else None
+
+    synthetic = await _start_users(base_url, users, password, seed, stats, recorder)
+    await asyncio.gather(*(user.prepare_board() for user in synthetic))
+
+    async def loop(user):
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            await user.run_operation(user.rng.choices(names, weights)[0])
+            if think_time:
+                await asyncio.sleep(user.rng.expovariate(1.0 / think_time))
+
+    if recorder is not None:
+        recorder.started = time.perf_counter()
+    stats.started = time.perf_counter()
+    try:
+        await asyncio.gather(*(loop(user) for user in synthetic))
+    finally:
+        stats.finished = time.perf_counter()
+        if recorder is not None:
+            recorder.close()
+        await asyncio.gather(*(user.conn.close() for user in synthetic))
+    return stats
+
+
+async def replay_log(
+    base_url, entries, users=10, speed=1.0, password="loadgen-password", seed=None
+):
+    """
+    Replays parsed request log entries. Entries are assigned to synthetic
+    users (by recorded user, else round-robin); each user sends its entries
+    in order, no earlier than their recorded offset divided by ``speed``.
+    """
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    stats = LoadStats()
+    synthetic = await _start_users(base_url, users, password, seed, stats)
+    lanes = [[] for _ in synthetic]
+    for i, entry in enumerate(entries):
+        owner = entry["user"] if entry["user"] is not None else i
+        lanes[owner % len(synthetic)].append(entry)
+
+    async def lane(user, lane_entries):
+        for entry in lane_entries:
+            due = stats.started + entry["offset"] / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await user.call(entry["op"], entry["method"], entry["path"], entry["body"])
+
+    stats.started = time.perf_counter()
+    try:
+        await asyncio.gather(*(lane(u, lanes[u.index]) for u in synthetic))
+    finally:
+        stats.finished = time.perf_counter()
+        await asyncio.gather(*(user.conn.close() for user in synthetic))
+    return stats
@@ -0,0 +1,75 @@
+from backend.app import db
+from backend.app.models import Project, Stage, Task
+from backend.app.pagination import after
+
+ANY_ASSIGNEE = "*"
+
+
+def my_tasks(
+    user_id,
+    assignee,
+    due_after=None,
+    due_before=None,
+    priority=None,
+    limit=50,
+    cursor=None,
+):
+    """
+    Tasks with a due date across every project owned by ``user_id``, ordered
+    by ``(due_date, id)``.
+
+    A single assignee is answered from the ``(assignee, due_date)`` index,
+    so the work done depends on that assignee's tasks in the window rather
+    than on how many projects the user has; ``ANY_ASSIGNEE`` walks the
+    ``(stage_id, due_date)`` index of each of the user's stages instead.
+
+    Args:
+        user_id (int): Owner of the projects searched.
+        assignee (str): Assignee to match, or ``ANY_ASSIGNEE``.
+        due_after (datetime, optional): Inclusive lower bound on the due date.
+        due_before (datetime, optional): Exclusive upper bound on the due date.
+        priority (str, optional): Only tasks with this priority.
+        limit (int): Page size.
+        cursor (tuple, optional): ``(due_date, id)`` of the last task of the
+            previous page.
+
+    Returns:
+        tuple: ``(rows, has_more)`` where rows are
+        ``(task, stage name, project id, project name)``.
+    """
+    query = (
+        db.session.query(Task, Stage.name, Project.id, Project.name)
+        .join(Stage, Task.stage_id == Stage.id)
+        .join(Project, Stage.project_id == Project.id)
+        .filter(
+            Project.user_id == user_id,
+            Project.deleted_at.is_(None),
+            Stage.deleted_at.is_(None),
+            Task.deleted_at.is_(None),
+            Task.due_date.isnot(None),
+        )
+    )
+    if assignee == ANY_ASSIGNEE:
+        stage_ids = (
+            db.session.query(Stage.id)
+            .join(Project, Stage.project_id == Project.id)
+            .filter(
+                Project.user_id == user_id,
+                Project.deleted_at.is_(None),
+                Stage.deleted_at.is_(None),
+            )
+        )
+        query = query.filter(Task.stage_id.in_(stage_ids.scalar_subquery()))
+    else:
+        query = query.filter(Task.assignee == assignee)
+    if due_after is not None:
+        query = query.filter(Task.due_date >= due_after)
+    if due_before is not None:
+        query = query.filter(Task.due_date < due_before)
+    if priority:
+        query = query.filter(Task.priority == priority)
+    if cursor is not None:
+        query = query.filter(after((Task.due_date, Task.id), cursor))
+
+    rows = query.order_by(Task.due_date, Task.id).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from sqlalchemy import and_, case, distinct, func, select
+
+from backend.app import db
+from backend.app.models import Project, Stage, Task
+from backend.app.pagination import after
+
+
+def project_page(user_id, limit=50, cursor=None, with_counts=False, now=None):
+    """
+    One page of the live projects owned by ``user_id``, newest first, ordered
+    by ``(created_at, id)`` descending and read from the partial
+    ``(user_id, created_at)`` index.
+
+    With ``with_counts`` every project also gets its live stage and task
+    counts and the number of tasks due before ``now``. They come from one
+    GROUP BY over the stage/task foreign key indexes, limited to the page's
+    projects and joined to the page in the same statement, so the cost
+    follows the size of the page rather than of the user's whole account.
+
+    Args:
+        user_id (int): Owner of the projects.
+        limit (int): Page size.
+        cursor (tuple, optional): ``(created_at, id)`` of the last project of
+            the previous page.
+        with_counts (bool): Whether to compute the counts.
+        now (datetime, optional): Reference time for overdue tasks. Defaults
+            to the current UTC time.
+
+    Returns:
+        tuple: ``(rows, has_more)`` where rows are ``(project, counts)`` and
+        counts is ``{"stages": n, "tasks": n, "overdue": n}`` or None.
+    """
+    order = (Project.created_at.desc(), Project.id.desc())
+    live = [Project.user_id == user_id, Project.deleted_at.is_(None)]
+    if cursor is not None:
+        live.append(after((Project.created_at, Project.id), cursor, descending=True))
+
+    if not with_counts:
+        projects = (
+            db.session.execute(
+                select(Project).where(*live).order_by(*order).limit(limit + 1)
+            )
+            .scalars()
+            .all()
+        )
+        return [(project, None) for project in projects[:limit]], len(projects) > limit
+
+    page = select(Project.id).where(*live).order_by(*order).limit(limit + 1).cte("page")
+    now = now or datetime.utcnow()
+    counts = (
+        select(
+            Stage.project_id,
+            func.count(distinct(Stage.id)).label("stages"),
+            func.count(Task.id).label("tasks"),
+            func.coalesce(func.sum(case((Task.due_date < now, 1), else_=0)), 0).label(
+                "overdue"
+            ),
+        )
+        .outerjoin(Task, and_(Task.stage_id == Stage.id, Task.deleted_at.is_(None)))
+        .where(Stage.project_id.in_(select(page.c.id)), Stage.deleted_at.is_(None))
+        .group_by(Stage.project_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(Project, counts.c.stages, counts.c.tasks, counts.c.overdue)
+        .join(page, page.c.id == Project.id)
+        .outerjoin(counts, counts.c.project_id == Project.id)
+        .order_by(*order)
+    ).all()
+    result = [
+        (
+            project,
+            {"stages": stages or 0, "tasks": tasks or 0, "overdue": overdue or 0},
+        )
+        for project, stages, tasks, overdue in rows[:limit]
+    ]
+    return result, len(rows) > limit
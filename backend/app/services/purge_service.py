@@ -0,0 +1,102 @@
+import time
+
+from sqlalchemy import delete, select
+
+from backend.app.models import ActivityLog, FlowTaskState, Project, Stage, Task
+
+
+class _Purge:
+    """One purge run: row counts so far and the time budget left."""
+
+    def __init__(self, session, batch_size, time_budget, clock):
+        self.session = session
+        self.batch_size = batch_size
+        self.clock = clock
+        self.deadline = None if time_budget is None else clock() + time_budget
+        self.purged = {"projects": 0, "stages": 0, "tasks": 0, "activities": 0}
+
+    def out_of_time(self):
+        return self.deadline is not None and self.clock() >= self.deadline
+
+    def delete(self, model, where, key=None):
+        """
+        Deletes the rows of ``model`` matching ``where``, ``batch_size`` at a
+        time with a commit after each batch. Returns False if the time budget
+        ran out first.
+        """
+        column = model.task_id if model is FlowTaskState else model.id
+        while not self.out_of_time():
+            batch = select(column).where(where).limit(self.batch_size)
+            deleted = self.session.execute(
+                delete(model).where(column.in_(batch.scalar_subquery())),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+            self.session.commit()
+            if key is not None:
+                self.purged[key] += deleted
+            if deleted < self.batch_size:
+                return True
+        return False
+
+    def stage(self, stage_id):
+        """Purges a stage: its tasks first, then the stage row."""
+        return self.delete(Task, Task.stage_id == stage_id, "tasks") and self.delete(
+            Stage, Stage.id == stage_id, "stages"
+        )
+
+    def project(self, project_id):
+        """
+        Purges a project: stage by stage, then its activity and flow state,
+        then the project row.
+        """
+        stage_ids = self.session.execute(
+            select(Stage.id).where(Stage.project_id == project_id)
+        ).scalars()
+        return (
+            all(self.stage(stage_id) for stage_id in stage_ids.all())
+            and self.delete(
+                ActivityLog, ActivityLog.project_id == project_id, "activities"
+            )
+            and self.delete(FlowTaskState, FlowTaskState.project_id == project_id)
+            and self.delete(Project, Project.id == project_id, "projects")
+        )
+
+
+def purge_deleted(session, cutoff, batch_size=500, time_budget=None, clock=None):
+    """
+    Permanently removes the projects, stages and tasks soft-deleted before
+    ``cutoff``, along with everything under them.
+
+    Rows go in batches of ``batch_size``, each its own transaction, so
+    writers are never blocked behind one large delete; subtasks, comments
+    and task tags follow their task by ON DELETE CASCADE. Counters need no
+    adjustment: soft-deleted rows were already taken out of them. Once
+    ``time_budget`` seconds have passed no further batch is started and the
+    rest is left for the next run. Concurrent runs (one per worker) only
+    repeat each other's deletes.
+
+    Returns:
+        tuple: ``({"projects": n, "stages": n, "tasks": n, "activities": n},
+        done)`` where ``done`` is False if the time budget ran out.
+    """
+    run = _Purge(session, batch_size, time_budget, clock or time.monotonic)
+
+    def tombstones(model):
+        return (
+            session.execute(
+                select(model.id)
+                .where(model.deleted_at.isnot(None), model.deleted_at <= cutoff)
+                .order_by(model.deleted_at)
+            )
+            .scalars()
+            .all()
+        )
+
+    done = (
+        run.delete(
+            Task, Task.deleted_at.isnot(None) & (Task.deleted_at <= cutoff), "tasks"
+        )
+        and all(run.stage(stage_id) for stage_id in tombstones(Stage))
+        and all(run.project(project_id) for project_id in tombstones(Project))
+    )
+    return run.purged, done
@@ -0,0 +1,478 @@
+import os
+import random
+import secrets
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+
+from backend.app import db
+from backend.app.ids import max_used_id
+from backend.app.models import (
+    User,
+    Project,
+    Stage,
+    Task,
+    SubTask,
+    Comment,
+    ACTION_CODES,
+    ActivityLog,
+    Tag,
+    task_tag,
+)
+from backend.app.services.counter_service import reconcile_counters
+
+# Default shape of a generated database. Every count that varies per parent
+# row is a distribution spec understood by parse_distribution().
+DEFAULT_SPEC = {
+    "stages": "uniform:3:7",
+    "tasks": "uniform:20:120",
+    "content_length": "normal:80:40",
+    "tags": "uniform:0:3",
+    "subtasks": "uniform:0:5",
+    "comments": "zipf:1.6:12",
+    "activities": "uniform:0:4",
+}
+
+PRIORITIES = ["Low", "Medium", "High", None]
+
+# Parent-first order in which shard tables are merged into the target DB.
+# For every table: the columns that hold ids generated inside the shard and
+# therefore have to be shifted by the offset of the table they point to.
+MERGE_PLAN = [
+    (Project.__table__, {"id": "project"}),
+    (Stage.__table__, {"id": "stage", "project_id": "project"}),
+    (Task.__table__, {"id": "task", "stage_id": "stage"}),
+    (SubTask.__table__, {"id": "sub_task", "parent_task_id": "task"}),
+    (Comment.__table__, {"id": "comment", "task_id": "task"}),
+    (task_tag, {"task_id": "task"}),
+    (
+        ActivityLog.__table__,
+        {"id": "activity_log", "project_id": "project", "task_id": "task"},
+    ),
+]
+
+_WORDS = (
+    "fix update review deploy refactor design draft write test document "
+    "investigate migrate release triage plan verify cleanup optimize "
+    "backend frontend api board stage task tag comment user login sprint "
+    "release build pipeline docs bug feature cache index query report"
+).split()
+
+
+def parse_distribution(spec):
+    """
+    Parses a distribution spec into a sampler taking a ``random.Random``.
+
+    Supported specs: ``fixed:N``, ``uniform:LO:HI``, ``normal:MEAN:SD`` and
+    ``zipf:ALPHA:MAX`` (a heavy-tailed distribution clipped to MAX). All
+    samplers return non-negative integers.
+    """
+    kind, _, args = str(spec).partition(":")
+    try:
+        params = [float(p) for p in args.split(":")] if args else []
+    except ValueError:
+        raise ValueError(f"Invalid distribution spec '{spec}'")
+
+    if kind == "fixed" and len(params) == 1:
+        value = int(params[0])
+        return lambda rng: value
+    if kind == "uniform" and len(params) == 2:
+        low, high = int(params[0]), int(params[1])
+        return lambda rng: rng.randint(low, high)
+    if kind == "normal" and len(params) == 2:
+        mean, sd = params
+        return lambda rng: max(0, int(rng.gauss(mean, sd)))
+    if kind == "zipf" and len(params) == 2:
+        alpha, upper = params[0], int(params[1])
+        return lambda rng: min(upper, int(rng.paretovariate(alpha)) - 1)
+    raise ValueError(f"Invalid distribution spec '{spec}'")
+
+
+def _corpus(rng, size=1 << 16):
+    return " ".join(rng.choice(_WORDS) for _ in range(size // 6))
+
+
+def _text(rng, corpus, length):
+    # Slicing one pre-generated corpus is far cheaper than joining fresh
+    # words for every one of the millions of generated rows.
+    length = max(1, min(length, len(corpus) // 2))
+    start = int(rng.random() * (len(corpus) - length))
+    return corpus[start : start + length].strip() or corpus[:length]
+
+
+def _set_fast_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=OFF")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.close()
+
+
+class _Writer:
+    """Buffers rows per table and flushes them as executemany Core INSERTs."""
+
+    def __init__(self, conn, batch_size):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, table, row):
+        rows = self.buffers.setdefault(table, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self.flush(table)
+
+    def flush(self, table=None):
+        tables = [table] if table is not None else list(self.buffers)
+        for t in tables:
+            rows = self.buffers.get(t)
+            if rows:
+                self.conn.execute(t.insert(), rows)
+                self.counts[t.name] = self.counts.get(t.name, 0) + len(rows)
+                self.buffers[t] = []
+
+
+def _generate_shard(job):
+    """
+    Fills one shard database with ``project_count`` projects and everything
+    below them. Ids are local to the shard and start at 1; merge_shards()
+    shifts them into the id space of the target database.
+    """
+    path = job["path"]
+    spec = job["spec"]
+    users = job["users"]
+    tag_ids = job["tag_ids"]
+    rng = random.Random(job["seed"])
+    now = datetime.utcnow()
+    history = timedelta(days=job["days"])
+
+    sample = {name: parse_distribution(value) for name, value in spec.items()}
+    corpus = _corpus(rng)
+
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", _set_fast_pragmas)
+    db.metadata.create_all(engine, tables=[table for table, _ in MERGE_PLAN])
+
+    ids = {"project": 0, "stage": 0, "task": 0, "subtask": 0, "comment": 0}
+    activity_id = 0
+
+    with engine.begin() as conn:
+        writer = _Writer(conn, job["batch_size"])
+        for _ in range(job["project_count"]):
+            owner_id = rng.choice(users)[0]
+            ids["project"] += 1
+            project_id = ids["project"]
+            project_created = now - history * rng.random()
+            project_name = _text(rng, corpus, 24).title()
+            writer.add(
+                Project.__table__,
+                {
+                    "id": project_id,
+                    "name": project_name,
+                    "description": _text(rng, corpus, 60),
+                    "user_id": owner_id,
+                    "created_at": project_created,
+                    "updated_at": project_created,
+                },
+            )
+            activity_id += 1
+            writer.add(
+                ActivityLog.__table__,
+                {
+                    "id": activity_id,
+                    "action": ACTION_CODES["PROJECT_CREATED"],
+                    "user_id": owner_id,
+                    "project_id": project_id,
+                    "task_id": None,
+                    "details": None,
+                    "created_at": project_created,
+                },
+            )
+
+            for stage_order in range(max(1, sample["stages"](rng))):
+                ids["stage"] += 1
+                stage_id = ids["stage"]
+                stage_name = _text(rng, corpus, 12).title()
+                writer.add(
+                    Stage.__table__,
+                    {
+                        "id": stage_id,
+                        "name": stage_name,
+                        "project_id": project_id,
+                        "order": stage_order,
+                        "created_at": project_created,
+                        "updated_at": project_created,
+                    },
+                )
+
+                for task_order in range(sample["tasks"](rng)):
+                    ids["task"] += 1
+                    task_id = ids["task"]
+                    task_created = project_created + (now - project_created) * (
+                        rng.random()
+                    )
+                    content = _text(rng, corpus, sample["content_length"](rng))
+                    writer.add(
+                        Task.__table__,
+                        {
+                            "id": task_id,
+                            "content": content,
+                            "stage_id": stage_id,
+                            "assignee": (
+                                rng.choice(users)[1] if rng.random() < 0.7 else None
+                            ),
+                            "order": task_order,
+                            "created_at": task_created,
+                            "updated_at": task_created,
+                            "due_date": (
+                                task_created + timedelta(days=rng.randint(1, 60))
+                                if rng.random() < 0.5
+                                else None
+                            ),
+                            "priority": rng.choice(PRIORITIES),
+                        },
+                    )
+                    activity_id += 1
+                    writer.add(
+                        ActivityLog.__table__,
+                        {
+                            "id": activity_id,
+                            "action": ACTION_CODES["TASK_CREATED"],
+                            "user_id": owner_id,
+                            "project_id": project_id,
+                            "task_id": task_id,
+                            "details": None,
+                            "created_at": task_created,
+                        },
+                    )
+
+                    tag_count = min(sample["tags"](rng), len(tag_ids))
+                    for tag_id in rng.sample(tag_ids, tag_count):
+                        writer.add(task_tag, {"task_id": task_id, "tag_id": tag_id})
+
+                    for subtask_order in range(sample["subtasks"](rng)):
+                        ids["subtask"] += 1
+                        writer.add(
+                            SubTask.__table__,
+                            {
+                                "id": ids["subtask"],
+                                "content": _text(rng, corpus, 40),
+                                "parent_task_id": task_id,
+                                "completed": rng.random() < 0.4,
+                                "order": subtask_order,
+                                "created_at": task_created,
+                                "updated_at": task_created,
+                            },
+                        )
+
+                    for _ in range(sample["comments"](rng)):
+                        ids["comment"] += 1
+                        commenter_id = rng.choice(users)[0]
+                        commented_at = task_created + (now - task_created) * (
+                            rng.random()
+                        )
+                        writer.add(
+                            Comment.__table__,
+                            {
+                                "id": ids["comment"],
+                                "content": _text(rng, corpus, 90),
+                                "task_id": task_id,
+                                "user_id": commenter_id,
+                                "created_at": commented_at,
+                                "updated_at": commented_at,
+                            },
+                        )
+                        activity_id += 1
+                        writer.add(
+                            ActivityLog.__table__,
+                            {
+                                "id": activity_id,
+                                "action": ACTION_CODES["COMMENT_ADDED"],
+                                "user_id": commenter_id,
+                                "project_id": project_id,
+                                "task_id": task_id,
+                                "details": None,
+                                "created_at": commented_at,
+                            },
+                        )
+
+                    for _ in range(sample["activities"](rng)):
+                        activity_id += 1
+                        writer.add(
+                            ActivityLog.__table__,
+                            {
+                                "id": activity_id,
+                                "action": ACTION_CODES["TASK_UPDATED"],
+                                "user_id": owner_id,
+                                "project_id": project_id,
+                                "task_id": task_id,
+                                "details": None,
+                                "created_at": task_created
+                                + (now - task_created) * rng.random(),
+                            },
+                        )
+        writer.flush()
+
+    engine.dispose()
+    return path, writer.counts
+
+
+def _seed_users_and_tags(conn, user_count, tag_count):
+    """
+    Inserts the shared users and tags into the target database and returns
+    ``([(user_id, username), ...], [tag_id, ...])`` for the shard workers.
+    Users carry a per-run token so repeated runs never collide on the unique
+    username/email columns; tags are reused by name.
+    """
+    user_table = User.__table__
+    tag_table = Tag.__table__
+    token = secrets.token_hex(3)
+    # Every seeded user shares one password hash; hashing per user would
+    # dominate generation time.
+    probe = User()
+    probe.set_password("password")
+    now = datetime.utcnow()
+
+    first_id = max_used_id(conn, user_table) + 1
+    users = []
+    rows = []
+    for i in range(user_count):
+        username = f"seed-{token}-{i}"
+        users.append((first_id + i, username))
+        rows.append(
+            {
+                "id": first_id + i,
+                "username": username,
+                "email": f"{username}@example.com",
+                "password_hash": probe.password_hash,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    if rows:
+        conn.execute(user_table.insert(), rows)
+
+    names = [f"tag-{i}" for i in range(tag_count)]
+    if names:
+        conn.execute(
+            tag_table.insert().prefix_with("OR IGNORE"),
+            [{"name": name} for name in names],
+        )
+    tag_ids = [
+        row.id
+        for row in conn.execute(
+            db.select(tag_table.c.id).where(tag_table.c.name.in_(names))
+        )
+    ]
+    return users, tag_ids
+
+
+def merge_shards(conn, shard_paths):
+    """
+    Copies every shard into the target database with set-based
+    ``INSERT ... SELECT`` statements, shifting shard-local ids past the
+    highest id each target table has handed out (see ``max_used_id``), so
+    ids of purged tasks are not reused; the explicit ids advance the
+    table's sequence as they are inserted.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    for path in shard_paths:
+        conn.exec_driver_sql("ATTACH DATABASE ? AS shard", (path,))
+        try:
+            offsets = {}
+            for table, shifted in MERGE_PLAN:
+                if "id" in shifted:
+                    offsets[table.name] = max_used_id(conn, table)
+            for table, shifted in MERGE_PLAN:
+                columns = [column.name for column in table.columns]
+                select_list = []
+                for name in columns:
+                    if name in shifted:
+                        select_list.append(f"{quote(name)} + {offsets[shifted[name]]}")
+                    else:
+                        select_list.append(quote(name))
+                conn.exec_driver_sql(
+                    f"INSERT INTO main.{quote(table.name)} "
+                    f"({', '.join(quote(name) for name in columns)}) "
+                    f"SELECT {', '.join(select_list)} "
+                    f"FROM shard.{quote(table.name)}"
+                )
+            conn.commit()
+        finally:
+            conn.exec_driver_sql("DETACH DATABASE shard")
+
+
+def seed_database(
+    engine,
+    projects=100,
+    users=50,
+    tags=40,
+    workers=None,
+    seed=None,
+    days=365,
+    batch_size=5000,
+    spec=None,
+    work_dir=None,
+):
+    """
+    Generates a production-scale fixture database.
+
+    Projects are split across ``workers`` processes, each writing its own
+    SQLite shard with bulk Core INSERTs; the shards are then merged into the
+    database behind ``engine`` and the maintained counters are recomputed.
+    Returns the number of rows inserted per table.
+    """
+    full_spec = dict(DEFAULT_SPEC)
+    full_spec.update(spec or {})
+    for value in full_spec.values():
+        parse_distribution(value)  # Fail fast before forking workers
+
+    workers = max(1, min(workers or os.cpu_count() or 1, projects or 1))
+    rng = random.Random(seed)
+
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        seeded_users, tag_ids = _seed_users_and_tags(conn, max(users, 1), tags)
+
+    shard_dir = tempfile.mkdtemp(prefix="kanban-seed-", dir=work_dir)
+    per_worker, remainder = divmod(projects, workers)
+    jobs = []
+    for index in range(workers):
+        jobs.append(
+            {
+                "path": os.path.join(shard_dir, f"shard-{index}.db"),
+                "project_count": per_worker + (1 if index < remainder else 0),
+                "spec": full_spec,
+                "users": seeded_users,
+                "tag_ids": tag_ids,
+                "seed": rng.getrandbits(64),
+                "days": days,
+                "batch_size": batch_size,
+            }
+        )
+
+    totals = {User.__table__.name: len(seeded_users)}
+    shard_paths = []
+    try:
+        if workers == 1:
+            results = [_generate_shard(jobs[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_generate_shard, jobs))
+        for path, counts in results:
+            shard_paths.append(path)
+            for table_name, count in counts.items():
+                totals[table_name] = totals.get(table_name, 0) + count
+
+        with engine.connect() as conn:
+            merge_shards(conn, shard_paths)
+        with engine.begin() as conn:
+            reconcile_counters(conn, fix=True)
+    finally:
+        for job in jobs:
+            if os.path.exists(job["path"]):
+                os.remove(job["path"])
+        os.rmdir(shard_dir)
+    return totals
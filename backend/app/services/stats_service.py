@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, func
+
+from backend.app import db
+from backend.app.models import Stage, SubTask, Task
+
+# Stage-to-task join over the tasks that are not soft-deleted
+LIVE_TASKS = and_(Task.stage_id == Stage.id, Task.deleted_at.is_(None))
+
+
+def _empty_stats(project_id):
+    return {
+        "project_id": project_id,
+        "total_tasks": 0,
+        "stages": [],
+        "overdue": 0,
+        "due_soon": 0,
+        "priorities": {},
+        "assignees": {},
+        "subtasks": {"total": 0, "completed": 0, "completion_ratio": None},
+    }
+
+
+def project_stats(project_ids, now=None, due_soon_days=7):
+    """
+    Computes dashboard aggregates for several projects at once.
+
+    Every figure comes from a GROUP BY over the stage/task/sub_task foreign
+    key indexes, so the number of statements is fixed (five) regardless of
+    how many projects or tasks are involved.
+
+    Args:
+        project_ids (list[int]): Projects to summarize.
+        now (datetime, optional): Reference time for overdue/due-soon.
+            Defaults to the current UTC time.
+        due_soon_days (int): Tasks due within this many days count as due soon.
+
+    Returns:
+        dict: ``{project_id: stats}``. Overdue tasks have a due date before
+        ``now``; due-soon tasks are due between ``now`` and
+        ``now + due_soon_days``. Tasks without a priority or assignee are
+        counted under ``"none"`` and ``"unassigned"``.
+    """
+    project_ids = list(project_ids)
+    stats = {project_id: _empty_stats(project_id) for project_id in project_ids}
+    if not project_ids:
+        return stats
+    now = now or datetime.utcnow()
+    soon = now + timedelta(days=due_soon_days)
+
+    stage_rows = (
+        db.session.query(
+            Stage.project_id, Stage.id, Stage.name, Stage.order, func.count(Task.id)
+        )
+        .outerjoin(Task, LIVE_TASKS)
+        .filter(Stage.project_id.in_(project_ids), Stage.deleted_at.is_(None))
+        .group_by(Stage.id)
+        .order_by(Stage.project_id, Stage.order, Stage.id)
+    )
+    for project_id, stage_id, name, order, count in stage_rows:
+        stats[project_id]["stages"].append(
+            {"stage_id": stage_id, "name": name, "order": order, "task_count": count}
+        )
+
+    totals = (
+        db.session.query(
+            Stage.project_id,
+            func.count(Task.id),
+            func.sum(case((Task.due_date < now, 1), else_=0)),
+            func.sum(
+                case(((Task.due_date >= now) & (Task.due_date < soon), 1), else_=0)
+            ),
+        )
+        .join(Task, LIVE_TASKS)
+        .filter(Stage.project_id.in_(project_ids), Stage.deleted_at.is_(None))
+        .group_by(Stage.project_id)
+    )
+    for project_id, total, overdue, due_soon in totals:
+        stats[project_id]["total_tasks"] = total
+        stats[project_id]["overdue"] = overdue or 0
+        stats[project_id]["due_soon"] = due_soon or 0
+
+    for column, key, missing in (
+        (Task.priority, "priorities", "none"),
+        (Task.assignee, "assignees", "unassigned"),
+    ):
+        rows = (
+            db.session.query(Stage.project_id, column, func.count(Task.id))
+            .join(Task, LIVE_TASKS)
+            .filter(Stage.project_id.in_(project_ids), Stage.deleted_at.is_(None))
+            .group_by(Stage.project_id, column)
+        )
+        for project_id, value, count in rows:
+            stats[project_id][key][value or missing] = count
+
+    subtask_rows = (
+        db.session.query(
+            Stage.project_id,
+            func.count(SubTask.id),
+            func.sum(case((SubTask.completed.is_(True), 1), else_=0)),
+        )
+        .join(Task, LIVE_TASKS)
+        .join(SubTask, SubTask.parent_task_id == Task.id)
+        .filter(Stage.project_id.in_(project_ids), Stage.deleted_at.is_(None))
+        .group_by(Stage.project_id)
+    )
+    for project_id, total, completed in subtask_rows:
+        completed = completed or 0
+        stats[project_id]["subtasks"] = {
+            "total": total,
+            "completed": completed,
+            "completion_ratio": round(completed / total, 4) if total else None,
+        }
+    return stats
@@ -0,0 +1,91 @@
+import hashlib
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, insert, select, update
+
+from backend.app import db
+from backend.app.models import Generation, Tag
+
+TAG_GENERATION = "tag"
+
+
+def tag_generation():
+    """The current tag-table generation (0 before the first tag change)."""
+    value = db.session.execute(
+        select(Generation.value).where(Generation.name == TAG_GENERATION)
+    ).scalar()
+    return value or 0
+
+
+def tags_changed():
+    """
+    Bumps the tag-table generation in the current transaction and clears
+    this worker's memo once it commits. Call it whenever a tag is created,
+    renamed or deleted.
+    """
+    result = db.session.execute(
+        update(Generation)
+        .where(Generation.name == TAG_GENERATION)
+        .values(value=Generation.value + 1)
+    )
+    if result.rowcount == 0:
+        # Databases created without migrations have no row yet
+        db.session.execute(insert(Generation).values(name=TAG_GENERATION, value=1))
+    # Cleared any earlier, a concurrent reader could memoize the old list
+    # (and generation) again before the change is visible. Inside /api/batch
+    # the view's commit only releases a savepoint; the batch request's
+    # session commits the transaction.
+    session = db.session()
+    session = session.info.get("outer", session)
+    event.listen(session, "after_commit", _clear_memo, once=True)
+
+
+def _clear_memo(session):
+    tag_list_memo.clear()
+
+
+class TagListMemo:
+    """
+    This worker's serialized tag list and its ETag, rebuilt once the
+    tag-table generation moves on.
+
+    The generation is read at most once per ``check_interval`` seconds;
+    in between, the memoized list is served without touching the database.
+    Tags changed by this worker are seen as soon as they commit
+    (``tags_changed`` clears the memo), other workers' changes within
+    ``check_interval``.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or time.monotonic
+        self._entry = None  # (generation, etag, body)
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+    def get(self, check_interval):
+        """Returns ``(etag, body)`` of the current tag list."""
+        now = self.clock()
+        with self._lock:
+            entry, checked = self._entry, self._checked
+        if entry is not None and now - checked < check_interval:
+            return entry[1:]
+        generation = tag_generation()
+        if entry is None or entry[0] != generation:
+            tags = Tag.query.order_by(Tag.name).all()
+            body = current_app.json.dumps([tag.to_dict() for tag in tags]).encode()
+            # The digest keeps the tag strong even if a generation value is
+            # ever seen again (e.g. after restoring a backup)
+            etag = f"{generation}-{hashlib.sha1(body).hexdigest()[:16]}"
+            entry = (generation, etag, body)
+        with self._lock:
+            self._entry, self._checked = entry, now
+        return entry[1:]
+
+
+tag_list_memo = TagListMemo()
@@ -0,0 +1,256 @@
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from backend.app.query_counter import normalize_statement
+
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+
+def parameter_shape(parameters, executemany=False):
+    """Describes bound parameters by type (and string length), never by value."""
+    if executemany:
+        rows = list(parameters or [])
+        first = parameter_shape(rows[0]) if rows else []
+        return {"rows": len(rows), "row": first}
+    if isinstance(parameters, dict):
+        return {key: _describe(value) for key, value in parameters.items()}
+    return [_describe(value) for value in parameters or ()]
+
+
+def _describe(value):
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def format_plan(rows):
+    """Renders EXPLAIN QUERY PLAN rows ``(id, parent, notused, detail)`` as a tree."""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return "\n".join(lines)
+
+
+class SlowQueryLog:
+    """
+    Logs statements slower than ``SLOW_QUERY_THRESHOLD_MS`` as JSON lines to a
+    rotating file, together with their parameter shapes, the Flask endpoint
+    that ran them and an ``EXPLAIN QUERY PLAN``.
+
+    Every process writes to its own ``<SLOW_QUERY_LOG_FILE>.<pid>`` and
+    rotates only that file: a RotatingFileHandler shared by several gunicorn
+    workers would rename the file under the others and lose their records.
+    The admin report reads the files of all workers.
+
+    Plans are captured on a separate read-only SQLite connection (for
+    in-memory databases, on a separate cursor) and cached per statement shape.
+    """
+
+    def __init__(self, app=None):
+        self.threshold = None
+        self.log_path = None
+        self.max_bytes = 5 * 1024 * 1024
+        self.backup_count = 3
+        self.explain = True
+        self._logger = None
+        self._logger_path = None
+        self._plans = OrderedDict()
+        self._plan_cache_size = 256
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["slow_query_log"] = self
+        threshold = app.config.get("SLOW_QUERY_THRESHOLD_MS")
+        if threshold is None:
+            return
+
+        self.threshold = float(threshold)
+        self.log_path = app.config.get("SLOW_QUERY_LOG_FILE") or os.path.join(
+            app.instance_path, "slow_queries.log"
+        )
+        self.max_bytes = app.config.get("SLOW_QUERY_LOG_MAX_BYTES", self.max_bytes)
+        self.backup_count = app.config.get(
+            "SLOW_QUERY_LOG_BACKUP_COUNT", self.backup_count
+        )
+        self.explain = app.config.get("SLOW_QUERY_EXPLAIN", True)
+
+        from backend.app import db
+
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._before_execute)
+            event.listen(db.engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, many):
+        context._slow_query_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, many):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None or self.threshold is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000.0
+        if duration_ms < self.threshold:
+            return
+        if getattr(self._local, "busy", False):
+            return  # Statements issued while explaining are not logged
+
+        shape = normalize_statement(statement)
+        record = {
+            "ts": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration_ms, 3),
+            "shape": shape,
+            "statement": statement,
+            "params": parameter_shape(parameters, many),
+            "endpoint": request.endpoint if has_request_context() else None,
+            "method": request.method if has_request_context() else None,
+            "pid": os.getpid(),
+        }
+        if self.explain:
+            record["plan"] = self._plan_for(conn, shape, statement, parameters, many)
+        self._get_logger().warning(json.dumps(record, default=str))
+
+    def _plan_for(self, conn, shape, statement, parameters, many):
+        with self._lock:
+            if shape in self._plans:
+                self._plans.move_to_end(shape)
+                return self._plans[shape]
+        if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        if conn.dialect.name != "sqlite":
+            return None
+        if many:
+            parameters = list(parameters)[0] if parameters else ()
+
+        self._local.busy = True
+        try:
+            side = self._side_connection(conn)
+            cursor = side.cursor()
+            try:
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+                plan = format_plan(cursor.fetchall())
+            finally:
+                cursor.close()
+        except sqlite3.Error as e:
+            plan = f"EXPLAIN failed: {e}"
+        finally:
+            self._local.busy = False
+
+        with self._lock:
+            self._plans[shape] = plan
+            if len(self._plans) > self._plan_cache_size:
+                self._plans.popitem(last=False)
+        return plan
+
+    def _side_connection(self, conn):
+        database = conn.engine.url.database
+        if not database or database == ":memory:":
+            # An in-memory database is only visible through its own connection
+            return conn.connection.dbapi_connection
+        side = getattr(self._local, "side", None)
+        if side is None:
+            side = sqlite3.connect(
+                f"file:{database}?mode=ro", uri=True, check_same_thread=False
+            )
+            self._local.side = side
+        return side
+
+    def worker_log_path(self):
+        """The file this process writes to."""
+        return f"{self.log_path}.{os.getpid()}"
+
+    def _get_logger(self):
+        # Also taken again after a fork, which changes the pid
+        path = self.worker_log_path()
+        if self._logger is None or self._logger_path != path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            logger = logging.getLogger(f"kanban.slow_query.{id(self)}")
+            logger.propagate = False
+            logger.setLevel(logging.WARNING)
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+            handler = RotatingFileHandler(
+                path,
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            self._logger = logger
+            self._logger_path = path
+        return self._logger
+
+    def log_files(self):
+        """The log files of every worker, past ones and rotated ones included."""
+        if not self.log_path:
+            return []
+        paths = sorted(glob.glob(f"{glob.escape(self.log_path)}.*"))
+        if os.path.exists(self.log_path):
+            paths.insert(0, self.log_path)
+        return paths
+
+    def top_offenders(self, limit=20, sort="total"):
+        """
+        Aggregates the slow-query log files (shared by all workers) by
+        normalized statement, ordered by total, max or mean duration or count.
+        """
+        groups = {}
+        for path in self.log_files():
+            with open(path) as handle:
+                for line in handle:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    group = groups.get(record["shape"])
+                    if group is None:
+                        group = groups[record["shape"]] = {
+                            "shape": record["shape"],
+                            "count": 0,
+                            "total_ms": 0.0,
+                            "max_ms": 0.0,
+                            "endpoints": {},
+                            "last_seen": None,
+                            "params": record.get("params"),
+                            "plan": record.get("plan"),
+                        }
+                    duration = record["duration_ms"]
+                    group["count"] += 1
+                    group["total_ms"] += duration
+                    if duration >= group["max_ms"]:
+                        group["max_ms"] = duration
+                        group["params"] = record.get("params")
+                    endpoint = record.get("endpoint") or "-"
+                    group["endpoints"][endpoint] = (
+                        group["endpoints"].get(endpoint, 0) + 1
+                    )
+                    if group["last_seen"] is None or record["ts"] > group["last_seen"]:
+                        group["last_seen"] = record["ts"]
+                        group["plan"] = record.get("plan") or group["plan"]
+
+        for group in groups.values():
+            group["mean_ms"] = round(group["total_ms"] / group["count"], 3)
+            group["total_ms"] = round(group["total_ms"], 3)
+        sort_key = {
+            "total": "total_ms",
+            "max": "max_ms",
+            "mean": "mean_ms",
+            "count": "count",
+        }[sort]
+        ordered = sorted(groups.values(), key=lambda g: g[sort_key], reverse=True)
+        return ordered[:limit]
@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import click
+from sqlalchemy import inspect, text
+
+_MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations"
+)
+_REVISION_RE = re.compile(r"^revision\s*=\s*['\"]([^'\"]+)['\"]", re.MULTILINE)
+_DOWN_REVISION_RE = re.compile(r"^down_revision\s*=\s*(.+)$", re.MULTILINE)
+_QUOTED_RE = re.compile(r"['\"]([^'\"]+)['\"]")
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class StartupTimer:
+    """Records how long each phase of ``create_app`` takes."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, round((now - self._last) * 1000.0, 3)))
+        self._last = now
+
+    def summary(self):
+        return {
+            "total_ms": round((self._last - self.started) * 1000.0, 3),
+            "phases": dict(self.phases),
+        }
+
+
+class LazyMigrateGroup(click.Group):
+    """
+    ``flask db`` stand-in that only imports Flask-Migrate (and with it
+    Alembic) when a migration command is actually invoked, keeping both out
+    of every worker's and test session's startup.
+    """
+
+    def __init__(self, db, name="db"):
+        super().__init__(name=name, help="Perform database migrations.")
+        self.db = db
+
+    def _group(self):
+        from flask import current_app
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_cli_group
+
+        if "migrate" not in current_app.extensions:
+            Migrate(current_app._get_current_object(), self.db)
+        return db_cli_group
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # The parent group invokes ``ctx.command``, so handing back the real
+        # group's context runs Flask-Migrate's own option parsing and callback.
+        return self._group().make_context(info_name, args, parent=parent, **extra)
+
+
+def migration_heads(directory=None):
+    """Returns the head revision ids of the migration scripts in ``directory``."""
+    versions = os.path.join(directory or _MIGRATIONS_DIR, "versions")
+    revisions = set()
+    parents = set()
+    for filename in os.listdir(versions):
+        if not filename.endswith(".py"):
+            continue
+        with open(os.path.join(versions, filename)) as handle:
+            source = handle.read()
+        revision = _REVISION_RE.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down = _DOWN_REVISION_RE.search(source)
+        if down is not None:
+            parents.update(_QUOTED_RE.findall(down.group(1)))
+    return revisions - parents
+
+
+def current_revisions(engine):
+    """Returns the revision ids stamped in ``alembic_version`` (empty if none)."""
+    if not inspect(engine).has_table("alembic_version"):
+        return set()
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT version_num FROM alembic_version"))
+        return {row[0] for row in rows}
+
+
+def schema_is_current(engine, directory=None):
+    """True when the database is stamped with exactly the migration heads."""
+    heads = migration_heads(directory)
+    return bool(heads) and current_revisions(engine) == heads
+
+
+def parse_importtime(output):
+    """
+    Parses ``python -X importtime`` output into
+    ``[(module, self_us, cumulative_us, depth)]`` in import order.
+    """
+    modules = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        modules.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def measure_startup(config_name="testing"):
+    """
+    Imports the app and runs ``create_app`` in a fresh interpreter with
+    ``-X importtime``. Returns ``(import breakdown, startup summary)``; the
+    summary's ``wall_ms`` covers both the imports and ``create_app``.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    script = (
+        "import json, time\n"
+        "started = time.perf_counter()\n"
+        "from backend.app import create_app\n"
+        f"app = create_app({config_name!r})\n"
+        "summary = dict(app.extensions['startup'])\n"
+        "summary['wall_ms'] = round((time.perf_counter() - started) * 1000.0, 3)\n"
+        "print(json.dumps(summary))\n"
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (root, env.get("PYTHONPATH")) if path
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    return parse_importtime(result.stderr), summary
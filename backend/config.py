@@ -1,12 +1,151 @@
 import os
 
 import secrets
+import tempfile
 
 
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "a_very_secret_key"
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY") or secrets.token_hex(32)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Prometheus metrics on /metrics. METRICS_DIR must be set (to a directory
+    # shared by all gunicorn workers) for values to aggregate across workers.
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() == "true"
+    METRICS_DIR = os.environ.get("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "1.0"))
+    # Per-request SQL statement counting with N+1 warnings. Headers are only
+    # added when QUERY_COUNT_HEADERS is true (None follows app.debug).
+    QUERY_COUNTER_ENABLED = (
+        os.environ.get("QUERY_COUNTER_ENABLED", "true").lower() == "true"
+    )
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", "5"))
+    QUERY_COUNT_HEADERS = None
+    # Statements slower than this are written to SLOW_QUERY_LOG_FILE
+    # (instance/slow_queries.log by default), or rather to one rotating
+    # <SLOW_QUERY_LOG_FILE>.<pid> per worker process. Unset disables.
+    SLOW_QUERY_THRESHOLD_MS = (
+        float(os.environ["SLOW_QUERY_THRESHOLD_MS"])
+        if os.environ.get("SLOW_QUERY_THRESHOLD_MS")
+        else None
+    )
+    SLOW_QUERY_LOG_FILE = os.environ.get("SLOW_QUERY_LOG_FILE")
+    SLOW_QUERY_LOG_MAX_BYTES = 5 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT = 3
+    SLOW_QUERY_EXPLAIN = True
+    # Opt-in cProfile capture of single requests. A request is profiled when
+    # it sends PROFILING_TOKEN in the X-Profile header or ?profile= argument,
+    # or is picked by PROFILING_SAMPLE_RATE (0.0-1.0). Output goes to
+    # PROFILING_DIR (instance/profiles by default).
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN")
+    PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_DIR = os.environ.get("PROFILING_DIR")
+    # Continuous sampling profiler: samples request threads at
+    # SAMPLING_PROFILER_HZ and writes collapsed stacks per endpoint to
+    # SAMPLING_PROFILER_DIR every SAMPLING_PROFILER_FLUSH_INTERVAL seconds.
+    SAMPLING_PROFILER_ENABLED = (
+        os.environ.get("SAMPLING_PROFILER_ENABLED", "false").lower() == "true"
+    )
+    SAMPLING_PROFILER_HZ = int(os.environ.get("SAMPLING_PROFILER_HZ", "100"))
+    SAMPLING_PROFILER_FLUSH_INTERVAL = float(
+        os.environ.get("SAMPLING_PROFILER_FLUSH_INTERVAL", "60")
+    )
+    SAMPLING_PROFILER_DIR = os.environ.get("SAMPLING_PROFILER_DIR")
+    # POST requests carrying an Idempotency-Key header are answered once and
+    # replayed to retries for IDEMPOTENCY_TTL seconds. Stored responses are
+    # kept in an LRU of IDEMPOTENCY_CACHE_SIZE per worker; IDEMPOTENCY_DB (a
+    # SQLite file reachable by all workers) shares them across workers.
+    IDEMPOTENCY_ENABLED = (
+        os.environ.get("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    )
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", "86400"))
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_DB = os.environ.get("IDEMPOTENCY_DB")
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.environ.get("IDEMPOTENCY_WAIT_TIMEOUT", "30"))
+    # Admission control: per-caller token buckets (ADMISSION_USER_RATE
+    # requests/second, bursts of ADMISSION_USER_BURST) plus tighter buckets
+    # for the endpoints in ADMISSION_ROUTE_LIMITS ({endpoint: (rate, burst)}),
+    # and at most ADMISSION_MAX_CONCURRENT requests in progress per worker
+    # with ADMISSION_QUEUE_SIZE more waiting up to ADMISSION_QUEUE_TIMEOUT
+    # seconds. ADMISSION_STATE_DB (a SQLite file on local disk) shares the
+    # buckets across workers.
+    ADMISSION_CONTROL_ENABLED = (
+        os.environ.get("ADMISSION_CONTROL_ENABLED", "false").lower() == "true"
+    )
+    ADMISSION_USER_RATE = float(os.environ.get("ADMISSION_USER_RATE", "20"))
+    ADMISSION_USER_BURST = int(os.environ.get("ADMISSION_USER_BURST", "40"))
+    ADMISSION_ROUTE_LIMITS = {
+        "api.batch": (2.0, 10),
+        "api.get_project_flow": (1.0, 5),
+        "api.get_projects_stats": (2.0, 10),
+    }
+    ADMISSION_MAX_CONCURRENT = int(os.environ.get("ADMISSION_MAX_CONCURRENT", "32"))
+    ADMISSION_QUEUE_SIZE = int(os.environ.get("ADMISSION_QUEUE_SIZE", "64"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "2.0"))
+    ADMISSION_STATE_DB = os.environ.get("ADMISSION_STATE_DB")
+    # Board, stage-list and activity responses are cached per project
+    # version in RESPONSE_CACHE_BACKEND: memory (per worker), disk (the
+    # SQLite file RESPONSE_CACHE_PATH, instance/response_cache.db by
+    # default), redis (RESPONSE_CACHE_REDIS_URL, entries expire after
+    # RESPONSE_CACHE_TTL seconds) or none. Memory and disk keep at most
+    # RESPONSE_CACHE_MAX_BYTES of bodies.
+    RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_MAX_BYTES = int(
+        os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH")
+    RESPONSE_CACHE_REDIS_URL = os.environ.get(
+        "RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0"
+    )
+    RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+    # GET /api/tags is served from a per-worker memo of the serialized list
+    # with a strong ETag (304 on If-None-Match) and Cache-Control: private,
+    # max-age=TAGS_MAX_AGE. The tag-table generation is re-read at most once
+    # per TAGS_GENERATION_CHECK_INTERVAL seconds, so other workers' new tags
+    # show up within that interval.
+    TAGS_MAX_AGE = int(os.environ.get("TAGS_MAX_AGE", "60"))
+    TAGS_GENERATION_CHECK_INTERVAL = float(
+        os.environ.get("TAGS_GENERATION_CHECK_INTERVAL", "1.0")
+    )
+    # Consecutive TASK_UPDATED entries by the same user on the same task
+    # within ACTIVITY_COALESCE_SECONDS of the first one are merged into it,
+    # with a combined field diff. Stage moves are always logged on their
+    # own. 0 turns coalescing off.
+    ACTIVITY_COALESCE_SECONDS = float(
+        os.environ.get("ACTIVITY_COALESCE_SECONDS", "120")
+    )
+    # DELETE only marks projects, stages and tasks as deleted; they can be
+    # restored for PURGE_GRACE_SECONDS. When PURGE_ENABLED, a thread in each
+    # worker removes older ones every PURGE_INTERVAL seconds, in batches of
+    # PURGE_BATCH_SIZE rows for at most PURGE_TIME_BUDGET seconds per run
+    # (`flask purge-deleted` does the same on demand).
+    PURGE_ENABLED = os.environ.get("PURGE_ENABLED", "true").lower() == "true"
+    PURGE_GRACE_SECONDS = int(os.environ.get("PURGE_GRACE_SECONDS", "604800"))
+    PURGE_INTERVAL = float(os.environ.get("PURGE_INTERVAL", "300"))
+    PURGE_BATCH_SIZE = int(os.environ.get("PURGE_BATCH_SIZE", "500"))
+    PURGE_TIME_BUDGET = float(os.environ.get("PURGE_TIME_BUDGET", "10"))
+    # Background jobs (POST /api/admin/jobs, polled on GET /api/jobs/<id>)
+    # are kept in the job table and run by each worker on a pool of
+    # JOBS_WORKERS threads, or processes with JOBS_EXECUTOR = "process".
+    # Workers look for due jobs every JOBS_POLL_INTERVAL seconds and hold a
+    # JOBS_LEASE_SECONDS lease on the ones they run. A failed job is retried
+    # up to JOBS_MAX_ATTEMPTS times in all, JOBS_RETRY_BACKOFF seconds after
+    # the first failure and twice as long after each further one.
+    JOBS_ENABLED = os.environ.get("JOBS_ENABLED", "true").lower() == "true"
+    JOBS_EXECUTOR = os.environ.get("JOBS_EXECUTOR", "thread")
+    JOBS_WORKERS = int(os.environ.get("JOBS_WORKERS", "2"))
+    JOBS_POLL_INTERVAL = float(os.environ.get("JOBS_POLL_INTERVAL", "2"))
+    JOBS_LEASE_SECONDS = float(os.environ.get("JOBS_LEASE_SECONDS", "60"))
+    JOBS_MAX_ATTEMPTS = int(os.environ.get("JOBS_MAX_ATTEMPTS", "3"))
+    JOBS_RETRY_BACKOFF = float(os.environ.get("JOBS_RETRY_BACKOFF", "10"))
+    # Sub-requests accepted by one POST /api/batch call
+    BATCH_MAX_OPERATIONS = int(os.environ.get("BATCH_MAX_OPERATIONS", "50"))
+    # Users (by email) allowed to call the /api/admin endpoints
+    ADMIN_EMAILS = [
+        email.strip()
+        for email in os.environ.get("ADMIN_EMAILS", "").split(",")
+        if email.strip()
+    ]
 
 
 class DevelopmentConfig(Config):
@@ -24,6 +163,17 @@ class TestingConfig(Config):
     )
     # Disable CSRF for testing forms if any; not strictly needed for API tests
     WTF_CSRF_ENABLED = False
+    METRICS_ENABLED = True
+    # Every test sees the tags of its own transaction
+    TAGS_GENERATION_CHECK_INTERVAL = 0
+    # Tests purge and run jobs explicitly
+    PURGE_ENABLED = False
+    JOBS_ENABLED = False
+    # Registered so the hooks are exercised; nothing is this slow in tests
+    SLOW_QUERY_THRESHOLD_MS = 60000
+    SLOW_QUERY_LOG_FILE = os.path.join(
+        tempfile.gettempdir(), "kanban-test-slow-queries.log"
+    )
 
 
 class ProductionConfig(Config):
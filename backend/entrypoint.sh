@@ -7,10 +7,21 @@ set -e
 # and /app is the parent, so backend.app can be found.
 export PYTHONPATH=/app
 
-echo "Running database migrations..."
 # Need to be in the backend directory for flask commands to pick up .flaskenv
 # The WORKDIR in Dockerfile is /app/backend, so these commands run in the correct context.
-flask db upgrade
+# schema-status only reads alembic_version, which is much cheaper than loading Alembic.
+if flask schema-status --check; then
+    echo "Database schema is up to date, skipping migrations."
+else
+    echo "Running database migrations..."
+    flask db upgrade
+fi
+
+# Metric snapshots are per worker process; start each container with a clean slate.
+if [ -n "$METRICS_DIR" ]; then
+    rm -rf "$METRICS_DIR"
+    mkdir -p "$METRICS_DIR"
+fi
 
 echo "Starting Gunicorn..."
 # exec "$@" allows us to pass the CMD from Dockerfile as arguments to this script
@@ -0,0 +1,69 @@
+"""Add flow analytics rollup tables and activity_log.details
+
+Revision ID: 3b7f2e9a4c18
+Revises: 8e41f0b6c2d7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3b7f2e9a4c18"
+down_revision = "8e41f0b6c2d7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ActivityLog.details predates the migrations but was never added to them;
+    # flow rollups read stage moves from it.
+    with op.batch_alter_table("activity_log") as batch_op:
+        batch_op.add_column(sa.Column("details", sa.JSON(), nullable=True))
+
+    op.create_table(
+        "flow_task_state",
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("stage_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("entered_stage_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("task_id"),
+    )
+    op.create_index(
+        "ix_flow_task_state_project_stage_entered",
+        "flow_task_state",
+        ["project_id", "stage_id", "entered_stage_at"],
+    )
+    op.create_table(
+        "flow_daily",
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("stage_id", sa.Integer(), nullable=False),
+        sa.Column("task_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("project_id", "day", "stage_id"),
+    )
+    op.create_table(
+        "flow_watermark",
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("last_activity_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("project_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("flow_watermark")
+    op.drop_table("flow_daily")
+    op.drop_index(
+        "ix_flow_task_state_project_stage_entered", table_name="flow_task_state"
+    )
+    op.drop_table("flow_task_state")
+    with op.batch_alter_table("activity_log") as batch_op:
+        batch_op.drop_column("details")
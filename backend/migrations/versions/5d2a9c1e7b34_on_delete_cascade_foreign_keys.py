@@ -0,0 +1,96 @@
+"""ON DELETE CASCADE foreign keys and indexes on child columns
+
+Revision ID: 5d2a9c1e7b34
+Revises: 116c967d2962
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d2a9c1e7b34"
+down_revision = "116c967d2962"
+branch_labels = None
+depends_on = None
+
+# The original foreign keys were created unnamed; SQLite batch mode can only
+# drop them through a naming convention.
+NAMING_CONVENTION = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+# (table, column, referred table) whose rows go away with their parent
+CASCADES = [
+    ("stage", "project_id", "project"),
+    ("task", "stage_id", "stage"),
+    ("sub_task", "parent_task_id", "task"),
+    ("comment", "task_id", "task"),
+    ("task_tag", "task_id", "task"),
+    ("task_tag", "tag_id", "tag"),
+    ("activity_log", "project_id", "project"),
+]
+
+# Cascades (and child lookups) scan these columns; task_tag.task_id is
+# already covered by the primary key.
+INDEXES = [
+    ("stage", "project_id"),
+    ("task", "stage_id"),
+    ("sub_task", "parent_task_id"),
+    ("comment", "task_id"),
+    ("task_tag", "tag_id"),
+    ("activity_log", "project_id"),
+    ("activity_log", "task_id"),
+]
+
+
+def _fk_name(table, column, referred):
+    return f"fk_{table}_{column}_{referred}"
+
+
+def upgrade():
+    tables = {table for table, _, _ in CASCADES}
+    for table in sorted(tables):
+        with op.batch_alter_table(
+            table, naming_convention=NAMING_CONVENTION, recreate="always"
+        ) as batch_op:
+            for fk_table, column, referred in CASCADES:
+                if fk_table != table:
+                    continue
+                name = _fk_name(table, column, referred)
+                batch_op.drop_constraint(name, type_="foreignkey")
+                batch_op.create_foreign_key(
+                    name, referred, [column], ["id"], ondelete="CASCADE"
+                )
+            if table == "activity_log":
+                # Task history outlives its task; see Task.activity_logs
+                batch_op.drop_constraint(
+                    _fk_name("activity_log", "task_id", "task"), type_="foreignkey"
+                )
+
+    for table, column in INDEXES:
+        op.create_index(f"ix_{table}_{column}", table, [column])
+
+
+def downgrade():
+    for table, column in INDEXES:
+        op.drop_index(f"ix_{table}_{column}", table_name=table)
+
+    tables = {table for table, _, _ in CASCADES}
+    for table in sorted(tables):
+        with op.batch_alter_table(
+            table, naming_convention=NAMING_CONVENTION, recreate="always"
+        ) as batch_op:
+            for fk_table, column, referred in CASCADES:
+                if fk_table != table:
+                    continue
+                name = _fk_name(table, column, referred)
+                batch_op.drop_constraint(name, type_="foreignkey")
+                batch_op.create_foreign_key(name, referred, [column], ["id"])
+            if table == "activity_log":
+                batch_op.create_foreign_key(
+                    _fk_name("activity_log", "task_id", "task"),
+                    "task",
+                    ["task_id"],
+                    ["id"],
+                )
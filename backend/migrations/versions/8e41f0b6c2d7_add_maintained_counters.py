@@ -0,0 +1,57 @@
+"""Add maintained task, subtask and comment counters
+
+Revision ID: 8e41f0b6c2d7
+Revises: 5d2a9c1e7b34
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8e41f0b6c2d7"
+down_revision = "5d2a9c1e7b34"
+branch_labels = None
+depends_on = None
+
+COUNTERS = [
+    ("project", "task_count"),
+    ("stage", "task_count"),
+    ("task", "subtask_count"),
+    ("task", "open_subtask_count"),
+    ("task", "comment_count"),
+]
+
+
+def upgrade():
+    for table, column in COUNTERS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(
+                sa.Column(column, sa.Integer(), nullable=False, server_default="0")
+            )
+
+    # Backfill from the existing rows (same as `flask reconcile-counters --fix`)
+    op.execute(
+        "UPDATE stage SET task_count = "
+        "(SELECT count(*) FROM task WHERE task.stage_id = stage.id)"
+    )
+    op.execute(
+        "UPDATE project SET task_count = "
+        "(SELECT coalesce(sum(stage.task_count), 0) FROM stage "
+        "WHERE stage.project_id = project.id)"
+    )
+    op.execute(
+        "UPDATE task SET "
+        "subtask_count = (SELECT count(*) FROM sub_task "
+        "WHERE sub_task.parent_task_id = task.id), "
+        "open_subtask_count = (SELECT count(*) FROM sub_task "
+        "WHERE sub_task.parent_task_id = task.id AND coalesce(sub_task.completed, 0) = 0), "
+        "comment_count = (SELECT count(*) FROM comment WHERE comment.task_id = task.id)"
+    )
+
+
+def downgrade():
+    for table, column in reversed(COUNTERS):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column(column)
@@ -0,0 +1,28 @@
+"""Add (assignee, due_date) and (stage_id, due_date) task indexes
+
+Revision ID: a4c81d5e7f20
+Revises: 3b7f2e9a4c18
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a4c81d5e7f20"
+down_revision = "3b7f2e9a4c18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_task_assignee_due_date", "task", ["assignee", "due_date"])
+    op.create_index("ix_task_stage_id_due_date", "task", ["stage_id", "due_date"])
+    # Superseded by its (stage_id, due_date) extension
+    op.drop_index("ix_task_stage_id", table_name="task")
+
+
+def downgrade():
+    op.create_index("ix_task_stage_id", "task", ["stage_id"])
+    op.drop_index("ix_task_stage_id_due_date", table_name="task")
+    op.drop_index("ix_task_assignee_due_date", table_name="task")
@@ -0,0 +1,241 @@
+"""Store activity as an action code plus details instead of a description
+
+Revision ID: b3e7c5a1d982
+Revises: a9d4e6f1c205
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b3e7c5a1d982"
+down_revision = "a9d4e6f1c205"
+branch_labels = None
+depends_on = None
+
+# Frozen copies of models.ACTION_CODES and activity_service.TEMPLATES
+ACTION_CODES = {
+    "PROJECT_CREATED": 1,
+    "PROJECT_RESTORED": 2,
+    "STAGE_DELETED": 3,
+    "STAGE_RESTORED": 4,
+    "TASK_CREATED": 5,
+    "TASK_UPDATED": 6,
+    "TASK_DELETED": 7,
+    "TASK_RESTORED": 8,
+    "COMMENT_ADDED": 9,
+    "TAG_ADDED_TO_TASK": 10,
+    "TAG_REMOVED_FROM_TASK": 11,
+}
+TEMPLATES = {
+    "PROJECT_CREATED": "User '{user}' created project '{project}'",
+    "PROJECT_CLONED": "User '{user}' created project '{project}' from '{source}'",
+    "PROJECT_RESTORED": "User '{user}' restored project '{project}'",
+    "STAGE_DELETED": "User '{user}' deleted stage '{stage}'",
+    "STAGE_RESTORED": "User '{user}' restored stage '{stage}'",
+    "TASK_CREATED": "User '{user}' created task '{task}...' in stage '{stage}'",
+    "TASK_UPDATED": "User '{user}' updated task '{task}...'",
+    "TASK_DELETED": "User '{user}' deleted task '{task}...' from stage '{stage}'",
+    "TASK_RESTORED": "User '{user}' restored task '{task}...' in stage '{stage}'",
+    "COMMENT_ADDED": "User '{user}' commented on task '{task}...'",
+    "TAG_ADDED_TO_TASK": "User '{user}' added tag '{tag}' to task '{task}...'",
+    "TAG_REMOVED_FROM_TASK": "User '{user}' removed tag '{tag}' from task '{task}...'",
+}
+MISSING = "(deleted)"
+
+
+def _pattern(template):
+    """A regex reading the placeholders of ``template`` back out of a description."""
+    parts = re.split(r"\{(\w+)\}", template)
+    return re.compile(
+        "".join(
+            f"(?P<{part}>.*)" if i % 2 else re.escape(part)
+            for i, part in enumerate(parts)
+        )
+        + "$",
+        re.DOTALL,
+    )
+
+
+PATTERNS = {action: _pattern(template) for action, template in TEMPLATES.items()}
+
+activity_log = sa.table(
+    "activity_log",
+    sa.column("id", sa.Integer),
+    sa.column("action", sa.SmallInteger),
+    sa.column("action_type", sa.String),
+    sa.column("description", sa.Text),
+    sa.column("user_id", sa.Integer),
+    sa.column("project_id", sa.Integer),
+    sa.column("task_id", sa.Integer),
+    sa.column("details", sa.JSON),
+)
+
+
+def _snapshot(action, description, details, task_exists, tag_ids):
+    """
+    The ``details`` of an entry without the names its description repeats,
+    but with snapshots of those the new rendering can no longer look up.
+    """
+    new = dict(details or {})
+    for stale in ("tag_name", "from_stage", "to_stage"):
+        new.pop(stale, None)
+    match = PATTERNS[action].match(description or "")
+    names = match.groupdict() if match else {}
+    if action in ("TASK_DELETED", "STAGE_DELETED") or not task_exists:
+        for key in ("task", "stage"):
+            if key in names:
+                new.setdefault(key, names[key])
+    if action == "TAG_REMOVED_FROM_TASK" and "tag" in names and "tag_id" not in new:
+        tag_id = tag_ids.get(names["tag"])
+        if tag_id is not None:
+            new["tag_id"] = tag_id
+    return new
+
+
+def upgrade():
+    # record_activity used to accept any name; an entry without a code would
+    # be left with a NULL action and abort the migration halfway
+    bind = op.get_bind()
+    unknown = bind.execute(
+        sa.select(activity_log.c.action_type)
+        .where(activity_log.c.action_type.not_in(list(ACTION_CODES)))
+        .distinct()
+    ).scalars()
+    unknown = sorted(unknown)
+    if unknown:
+        raise RuntimeError(
+            "activity_log has action types without a code: "
+            + ", ".join(unknown)
+            + ". Add them to models.ACTION_CODES and to this migration's copy,"
+            " or delete those entries, then upgrade again."
+        )
+
+    with op.batch_alter_table("activity_log") as batch_op:
+        batch_op.add_column(sa.Column("action", sa.SmallInteger(), nullable=True))
+    op.execute(
+        activity_log.update().values(
+            action=sa.case(ACTION_CODES, value=activity_log.c.action_type)
+        )
+    )
+
+    # Entries without details stored a JSON null rather than NULL
+    op.execute("UPDATE activity_log SET details = NULL WHERE details = 'null'")
+
+    # Only entries that delete something, refer to a task that is gone or
+    # carry names in their details need their details rewritten
+    tag_ids = dict(bind.execute(sa.text("SELECT name, id FROM tag")).all())
+    task = sa.table("task", sa.column("id", sa.Integer))
+    rows = bind.execute(
+        sa.select(
+            activity_log.c.id,
+            activity_log.c.action_type,
+            activity_log.c.description,
+            activity_log.c.details,
+            task.c.id.is_not(None),
+        )
+        .select_from(activity_log)
+        .outerjoin(task, task.c.id == activity_log.c.task_id)
+        .where(
+            activity_log.c.action_type.in_(
+                ["TASK_DELETED", "STAGE_DELETED", "TAG_REMOVED_FROM_TASK"]
+            )
+            | activity_log.c.details.is_not(None)
+            | (activity_log.c.task_id.is_not(None) & task.c.id.is_(None))
+        )
+    ).all()
+    updates = []
+    for activity_id, action, description, details, task_exists in rows:
+        new = _snapshot(action, description, details, task_exists, tag_ids)
+        if new != (details or {}):
+            updates.append({"activity_id": activity_id, "new_details": new or None})
+    if updates:
+        bind.execute(
+            activity_log.update()
+            .where(activity_log.c.id == sa.bindparam("activity_id"))
+            .values(details=sa.bindparam("new_details")),
+            updates,
+        )
+
+    with op.batch_alter_table("activity_log") as batch_op:
+        batch_op.alter_column("action", existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.drop_column("description")
+        batch_op.drop_column("action_type")
+    # The freed pages are only returned to the OS by a VACUUM
+
+
+def downgrade():
+    with op.batch_alter_table("activity_log") as batch_op:
+        batch_op.add_column(sa.Column("action_type", sa.String(100), nullable=True))
+        batch_op.add_column(sa.Column("description", sa.Text(), nullable=True))
+
+    # Render every description once more, from the names as they are now
+    bind = op.get_bind()
+    names = {
+        table: dict(bind.execute(sa.text(sql)).all())
+        for table, sql in (
+            ("user", 'SELECT id, username FROM "user"'),
+            ("project", "SELECT id, name FROM project"),
+            ("stage", "SELECT id, name FROM stage"),
+            ("tag", "SELECT id, name FROM tag"),
+        )
+    }
+    tasks = {
+        task_id: (content[:30], stage_id)
+        for task_id, content, stage_id in bind.execute(
+            sa.text("SELECT id, content, stage_id FROM task")
+        )
+    }
+    action_names = {code: name for name, code in ACTION_CODES.items()}
+    rows = bind.execute(
+        sa.select(
+            activity_log.c.id,
+            activity_log.c.action,
+            activity_log.c.user_id,
+            activity_log.c.project_id,
+            activity_log.c.task_id,
+            activity_log.c.details,
+        )
+    ).all()
+    updates = []
+    for activity_id, code, user_id, project_id, task_id, details in rows:
+        details = details or {}
+        action = action_names[code]
+        task, task_stage_id = tasks.get(task_id, (MISSING, None))
+        stage_id = details.get("stage_id", task_stage_id)
+        values = {
+            "user": names["user"].get(user_id, MISSING),
+            "project": names["project"].get(project_id, MISSING),
+            "source": names["project"].get(details.get("source_project_id"), MISSING),
+            "stage": names["stage"].get(stage_id) or details.get("stage", MISSING),
+            "tag": names["tag"].get(details.get("tag_id"), MISSING),
+            "task": details.get("task", task),
+        }
+        template = action
+        if action == "PROJECT_CREATED" and "source_project_id" in details:
+            template = "PROJECT_CLONED"
+        updates.append(
+            {
+                "activity_id": activity_id,
+                "name": action,
+                "text": TEMPLATES[template].format(**values),
+            }
+        )
+    if updates:
+        bind.execute(
+            activity_log.update()
+            .where(activity_log.c.id == sa.bindparam("activity_id"))
+            .values(action_type=sa.bindparam("name"), description=sa.bindparam("text")),
+            updates,
+        )
+
+    with op.batch_alter_table("activity_log") as batch_op:
+        batch_op.alter_column(
+            "action_type", existing_type=sa.String(100), nullable=False
+        )
+        batch_op.alter_column("description", existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column("action")
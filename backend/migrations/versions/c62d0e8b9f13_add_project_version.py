@@ -0,0 +1,28 @@
+"""Add project version for response cache keys
+
+Revision ID: c62d0e8b9f13
+Revises: a4c81d5e7f20
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c62d0e8b9f13"
+down_revision = "a4c81d5e7f20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("project") as batch_op:
+        batch_op.add_column(
+            sa.Column("version", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("project") as batch_op:
+        batch_op.drop_column("version")
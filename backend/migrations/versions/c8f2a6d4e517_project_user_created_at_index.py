@@ -0,0 +1,41 @@
+"""Index live projects on (user_id, created_at) for the paginated list
+
+Revision ID: c8f2a6d4e517
+Revises: b3e7c5a1d982
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c8f2a6d4e517"
+down_revision = "b3e7c5a1d982"
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text("deleted_at IS NULL")
+
+
+def upgrade():
+    # The new index starts with user_id, so it also serves the old one's lookups
+    op.drop_index("ix_project_user_id_live", table_name="project")
+    op.create_index(
+        "ix_project_user_id_created_at_live",
+        "project",
+        ["user_id", "created_at"],
+        sqlite_where=LIVE,
+        postgresql_where=LIVE,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_project_user_id_created_at_live", table_name="project")
+    op.create_index(
+        "ix_project_user_id_live",
+        "project",
+        ["user_id"],
+        sqlite_where=LIVE,
+        postgresql_where=LIVE,
+    )
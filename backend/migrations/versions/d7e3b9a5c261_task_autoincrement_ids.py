@@ -0,0 +1,56 @@
+"""Never reuse task ids
+
+Revision ID: d7e3b9a5c261
+Revises: c8f2a6d4e517
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "d7e3b9a5c261"
+down_revision = "c8f2a6d4e517"
+branch_labels = None
+depends_on = None
+
+
+def _recreate_task(autoincrement):
+    with op.batch_alter_table(
+        "task",
+        recreate="always",
+        table_kwargs={"sqlite_autoincrement": autoincrement},
+    ):
+        pass
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return  # Other databases take ids from sequences, which never go back
+    _recreate_task(True)
+    # The copy only advanced the sequence to the highest surviving id (and
+    # an empty table has no sequence row at all); ids of removed tasks above
+    # it are still referenced by activity and flow state
+    bind = op.get_bind()
+    seq = bind.execute(sa.text("""
+            SELECT max(
+                coalesce((SELECT max(seq) FROM sqlite_sequence WHERE name = 'task'), 0),
+                coalesce((SELECT max(id) FROM task), 0),
+                coalesce((SELECT max(task_id) FROM activity_log), 0),
+                coalesce((SELECT max(task_id) FROM flow_task_state), 0)
+            )
+            """)).scalar()
+    # sqlite_sequence has no unique key on name, so replace rather than upsert
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'task'")
+    if seq:
+        bind.execute(
+            sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('task', :seq)"),
+            {"seq": seq},
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    _recreate_task(False)
@@ -0,0 +1,30 @@
+"""Add generation table for the tag list ETag
+
+Revision ID: e5a93b7c1d46
+Revises: c62d0e8b9f13
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e5a93b7c1d46"
+down_revision = "c62d0e8b9f13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    generation = op.create_table(
+        "generation",
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("value", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(generation, [{"name": "tag", "value": 0}])
+
+
+def downgrade():
+    op.drop_table("generation")
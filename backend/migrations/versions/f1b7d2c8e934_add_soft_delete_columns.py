@@ -0,0 +1,52 @@
+"""Add deleted_at to project, stage and task with partial indexes
+
+Revision ID: f1b7d2c8e934
+Revises: e5a93b7c1d46
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f1b7d2c8e934"
+down_revision = "e5a93b7c1d46"
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text("deleted_at IS NULL")
+TOMBSTONE = sa.text("deleted_at IS NOT NULL")
+
+
+def _create_partial_index(name, table, columns, where):
+    op.create_index(name, table, columns, sqlite_where=where, postgresql_where=where)
+
+
+def upgrade():
+    for table in ("project", "stage", "task"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("deleted_at", sa.DateTime(), nullable=True))
+        _create_partial_index(
+            f"ix_{table}_deleted_at", table, ["deleted_at"], TOMBSTONE
+        )
+
+    _create_partial_index("ix_project_user_id_live", "project", ["user_id"], LIVE)
+    _create_partial_index(
+        "ix_stage_project_id_live", "stage", ["project_id", "order"], LIVE
+    )
+    op.drop_index("ix_task_assignee_due_date", table_name="task")
+    _create_partial_index(
+        "ix_task_assignee_due_date", "task", ["assignee", "due_date"], LIVE
+    )
+
+
+def downgrade():
+    op.drop_index("ix_task_assignee_due_date", table_name="task")
+    op.create_index("ix_task_assignee_due_date", "task", ["assignee", "due_date"])
+    op.drop_index("ix_stage_project_id_live", table_name="stage")
+    op.drop_index("ix_project_user_id_live", table_name="project")
+    for table in ("task", "stage", "project"):
+        op.drop_index(f"ix_{table}_deleted_at", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("deleted_at")
@@ -240,3 +240,33 @@ def created_task_data(test_client, auth_headers, created_project_data, db_sessio
         "stage_name": stage_name,
         "task_content": task_content,
     }
+
+
+@pytest.fixture(scope="function")
+def query_budget(test_app):
+    """
+    Returns a context manager that fails the test when the wrapped block runs
+    more SQL statements than ``max_queries``, or repeats one statement shape
+    N_PLUS_ONE_THRESHOLD times or more (unless ``allow_n_plus_one``).
+
+        with query_budget(3):
+            test_client.get("/api/projects/1", headers=headers)
+    """
+    from contextlib import contextmanager
+
+    from backend.app.query_counter import count_queries
+
+    @contextmanager
+    def budget(max_queries, allow_n_plus_one=False):
+        threshold = test_app.config["N_PLUS_ONE_THRESHOLD"]
+        with count_queries(threshold) as collector:
+            yield collector
+        if collector.count > max_queries:
+            pytest.fail(
+                f"Query budget exceeded: {collector.count} > {max_queries}\n"
+                f"{collector.summary()}"
+            )
+        if collector.n_plus_one and not allow_n_plus_one:
+            pytest.fail(f"N+1 query pattern detected\n{collector.summary()}")
+
+    return budget
@@ -130,10 +130,10 @@ def test_get_task_activities_success(
         (act for act in activities if act["action_type"] == "COMMENT_ADDED"), None
     )
     assert comment_added_activity is not None
-    # Note: The description for comment activity uses the task content *at the time of commenting*.
-    # If the task was updated after the comment, the description reflects the older task content.
-    # Here, task_content_ellipsis is the original content. The update happened *after* the comment.
-    desc_str = f"User '{username}' commented on task '{task_content_ellipsis}'"
+    # Descriptions are rendered when the log is read, so the comment made
+    # before the update shows the task's current content.
+    desc_str = f"User '{username}' commented on task '{updated_task_content[:30]}...'"
+    assert task_content_ellipsis not in comment_added_activity["description"]
     assert desc_str in comment_added_activity["description"]
     assert comment_added_activity["user_username"] == username
     assert comment_added_activity["task_id"] == task_id
@@ -227,35 +227,42 @@ def test_get_activities_forbidden_other_user(
 
 # Test direct call to activity_service
 def test_record_activity_service_directly(db_session, auth_headers, created_task_data):
-    from backend.app.services.activity_service import record_activity
+    from backend.app.models import ACTION_CODES
+    from backend.app.services.activity_service import activity_dicts, record_activity
 
     user_id = auth_headers["user_id"]
     username = auth_headers["username"]  # Get username from shared fixture
     project_id = created_task_data["project_id"]
     task_id = created_task_data["task_id"]
 
-    action = "CUSTOM_ACTION"
-    desc = "A custom action was performed by a test."
+    action = "TASK_RESTORED"
 
     record_activity(
         action_type=action,
         user_id=user_id,
-        description=desc,
         project_id=project_id,
         task_id=task_id,
     )
 
-    log_entry = (
-        db_session.query(ActivityLog)
-        .filter_by(action_type=action, description=desc)
-        .first()
-    )
+    log_entry = db_session.query(ActivityLog).filter_by(action_type=action).first()
     assert log_entry is not None
+    assert log_entry.action == ACTION_CODES[action]
     assert log_entry.user_id == user_id
     assert log_entry.project_id == project_id
     assert log_entry.task_id == task_id
     assert log_entry.user.username == username  # Check username via relationship
 
+    # The stage comes from the task when the entry has none of its own
+    (rendered,) = activity_dicts(db_session, [log_entry])
+    assert rendered["description"] == (
+        f"User '{username}' restored task '{created_task_data['task_content'][:30]}...' "
+        f"in stage '{created_task_data['stage_name']}'"
+    )
+    assert rendered["user_username"] == username
+
+    with pytest.raises(ValueError):
+        record_activity(action_type="CUSTOM_ACTION", user_id=user_id)
+
 
 # Test for task deletion activity
 def test_task_deletion_logs_activity(
@@ -304,10 +311,170 @@ def test_task_deletion_logs_activity(
         .first()
     )
     assert log_entry is not None
-    assert f"User '{username}' deleted task" in log_entry.description
+    assert log_entry.details["task"] == created_task_data["task_content"][:30]
     assert log_entry.user_id == auth_headers["user_id"]
 
 
 # Test that Task.to_dict() is not relevant here as activity logs are separate
 # The check for Task.to_dict for *tags* will be in test_tags_api.py.
 # Activity logs are not directly part of Task.to_dict().
+
+
+def test_descriptions_survive_purge_and_render_in_few_queries(
+    test_client, auth_headers, created_task_data, db_session, query_budget
+):
+    from datetime import datetime, timedelta
+
+    from backend.app.models import Task
+    from backend.app.services.purge_service import purge_deleted
+
+    headers = {"Authorization": auth_headers["Authorization"]}
+    username = auth_headers["username"]
+    project_id, stage_id, task_id = (
+        created_task_data[key] for key in ("project_id", "stage_id", "task_id")
+    )
+    content = created_task_data["task_content"][:30]
+    for i in range(5):
+        other_id = test_client.post(
+            f"/api/stages/{stage_id}/tasks",
+            headers=headers,
+            json={"content": f"Other {i}"},
+        ).json["id"]
+        test_client.post(
+            f"/api/tasks/{other_id}/comments", headers=headers, json={"content": "Hi"}
+        )
+    test_client.post(
+        f"/api/tasks/{task_id}/comments", headers=headers, json={"content": "Hi"}
+    )
+    test_client.delete(f"/api/tasks/{task_id}", headers=headers)
+    db_session.query(Task).filter_by(id=task_id).update(
+        {"deleted_at": datetime.utcnow() - timedelta(days=8)}
+    )
+    db_session.commit()
+    purge_deleted(db_session, datetime.utcnow() - timedelta(days=7))
+
+    with query_budget(12):
+        activities = test_client.get(
+            f"/api/projects/{project_id}/activities", headers=headers
+        ).json
+    descriptions = {a["description"] for a in activities if a["task_id"] == task_id}
+    assert descriptions == {
+        f"User '{username}' created task '{content}...' in stage '{created_task_data['stage_name']}'",
+        f"User '{username}' commented on task '{content}...'",
+        f"User '{username}' deleted task '{content}...' from stage '{created_task_data['stage_name']}'",
+    }
+
+
+def test_bursts_of_task_updates_are_coalesced(
+    test_app, test_client, auth_headers, created_task_data, db_session
+):
+    from datetime import datetime, timedelta
+
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, task_id = created_task_data["project_id"], created_task_data["task_id"]
+    initial = test_client.get(f"/api/tasks/{task_id}", headers=headers).json
+
+    def updates():
+        db_session.expire_all()
+        return (
+            db_session.query(ActivityLog)
+            .filter_by(task_id=task_id, action_type="TASK_UPDATED")
+            .order_by(ActivityLog.id)
+            .all()
+        )
+
+    test_client.put(
+        f"/api/tasks/{task_id}",
+        headers=headers,
+        json={"content": "Draft", "priority": "high"},
+    )
+    test_client.put(
+        f"/api/tasks/{task_id}",
+        headers=headers,
+        json={"content": "Final", "priority": "high"},
+    )
+    test_client.put(f"/api/tasks/{task_id}", headers=headers, json={"order": 5})
+    test_client.put(
+        f"/api/tasks/{task_id}", headers=headers, json={"order": 5}
+    )  # No change, no entry
+    test_client.put(
+        f"/api/tasks/{task_id}", headers=headers, json={"priority": initial["priority"]}
+    )
+    (entry,) = updates()
+    assert entry.details["changes"] == {
+        "content": [initial["content"], "Final"],
+        "priority": [initial["priority"], initial["priority"]],  # Changed back
+        "order": [initial["order"], 5],
+    }
+    assert entry.details["updates"] == 4
+    last_updated_at = datetime.fromisoformat(entry.details["last_updated_at"])
+    assert last_updated_at >= entry.created_at
+
+    # Moves, other activity in between and an expired window all start a new entry
+    done_id = test_client.post(
+        f"/api/projects/{project_id}/stages", headers=headers, json={"name": "Done"}
+    ).json["id"]
+    test_client.put(
+        f"/api/tasks/{task_id}",
+        headers=headers,
+        json={"stage_id": done_id, "priority": "low"},
+    )
+    test_client.put(f"/api/tasks/{task_id}", headers=headers, json={"priority": "high"})
+    test_client.post(
+        f"/api/tasks/{task_id}/comments", headers=headers, json={"content": "Hi"}
+    )
+    test_client.put(f"/api/tasks/{task_id}", headers=headers, json={"priority": "low"})
+    last = updates()[-1]
+    last.created_at = datetime.utcnow() - timedelta(minutes=5)
+    db_session.commit()
+    test_client.put(
+        f"/api/tasks/{task_id}", headers=headers, json={"priority": "medium"}
+    )
+    assert [entry.details for entry in updates()[1:]] == [
+        {
+            "from_stage_id": created_task_data["stage_id"],
+            "to_stage_id": done_id,
+            "changes": {"priority": [initial["priority"], "low"]},
+        },
+        {"changes": {"priority": ["low", "high"]}},
+        {"changes": {"priority": ["high", "low"]}},
+        {"changes": {"priority": ["low", "medium"]}},
+    ]
+
+    test_app.config["ACTIVITY_COALESCE_SECONDS"] = 0
+    try:
+        test_client.put(
+            f"/api/tasks/{task_id}", headers=headers, json={"priority": "low"}
+        )
+    finally:
+        test_app.config["ACTIVITY_COALESCE_SECONDS"] = 120
+    assert len(updates()) == 6
+
+
+def test_new_task_does_not_inherit_a_purged_tasks_history(
+    test_client, auth_headers, created_task_data, db_session
+):
+    from datetime import datetime, timedelta
+
+    from backend.app.models import Task
+    from backend.app.services.purge_service import purge_deleted
+
+    headers = {"Authorization": auth_headers["Authorization"]}
+    stage_id, task_id = created_task_data["stage_id"], created_task_data["task_id"]
+    test_client.post(
+        f"/api/tasks/{task_id}/comments", headers=headers, json={"content": "Hi"}
+    )
+    test_client.delete(f"/api/tasks/{task_id}", headers=headers)
+    db_session.query(Task).filter_by(id=task_id).update(
+        {"deleted_at": datetime.utcnow() - timedelta(days=8)}
+    )
+    db_session.commit()
+    purge_deleted(db_session, datetime.utcnow() - timedelta(days=7))
+
+    # The purged task had the highest id; SQLite would hand it out again
+    new_id = test_client.post(
+        f"/api/stages/{stage_id}/tasks", headers=headers, json={"content": "New"}
+    ).json["id"]
+    assert new_id > task_id
+    activities = test_client.get(f"/api/tasks/{new_id}/activities", headers=headers)
+    assert [a["action_type"] for a in activities.json] == ["TASK_CREATED"]
@@ -0,0 +1,138 @@
+import threading
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from backend.app.admission import (
+    AdmissionControl,
+    ConcurrencyLimiter,
+    MemoryBucketStore,
+    SQLiteBucketStore,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    store = MemoryBucketStore(clock=clock)
+    limits = [("user:1", 1.0, 2)]
+    assert store.take(limits) == 0.0
+    assert store.take(limits) == 0.0
+    assert store.take(limits) == 1.0
+    clock.now += 0.5
+    assert store.take(limits) == 0.5
+    clock.now += 0.5
+    assert store.take(limits) == 0.0
+
+
+def test_route_bucket_rejection_spends_no_user_tokens():
+    clock = FakeClock()
+    store = MemoryBucketStore(clock=clock)
+    user, route = ("user:1", 10.0, 3), ("user:1:api.batch", 1.0, 1)
+    assert store.take([user, route]) == 0.0
+    assert store.take([user, route]) == 1.0
+    # Only one user token was spent, so two more plain requests fit
+    assert store.take([user]) == 0.0
+    assert store.take([user]) == 0.0
+    assert store.take([user]) > 0.0
+
+
+def test_sqlite_buckets_are_shared_between_workers(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "buckets.db")
+    worker_a = SQLiteBucketStore(path, clock=clock)
+    worker_b = SQLiteBucketStore(path, clock=clock)
+    limits = [("user:1", 1.0, 2)]
+    assert worker_a.take(limits) == 0.0
+    assert worker_b.take(limits) == 0.0
+    assert worker_a.take(limits) == 1.0
+    assert worker_b.take([("user:2", 1.0, 2)]) == 0.0
+
+
+def test_concurrency_limiter_queues_then_sheds():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=1, timeout=5)
+    assert limiter.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive() and limiter.waiting == 1
+    assert limiter.acquire() is False  # Queue full: rejected without waiting
+
+    limiter.release()
+    waiter.join(5)
+    assert results == [True] and limiter.active == 1
+
+    impatient = ConcurrencyLimiter(limit=1, queue_size=1, timeout=0.05)
+    impatient.acquire()
+    assert impatient.acquire() is False
+
+
+def _app(**config):
+    app = Flask(__name__)
+    app.config.update(
+        JWT_SECRET_KEY="test-secret",
+        ADMISSION_CONTROL_ENABLED=True,
+        ADMISSION_USER_RATE=0.001,
+        ADMISSION_USER_BURST=2,
+        ADMISSION_ROUTE_LIMITS={},
+        ADMISSION_MAX_CONCURRENT=4,
+        ADMISSION_QUEUE_SIZE=0,
+    )
+    app.config.update(config)
+    JWTManager(app)
+    AdmissionControl(app)
+    app.add_url_rule("/work", "api.work", lambda: "ok")
+    app.add_url_rule("/health", "api.health_check", lambda: "ok")
+    return app
+
+
+def test_requests_over_budget_get_429_with_retry_after():
+    app = _app()
+    client = app.test_client()
+    with app.app_context():
+        alice = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+        bob = {"Authorization": f"Bearer {create_access_token(identity='2')}"}
+
+    assert [client.get("/work", headers=alice).status_code for _ in range(3)] == [
+        200,
+        200,
+        429,
+    ]
+    rejected = client.get("/work", headers=alice)
+    assert rejected.status_code == 429 and int(rejected.headers["Retry-After"]) >= 1
+    # Other callers and health checks are unaffected
+    assert client.get("/work", headers=bob).status_code == 200
+    assert client.get("/health", headers=alice).status_code == 200
+
+
+def test_saturated_worker_answers_503():
+    app = _app(ADMISSION_MAX_CONCURRENT=0, ADMISSION_USER_BURST=100)
+    response = app.test_client().get("/work")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_batch_operations_keep_the_batch_requests_slot():
+    app = _app(ADMISSION_USER_BURST=100)
+    limiter = app.extensions["admission"].limiter
+    seen = []
+
+    def batch():
+        # Like services.batch_service, each operation gets a nested context
+        for _ in range(2):
+            with app.test_request_context("/work"):
+                pass
+            seen.append(limiter.active)
+        return "ok"
+
+    app.add_url_rule("/batch", "api.batch", batch, methods=["POST"])
+    assert app.test_client().post("/batch").status_code == 200
+    assert seen == [1, 1] and limiter.active == 0
@@ -0,0 +1,147 @@
+from backend.app.models import Task
+
+
+def test_batch_runs_dependent_operations(test_client, auth_headers, created_task_data):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    stage_id = created_task_data["stage_id"]
+    operations = [
+        {
+            "method": "POST",
+            "path": f"/api/stages/{stage_id}/tasks",
+            "body": {"content": "Batched"},
+        },
+        {
+            "method": "POST",
+            "path": "/api/tasks/${0.id}/tags",
+            "body": {"tag_name": "batch-tag"},
+        },
+        {
+            "method": "POST",
+            "path": "/api/tasks/${0.id}/subtasks",
+            "body": {"content": "Step ${0.id}"},
+        },
+        {"method": "GET", "path": "/api/tasks/${0.id}"},
+    ]
+    response = test_client.post(
+        "/api/batch", headers=headers, json={"operations": operations}
+    )
+
+    assert response.status_code == 200
+    assert response.json["committed"] is True
+    results = response.json["results"]
+    assert [result["status"] for result in results] == [201, 200, 201, 200]
+    task_id = results[0]["body"]["id"]
+    assert results[2]["body"]["content"] == f"Step {task_id}"
+    assert results[3]["body"]["subtasks"][0]["parent_task_id"] == task_id
+
+    task = test_client.get(f"/api/tasks/{task_id}", headers=headers).json
+    assert [tag["name"] for tag in task["tags"]] == ["batch-tag"]
+    assert task["subtask_count"] == 1
+
+
+def test_batch_is_all_or_nothing(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    stage_id = created_task_data["stage_id"]
+    before = db_session.query(Task).count()
+    operations = [
+        {
+            "method": "POST",
+            "path": f"/api/stages/{stage_id}/tasks",
+            "body": {"content": "Rolled back"},
+        },
+        {"method": "PUT", "path": "/api/tasks/99999", "body": {"content": "missing"}},
+        {"method": "DELETE", "path": f"/api/tasks/{created_task_data['task_id']}"},
+    ]
+    response = test_client.post(
+        "/api/batch", headers=headers, json={"operations": operations}
+    )
+
+    assert response.status_code == 404
+    assert response.json["committed"] is False and response.json["failed"] == 1
+    assert [result["status"] for result in response.json["results"]] == [201, 404, 424]
+    db_session.expire_all()
+    assert db_session.query(Task).count() == before
+    assert (
+        test_client.get(
+            f"/api/tasks/{created_task_data['task_id']}", headers=headers
+        ).status_code
+        == 200
+    )
+
+
+def test_batch_rejects_invalid_operations(test_client, auth_headers):
+    headers = {"Authorization": auth_headers["Authorization"]}
+
+    def run(*operations):
+        return test_client.post(
+            "/api/batch", headers=headers, json={"operations": list(operations)}
+        )
+
+    assert (
+        test_client.post(
+            "/api/batch", headers=headers, json={"operations": []}
+        ).status_code
+        == 400
+    )
+    assert (
+        run({"method": "POST", "path": "/api/auth/login", "body": {}}).status_code
+        == 400
+    )
+    assert (
+        run(
+            {"method": "POST", "path": "/api/batch", "body": {"operations": []}}
+        ).status_code
+        == 400
+    )
+    assert run({"method": "GET", "path": "/api/tasks/${0.id}"}).status_code == 400
+    assert run({"method": "GET", "path": "/api/nowhere"}).status_code == 404
+
+    test_client.application.config["BATCH_MAX_OPERATIONS"], limit = (
+        1,
+        test_client.application.config["BATCH_MAX_OPERATIONS"],
+    )
+    try:
+        assert (
+            run({"path": "/api/projects"}, {"path": "/api/projects"}).status_code == 400
+        )
+    finally:
+        test_client.application.config["BATCH_MAX_OPERATIONS"] = limit
+
+
+def _batch_requests_total(test_client):
+    series = (
+        'kanban_http_requests_total{endpoint="api.batch",method="POST",status="200"}'
+    )
+    for line in test_client.get("/metrics").get_data(as_text=True).splitlines():
+        if line.startswith(series + " "):
+            return float(line.split()[-1])
+    return 0.0
+
+
+def test_batch_request_is_instrumented(
+    test_app, test_client, auth_headers, created_task_data
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    task_id = created_task_data["task_id"]
+    read = {"method": "GET", "path": f"/api/tasks/{task_id}"}
+    before = _batch_requests_total(test_client)
+    test_app.config.update(QUERY_COUNT_HEADERS=True)
+    try:
+        single, triple = (
+            test_client.post(
+                "/api/batch", headers=headers, json={"operations": [read] * count}
+            )
+            for count in (1, 3)
+        )
+    finally:
+        test_app.config.update(QUERY_COUNT_HEADERS=None)
+
+    assert single.status_code == triple.status_code == 200
+    # The queries of every operation count towards the batch request
+    assert int(triple.headers["X-Query-Count"]) > int(single.headers["X-Query-Count"])
+    assert _batch_requests_total(test_client) == before + 2
+    body = test_client.get("/metrics").get_data(as_text=True)
+    assert 'kanban_db_queries_total{endpoint="api.batch"}' in body
+    assert "kanban_http_requests_in_flight 0" in body
@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from backend.app.models import Stage, SubTask, Task
+from backend.app.services.counter_service import reconcile_counters
+from backend.app.services.purge_service import purge_deleted
+
+
+def _drift(db_session):
+    report = reconcile_counters(db_session.connection())
+    return {
+        counter: result["drifted"]
+        for counter, result in report.items()
+        if result["drifted"]
+    }
+
+
+def test_clone_copies_hierarchy(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, task_id = created_task_data["project_id"], created_task_data["task_id"]
+    test_client.put(
+        f"/api/tasks/{task_id}",
+        headers=headers,
+        json={"due_date": "2026-11-01T09:00:00"},
+    )
+    test_client.post(
+        f"/api/tasks/{task_id}/subtasks",
+        headers=headers,
+        json={"content": "Step", "completed": True},
+    )
+    test_client.post(
+        f"/api/tasks/{task_id}/tags", headers=headers, json={"tag_name": "sprint"}
+    )
+    test_client.post(
+        f"/api/tasks/{task_id}/comments",
+        headers=headers,
+        json={"content": "Not copied"},
+    )
+
+    response = test_client.post(
+        f"/api/projects/{project_id}/clone", headers=headers, json={"name": "Sprint 2"}
+    )
+    assert response.status_code == 201
+    clone = response.json
+    assert clone["name"] == "Sprint 2" and clone["task_count"] == 1
+    assert clone["copied"] == {"stages": 1, "tasks": 1, "subtasks": 1, "tags": 1}
+
+    stages = test_client.get(
+        f"/api/projects/{clone['id']}/stages", headers=headers
+    ).json
+    assert [stage["name"] for stage in stages] == [created_task_data["stage_name"]]
+    tasks = test_client.get(
+        f"/api/stages/{stages[0]['id']}/tasks", headers=headers
+    ).json
+    assert len(tasks) == 1 and tasks[0]["id"] != task_id
+    copy = test_client.get(f"/api/tasks/{tasks[0]['id']}", headers=headers).json
+    assert copy["content"] == created_task_data["task_content"]
+    assert copy["due_date"] == "2026-11-01T09:00:00"
+    assert [tag["name"] for tag in copy["tags"]] == ["sprint"]
+    assert [(s["content"], s["completed"]) for s in copy["subtasks"]] == [
+        ("Step", True)
+    ]
+    assert (
+        copy["subtask_count"],
+        copy["open_subtask_count"],
+        copy["comment_count"],
+    ) == (1, 0, 0)
+    db_session.expire_all()
+    assert _drift(db_session) == {}
+
+    # The source is untouched
+    original = test_client.get(f"/api/tasks/{task_id}", headers=headers).json
+    assert original["comment_count"] == 1 and len(original["subtasks"]) == 1
+
+
+def test_clone_options(test_client, auth_headers, created_task_data, db_session):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, task_id = created_task_data["project_id"], created_task_data["task_id"]
+    test_client.put(
+        f"/api/tasks/{task_id}", headers=headers, json={"due_date": "2026-11-01"}
+    )
+
+    reset = test_client.post(
+        f"/api/projects/{project_id}/clone",
+        headers=headers,
+        json={"reset_due_dates": True},
+    ).json
+    assert reset["name"] == f"{created_task_data['project_name']} (copy)"
+    stage_id = db_session.query(Stage.id).filter_by(project_id=reset["id"]).scalar()
+    assert db_session.query(Task.due_date).filter_by(stage_id=stage_id).scalar() is None
+
+    empty = test_client.post(
+        f"/api/projects/{project_id}/clone",
+        headers=headers,
+        json={"include_tasks": False},
+    ).json
+    assert empty["copied"] == {"stages": 1, "tasks": 0, "subtasks": 0, "tags": 0}
+    assert empty["task_count"] == 0
+    db_session.expire_all()
+    assert _drift(db_session) == {}
+
+    bad = test_client.post(
+        f"/api/projects/{project_id}/clone",
+        headers=headers,
+        json={"include_tags": "yes"},
+    )
+    assert bad.status_code == 400
+    assert (
+        test_client.post(
+            "/api/projects/99999/clone", headers=headers, json={}
+        ).status_code
+        == 404
+    )
+
+
+def test_clone_does_not_reuse_purged_task_ids(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, stage_id = (
+        created_task_data["project_id"],
+        created_task_data["stage_id"],
+    )
+    purged_id = test_client.post(
+        f"/api/stages/{stage_id}/tasks", headers=headers, json={"content": "Gone"}
+    ).json["id"]
+    test_client.delete(f"/api/tasks/{purged_id}", headers=headers)
+    db_session.query(Task).filter_by(id=purged_id).update(
+        {"deleted_at": datetime.utcnow() - timedelta(days=8)}
+    )
+    db_session.commit()
+    purge_deleted(db_session, datetime.utcnow() - timedelta(days=7))
+    assert db_session.get(Task, purged_id) is None
+
+    clone = test_client.post(
+        f"/api/projects/{project_id}/clone", headers=headers, json={}
+    ).json
+    db_session.expire_all()
+    stage = db_session.query(Stage.id).filter_by(project_id=clone["id"]).scalar()
+    new_ids = [row.id for row in db_session.query(Task.id).filter_by(stage_id=stage)]
+    assert len(new_ids) == 1 and new_ids[0] > purged_id
+
+    # The purged task's history does not show up on the copy
+    activities = test_client.get(
+        f"/api/tasks/{new_ids[0]}/activities", headers=headers
+    ).json
+    assert all(entry["task_id"] == new_ids[0] for entry in activities)
+    later = test_client.post(
+        f"/api/stages/{stage_id}/tasks", headers=headers, json={"content": "Next"}
+    ).json["id"]
+    assert later > new_ids[0]
+
+
+def test_clone_statement_count_is_independent_of_board_size(
+    test_client, auth_headers, created_task_data, db_session, query_budget
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    url = f"/api/projects/{created_task_data['project_id']}/clone"
+    with query_budget(30) as small:
+        test_client.post(url, headers=headers, json={})
+
+    stage_id = created_task_data["stage_id"]
+    db_session.execute(
+        insert(Task),
+        [{"content": f"Task {i}", "stage_id": stage_id} for i in range(500)],
+    )
+    task_ids = [
+        task_id for (task_id,) in db_session.query(Task.id).filter_by(stage_id=stage_id)
+    ]
+    db_session.execute(
+        insert(SubTask),
+        [{"content": "s", "parent_task_id": task_id} for task_id in task_ids[:500]],
+    )
+    db_session.flush()
+
+    with query_budget(30) as large:
+        response = test_client.post(url, headers=headers, json={})
+    assert response.status_code == 201
+    assert (
+        response.json["copied"]["tasks"] == 501
+        and response.json["copied"]["subtasks"] == 500
+    )
+    assert large.count == small.count
@@ -0,0 +1,88 @@
+from backend.app.models import Project, Stage, Task
+from backend.app.services.counter_service import reconcile_counters
+
+
+def _no_drift(db_session):
+    report = reconcile_counters(db_session.connection())
+    return {
+        counter: result["drifted"]
+        for counter, result in report.items()
+        if result["drifted"]
+    }
+
+
+def test_counters_follow_mutating_routes(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id = created_task_data["project_id"]
+    stage_id = created_task_data["stage_id"]
+    task_id = created_task_data["task_id"]
+    done_id = test_client.post(
+        f"/api/projects/{project_id}/stages", headers=headers, json={"name": "Done"}
+    ).json["id"]
+    other_task = test_client.post(
+        f"/api/stages/{stage_id}/tasks", headers=headers, json={"content": "Second"}
+    ).json["id"]
+
+    subtask_ids = [
+        test_client.post(
+            f"/api/tasks/{task_id}/subtasks",
+            headers=headers,
+            json={"content": c, "completed": c == "b"},
+        ).json["id"]
+        for c in ("a", "b", "c")
+    ]
+    test_client.put(
+        f"/api/subtasks/{subtask_ids[0]}", headers=headers, json={"completed": True}
+    )
+    test_client.put(
+        f"/api/subtasks/{subtask_ids[0]}", headers=headers, json={"content": "a2"}
+    )
+    test_client.delete(f"/api/subtasks/{subtask_ids[2]}", headers=headers)
+    for content in ("one", "two"):
+        test_client.post(
+            f"/api/tasks/{task_id}/comments", headers=headers, json={"content": content}
+        )
+    test_client.put(
+        f"/api/tasks/{other_task}", headers=headers, json={"stage_id": done_id}
+    )
+
+    # Board cards carry the badges without extra queries
+    cards = test_client.get(f"/api/stages/{stage_id}/tasks", headers=headers).json
+    card = next(card for card in cards if card["id"] == task_id)
+    assert (
+        card["subtask_count"],
+        card["open_subtask_count"],
+        card["comment_count"],
+    ) == (2, 0, 2)
+
+    db_session.expire_all()
+    assert db_session.get(Stage, stage_id).task_count == 1
+    assert db_session.get(Stage, done_id).task_count == 1
+    assert db_session.get(Project, project_id).task_count == 2
+    assert _no_drift(db_session) == {}
+
+    test_client.delete(f"/api/tasks/{task_id}", headers=headers)
+    db_session.expire_all()
+    assert db_session.get(Stage, stage_id).task_count == 0
+    assert db_session.get(Project, project_id).task_count == 1
+
+    test_client.delete(f"/api/stages/{done_id}", headers=headers)
+    db_session.expire_all()
+    assert db_session.get(Project, project_id).task_count == 0
+    assert _no_drift(db_session) == {}
+
+
+def test_reconcile_counters_reports_and_fixes_drift(
+    test_app, created_task_data, db_session
+):
+    task = db_session.get(Task, created_task_data["task_id"])
+    task.comment_count = 7
+    db_session.get(Stage, created_task_data["stage_id"]).task_count = 3
+    db_session.flush()
+
+    report = reconcile_counters(db_session.connection(), fix=True)
+    assert report["task.comment_count"] == {"drifted": 1, "rows": [(task.id, 7, 0)]}
+    assert report["stage.task_count"]["rows"] == [(created_task_data["stage_id"], 3, 1)]
+    assert _no_drift(db_session) == {}
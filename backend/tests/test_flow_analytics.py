@@ -0,0 +1,269 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+
+from backend.app.models import ActivityLog, FlowDaily, FlowWatermark, Project, Stage
+from backend.app.services.flow_service import (
+    FlowState,
+    _save_state,
+    flow_metrics,
+    percentiles,
+    rebuild_project,
+    refresh_project,
+    replay,
+)
+
+DAY = date(2026, 3, 2)
+
+
+def _at(day_offset, hour=9):
+    return datetime.combine(
+        DAY + timedelta(days=day_offset), datetime.min.time()
+    ) + timedelta(hours=hour)
+
+
+def test_percentiles_interpolate():
+    assert percentiles([]) == {"p50": None, "p85": None, "p95": None}
+    assert percentiles([4, 1, 3, 2]) == {"p50": 2.5, "p85": 3.55, "p95": 3.85}
+
+
+def test_replay_snapshots_each_day():
+    events = [
+        (1, "TASK_CREATED", 10, _at(0), {"stage_id": 1}, None),
+        (2, "TASK_CREATED", 11, _at(0, 10), None, 1),  # falls back to the task's stage
+        (3, "TASK_UPDATED", 10, _at(2), {"from_stage_id": 1, "to_stage_id": 2}, 2),
+        (4, "TASK_UPDATED", 11, _at(2), {"content": "renamed"}, 1),
+        (5, "TASK_DELETED", 11, _at(3), None, None),
+    ]
+    state = FlowState()
+    snapshots = replay(events, state, DAY + timedelta(days=4))
+    assert snapshots == {
+        DAY: {1: 2},
+        DAY + timedelta(days=1): {1: 2},
+        DAY + timedelta(days=2): {1: 1, 2: 1},
+        DAY + timedelta(days=3): {2: 1},
+        DAY + timedelta(days=4): {2: 1},
+    }
+    assert state.tasks[10] == [2, _at(0), _at(2), _at(2)]
+    assert state.removed == {11} and state.last_activity_id == 5
+
+
+def test_task_move_records_stage_details(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    done = test_client.post(
+        f"/api/projects/{created_task_data['project_id']}/stages",
+        headers=headers,
+        json={"name": "Done"},
+    ).json
+    test_client.put(
+        f"/api/tasks/{created_task_data['task_id']}",
+        headers=headers,
+        json={"stage_id": done["id"]},
+    )
+
+    log = db_session.execute(
+        select(ActivityLog).where(
+            ActivityLog.task_id == created_task_data["task_id"],
+            ActivityLog.action_type == "TASK_UPDATED",
+        )
+    ).scalar_one()
+    assert log.details == {
+        "from_stage_id": created_task_data["stage_id"],
+        "to_stage_id": done["id"],
+    }
+
+    test_client.delete(f"/api/stages/{done['id']}", headers=headers)
+    deleted = db_session.execute(
+        select(ActivityLog).where(ActivityLog.action_type == "STAGE_DELETED")
+    ).scalar_one()
+    assert deleted.details == {"stage_id": done["id"], "stage": "Done"}
+
+
+def _project_with_history(db_session, user_id):
+    project = Project(name="Flow", user_id=user_id)
+    db_session.add(project)
+    db_session.flush()
+    stages = [
+        Stage(name=name, project_id=project.id, order=i)
+        for i, name in enumerate(("Todo", "Doing", "Done"))
+    ]
+    db_session.add_all(stages)
+    db_session.flush()
+    todo, doing, done = (stage.id for stage in stages)
+
+    def log(action, task_id, when, details):
+        entry = ActivityLog(
+            action, user_id, project_id=project.id, task_id=task_id, details=details
+        )
+        entry.created_at = when
+        db_session.add(entry)
+
+    log("TASK_CREATED", 901, _at(0), {"stage_id": todo})
+    log("TASK_CREATED", 902, _at(0), {"stage_id": todo})
+    log("TASK_UPDATED", 901, _at(1), {"from_stage_id": todo, "to_stage_id": doing})
+    log("TASK_UPDATED", 901, _at(3), {"from_stage_id": doing, "to_stage_id": done})
+    db_session.flush()
+    return project.id, (todo, doing, done), log
+
+
+def _daily(db_session, project_id):
+    rows = db_session.execute(
+        select(FlowDaily.day, FlowDaily.stage_id, FlowDaily.task_count)
+        .where(FlowDaily.project_id == project_id)
+        .order_by(FlowDaily.day, FlowDaily.stage_id)
+    )
+    return [tuple(row) for row in rows]
+
+
+def test_refresh_is_incremental_and_matches_rebuild(test_app, auth_headers, db_session):
+    project_id, (todo, doing, done), log = _project_with_history(
+        db_session, auth_headers["user_id"]
+    )
+    connection = db_session.connection()
+
+    assert refresh_project(connection, project_id, until=DAY + timedelta(days=3)) == 4
+    assert refresh_project(connection, project_id, until=DAY + timedelta(days=3)) == 0
+
+    log("TASK_UPDATED", 902, _at(5), {"from_stage_id": todo, "to_stage_id": done})
+    db_session.flush()
+    assert refresh_project(connection, project_id, until=DAY + timedelta(days=6)) == 1
+    watermark = db_session.get(FlowWatermark, project_id)
+    db_session.refresh(watermark)
+    assert watermark.day == DAY + timedelta(days=6)
+    incremental = _daily(db_session, project_id)
+    assert incremental[-1:] == [(DAY + timedelta(days=6), done, 2)]
+
+    rebuild_project(connection, project_id, until=DAY + timedelta(days=6))
+    assert _daily(db_session, project_id) == incremental
+
+    metrics = flow_metrics(
+        connection, project_id, days=7, until=DAY + timedelta(days=6)
+    )
+    assert metrics["done_stage_id"] == done and metrics["throughput"] == 2
+    # 901: created day 0, started day 1, done day 3; 902 went straight to done on day 5
+    assert metrics["lead_time_hours"]["count"] == 2
+    assert metrics["lead_time_hours"]["p50"] == 96.0
+    assert metrics["cycle_time_hours"] == {
+        "count": 1,
+        "p50": 48.0,
+        "p85": 48.0,
+        "p95": 48.0,
+        "mean": 48.0,
+    }
+    flow = {
+        stage["stage_id"]: stage["counts"]
+        for stage in metrics["cumulative_flow"]["stages"]
+    }
+    assert flow[todo] == [2, 1, 1, 1, 1, 0, 0]
+    assert flow[doing] == [0, 1, 1, 0, 0, 0, 0]
+    assert flow[done] == [0, 0, 0, 1, 1, 2, 2]
+
+
+def test_flow_endpoint(test_client, auth_headers, created_task_data):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id = created_task_data["project_id"]
+    doing, done = (
+        test_client.post(
+            f"/api/projects/{project_id}/stages", headers=headers, json={"name": name}
+        ).json
+        for name in ("Doing", "Done")
+    )
+    for stage in (doing, done):
+        test_client.put(
+            f"/api/tasks/{created_task_data['task_id']}",
+            headers=headers,
+            json={"stage_id": stage["id"]},
+        )
+
+    response = test_client.get(
+        f"/api/projects/{project_id}/flow?days=7", headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json
+    assert data["done_stage_id"] == done["id"] and data["throughput"] == 1
+    assert data["cycle_time_hours"]["count"] == 1
+    assert len(data["cumulative_flow"]["days"]) == 7
+    flow = {
+        stage["stage_id"]: stage["counts"]
+        for stage in data["cumulative_flow"]["stages"]
+    }
+    assert flow[done["id"]][-1] == 1 and flow[created_task_data["stage_id"]][-1] == 0
+
+    assert (
+        test_client.get("/api/projects/99999/flow", headers=headers).status_code == 404
+    )
+
+
+def test_losing_the_race_to_create_the_watermark_backs_off(auth_headers, db_session):
+    project_id, _, _ = _project_with_history(db_session, auth_headers["user_id"])
+    connection = db_session.connection()
+    assert refresh_project(connection, project_id, until=DAY) == 4
+    # A second first reader, which saw no watermark, inserts after the first
+    state = FlowState(day=DAY, last_activity_id=9)
+    assert _save_state(connection, project_id, state, {}, 0, False) is False
+    assert db_session.get(FlowWatermark, project_id).last_activity_id != 9
+
+
+def test_task_moved_to_another_project_leaves_the_old_rollup(
+    test_client, auth_headers, created_task_data
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    old_id, task_id = created_task_data["project_id"], created_task_data["task_id"]
+    new_id = test_client.post(
+        "/api/projects", headers=headers, json={"name": "Elsewhere"}
+    ).json["id"]
+    new_stage = test_client.post(
+        f"/api/projects/{new_id}/stages", headers=headers, json={"name": "Inbox"}
+    ).json
+    test_client.get(f"/api/projects/{old_id}/flow", headers=headers)
+
+    test_client.put(
+        f"/api/tasks/{task_id}", headers=headers, json={"stage_id": new_stage["id"]}
+    )
+    # The project the task arrived in rolls the move up first
+    for project_id in (new_id, old_id):
+        data = test_client.get(f"/api/projects/{project_id}/flow", headers=headers)
+        assert data.status_code == 200
+        flow = {
+            stage["stage_id"]: stage["counts"][-1]
+            for stage in data.json["cumulative_flow"]["stages"]
+        }
+        if project_id == new_id:
+            assert flow == {new_stage["id"]: 1}
+        else:
+            assert flow == {created_task_data["stage_id"]: 0}
+
+
+def test_restored_stage_brings_its_tasks_back(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, stage_id = (
+        created_task_data["project_id"],
+        created_task_data["stage_id"],
+    )
+
+    def today():
+        data = test_client.get(f"/api/projects/{project_id}/flow", headers=headers)
+        assert data.status_code == 200
+        return {
+            stage["stage_id"]: stage["counts"][-1]
+            for stage in data.json["cumulative_flow"]["stages"]
+        }
+
+    assert today() == {stage_id: 1}
+    test_client.delete(f"/api/stages/{stage_id}", headers=headers)
+    assert today() == {}
+    test_client.post(f"/api/stages/{stage_id}/restore", headers=headers)
+    assert today() == {stage_id: 1}
+
+    test_client.delete(f"/api/projects/{project_id}", headers=headers)
+    test_client.post(f"/api/projects/{project_id}/restore", headers=headers)
+    assert today() == {stage_id: 1}
+
+    # A full replay agrees with the incremental one
+    rebuild_project(db_session.connection(), project_id)
+    db_session.commit()
+    assert today() == {stage_id: 1}
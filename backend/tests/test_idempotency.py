@@ -0,0 +1,140 @@
+import threading
+import uuid
+
+import pytest
+
+from backend.app.idempotency import IdempotencyInProgress, IdempotencyStore
+from backend.app.models import ActivityLog, Comment, Project, Task
+
+
+def _entry(body="{}", fingerprint="f"):
+    return {
+        "fingerprint": fingerprint,
+        "status": 201,
+        "content_type": "application/json",
+        "body": body,
+    }
+
+
+def test_retried_post_is_replayed(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {
+        "Authorization": auth_headers["Authorization"],
+        "Idempotency-Key": str(uuid.uuid4()),
+    }
+    url = f"/api/stages/{created_task_data['stage_id']}/tasks"
+    tasks_before = db_session.query(Task).count()
+    logs_before = db_session.query(ActivityLog).count()
+
+    first = test_client.post(url, headers=headers, json={"content": "Once"})
+    retry = test_client.post(url, headers=headers, json={"content": "Once"})
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json == first.json
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert db_session.query(Task).count() == tasks_before + 1
+    assert db_session.query(ActivityLog).count() == logs_before + 1
+
+    reused = test_client.post(url, headers=headers, json={"content": "Different"})
+    assert reused.status_code == 422
+
+
+def test_batch_with_key_is_replayed(test_client, auth_headers, db_session):
+    headers = {
+        "Authorization": auth_headers["Authorization"],
+        "Idempotency-Key": str(uuid.uuid4()),
+    }
+    operations = [
+        {"method": "POST", "path": "/api/projects", "body": {"name": "Batched"}},
+        {"method": "GET", "path": "/api/projects/${0.id}"},
+    ]
+    before = db_session.query(Project).count()
+
+    first = test_client.post(
+        "/api/batch", headers=headers, json={"operations": operations}
+    )
+    retry = test_client.post(
+        "/api/batch", headers=headers, json={"operations": operations}
+    )
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true" and retry.json == first.json
+    assert db_session.query(Project).count() == before + 1
+
+
+def test_posts_without_key_are_not_deduplicated(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    url = f"/api/tasks/{created_task_data['task_id']}/comments"
+    for _ in range(2):
+        assert (
+            test_client.post(url, headers=headers, json={"content": "Hi"}).status_code
+            == 201
+        )
+    assert (
+        db_session.query(Comment)
+        .filter_by(task_id=created_task_data["task_id"])
+        .count()
+        == 2
+    )
+
+
+def test_store_is_bounded_and_expires():
+    now = [1000.0]
+    store = IdempotencyStore(max_entries=2, ttl=60, clock=lambda: now[0])
+    for key in ("a", "b", "c"):
+        assert store.claim(key, "f") is None
+        store.complete(key, _entry(key))
+    assert store.get("a") is None and store.get("c")["body"] == "c"
+    assert store.stats()["evictions"] == 1
+    now[0] += 61
+    assert store.get("c") is None
+
+
+def test_concurrent_duplicate_waits_for_original():
+    store = IdempotencyStore()
+    assert store.claim("k", "f") is None
+    results = []
+    waiter = threading.Thread(
+        target=lambda: results.append(store.claim("k", "f", timeout=5))
+    )
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()  # Blocked on the in-flight original
+
+    store.complete("k", _entry("original"))
+    waiter.join(5)
+    assert results == [_entry("original")]
+
+    assert store.claim("slow", "f") is None
+    with pytest.raises(IdempotencyInProgress):
+        store.claim("slow", "f", timeout=0.05)
+    store.release("slow")
+    assert store.claim("slow", "f") is None
+
+
+def test_shared_store_spans_workers(tmp_path):
+    path = str(tmp_path / "idempotency.db")
+    worker_a = IdempotencyStore(path=path, poll_interval=0.01)
+    worker_b = IdempotencyStore(path=path, poll_interval=0.01)
+
+    assert worker_a.claim("k", "f") is None
+    results = []
+    waiter = threading.Thread(
+        target=lambda: results.append(worker_b.claim("k", "f", timeout=5))
+    )
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+
+    worker_a.complete("k", _entry("shared"))
+    waiter.join(5)
+    assert results == [_entry("shared")]
+
+    # A claim released by a failed request can be taken over
+    assert worker_a.claim("failed", "f") is None
+    worker_a.release("failed")
+    assert worker_b.claim("failed", "f") is None
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.app.models import Job
+from backend.app.services import job_service
+from backend.app.services.job_handlers import HANDLERS
+
+
+@pytest.fixture
+def admin(test_app, auth_headers):
+    test_app.config["ADMIN_EMAILS"] = ["fixture@example.com"]
+    yield {"Authorization": auth_headers["Authorization"]}
+    test_app.config["ADMIN_EMAILS"] = []
+
+
+def test_admin_queues_job_and_owner_polls_it(
+    test_client, admin, created_task_data, db_session
+):
+    response = test_client.post(
+        "/api/admin/jobs",
+        headers=admin,
+        json={"kind": "reconcile_counters", "params": {"fix": True}},
+    )
+    assert response.status_code == 202
+    job_id = response.json["id"]
+    assert response.headers["Location"] == f"/api/jobs/{job_id}"
+    assert response.json["status"] == "queued" and response.json["attempts"] == 0
+
+    results = job_service.run_pending(db_session, "test-worker")
+    assert results == [(job_id, "reconcile_counters", "succeeded")]
+    job = test_client.get(f"/api/jobs/{job_id}", headers=admin).json
+    assert (
+        job["status"] == "succeeded" and job["progress"] == 1.0 and job["attempts"] == 1
+    )
+    assert job["result"]["project.task_count"] == 0 and job["finished_at"] is not None
+    assert (
+        test_client.post(f"/api/jobs/{job_id}/cancel", headers=admin).status_code == 409
+    )
+
+
+def test_job_requests_are_validated(test_client, admin, auth_headers):
+    assert (
+        test_client.post(
+            "/api/admin/jobs", headers=admin, json={"kind": "nope"}
+        ).status_code
+        == 400
+    )
+    bad = test_client.post(
+        "/api/admin/jobs",
+        headers=admin,
+        json={"kind": "flow_rollup", "params": {"force": True}},
+    )
+    assert bad.status_code == 400 and "force" in bad.json["message"]
+    assert test_client.get("/api/jobs/99999", headers=admin).status_code == 404
+
+    job_id = test_client.post(
+        "/api/admin/jobs", headers=admin, json={"kind": "purge_deleted"}
+    ).json["id"]
+    test_client.post(
+        "/api/auth/register",
+        json={
+            "username": "jobs-other",
+            "email": "jobs-other@example.com",
+            "password": "pw",
+        },
+    )
+    token = test_client.post(
+        "/api/auth/login", json={"email": "jobs-other@example.com", "password": "pw"}
+    ).json["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+    assert test_client.get(f"/api/jobs/{job_id}", headers=other).status_code == 403
+    assert (
+        test_client.post(
+            "/api/admin/jobs", headers=other, json={"kind": "purge_deleted"}
+        ).status_code
+        == 403
+    )
+
+
+def test_failed_job_is_retried_with_backoff(db_session, monkeypatch):
+    def boom(context):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setitem(HANDLERS, "boom", boom)
+    # Rolling back would also undo the fixture's outer transaction
+    monkeypatch.setattr(db_session, "rollback", lambda: None)
+    job = job_service.enqueue(db_session, "boom", max_attempts=2)
+
+    assert job_service.run_pending(db_session, "w1", retry_backoff=30) == [
+        (job.id, "boom", "queued")
+    ]
+    db_session.refresh(job)
+    assert job.attempts == 1 and job.error == "RuntimeError: disk full"
+    assert job.run_after > datetime.utcnow() + timedelta(seconds=25)
+    assert job_service.claim(db_session, "w1", 60) is None  # Not due yet
+
+    later = job.run_after + timedelta(seconds=1)
+    assert job_service.claim(db_session, "w1", 60, now=later) == (job.id, "boom")
+    assert job_service.execute_job(db_session, job.id, "w1") == "failed"
+    db_session.refresh(job)
+    assert job.status == "failed" and job.attempts == 2 and job.lease_owner is None
+
+
+def test_cancellation(test_client, admin, db_session, monkeypatch):
+    queued_id = test_client.post(
+        "/api/admin/jobs", headers=admin, json={"kind": "purge_deleted"}
+    ).json["id"]
+    response = test_client.post(f"/api/jobs/{queued_id}/cancel", headers=admin)
+    assert response.status_code == 200 and response.json["status"] == "cancelled"
+
+    steps = []
+
+    def slow(context):
+        for step in range(10):
+            steps.append(step)
+            if step == 3:
+                job_service.request_cancel(
+                    context.session, context.session.get(Job, context.job_id)
+                )
+            context.progress((step + 1) / 10)
+
+    monkeypatch.setitem(HANDLERS, "slow", slow)
+    monkeypatch.setattr(db_session, "rollback", lambda: None)
+    job = job_service.enqueue(db_session, "slow")
+    assert job_service.run_pending(db_session, "w1") == [(job.id, "slow", "cancelled")]
+    assert steps == [0, 1, 2, 3]
+    db_session.refresh(job)
+    assert job.progress == 0.4 and job.finished_at is not None
+
+
+def test_leases(db_session, monkeypatch):
+    monkeypatch.setitem(HANDLERS, "noop", lambda context: "ok")
+    job = job_service.enqueue(db_session, "noop", max_attempts=2)
+    now = datetime.utcnow()
+    assert job_service.claim(db_session, "w1", 60, now=now) == (job.id, "noop")
+    assert job_service.claim(db_session, "w2", 60, now=now) is None  # w1 holds it
+
+    # w1 died: once the lease is over w2 takes the job and w1 can no longer finish it
+    later = now + timedelta(seconds=61)
+    assert job_service.claim(db_session, "w2", 60, now=later) == (job.id, "noop")
+    job_service.renew(db_session, "w1", [job.id], 60)
+    db_session.refresh(job)
+    assert job.lease_owner == "w2" and job.attempts == 2
+    assert job_service.execute_job(db_session, job.id, "w1") is None
+    assert job_service.execute_job(db_session, job.id, "w2") == "succeeded"
+
+    # A job whose last attempt's runner died is failed rather than run again
+    dead = job_service.enqueue(db_session, "noop", max_attempts=1)
+    assert job_service.claim(db_session, "w1", 60, now=later) == (dead.id, "noop")
+    assert (
+        job_service.claim(db_session, "w2", 60, now=later + timedelta(seconds=61))
+        is None
+    )
+    db_session.refresh(dead)
+    assert dead.status == "failed" and dead.error == "Lease expired"
@@ -0,0 +1,131 @@
+import asyncio
+import random
+import threading
+from urllib.parse import urlsplit
+
+import pytest
+from werkzeug.serving import make_server
+
+from backend.app.services.loadgen_service import (
+    LatencyHistogram,
+    LoadStats,
+    SyntheticUser,
+    format_report,
+    parse_mix,
+    parse_request_log,
+    replay_log,
+    run_load,
+)
+
+
+@pytest.fixture(scope="function")
+def live_server(test_app, db_session):
+    """Serves the test app over real HTTP for the duration of one test."""
+    server = make_server("127.0.0.1", 0, test_app)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    thread.join()
+
+
+def test_parse_mix():
+    assert parse_mix("open_board=3,drag_task=1") == {
+        "open_board": 3.0,
+        "drag_task": 1.0,
+    }
+    assert "add_comment" in parse_mix(None)
+    with pytest.raises(ValueError):
+        parse_mix("explode=1")
+    with pytest.raises(ValueError):
+        parse_mix("open_board=0")
+
+
+def test_parse_access_log_and_recorded_lines():
+    lines = [
+        '127.0.0.1 - - [10/Oct/2025:13:55:36 +0000] "GET /api/projects/3 HTTP/1.1" 200 512 "-" "curl"',
+        '127.0.0.1 - - [10/Oct/2025:13:55:38 +0000] "PUT /api/tasks/9 HTTP/1.1" 200 80 "-" "curl"',
+        '127.0.0.1 - - [10/Oct/2025:13:55:37 +0000] "POST /api/auth/login HTTP/1.1" 200 80 "-" "curl"',
+        '{"offset": 1.5, "user": 2, "op": "add_comment", "method": "POST", '
+        '"path": "/api/tasks/1/comments", "body": {"content": "hi"}}',
+        "garbage line",
+    ]
+    entries = parse_request_log(lines)
+    assert [e["path"] for e in entries] == [
+        "/api/projects/3",
+        "/api/tasks/1/comments",
+        "/api/tasks/9",
+    ]
+    assert entries[2]["offset"] == 2.0
+    assert entries[2]["body"] == {}
+    assert entries[1]["user"] == 2
+
+
+def test_latency_histogram_percentiles():
+    hist = LatencyHistogram()
+    for ms in range(1, 101):
+        hist.record(ms / 1000.0)
+    assert hist.count == 100
+    assert 49 <= hist.percentile(50) <= 51
+    assert hist.percentile(99) >= 98
+    assert sum(hist.buckets) == 100
+
+
+def test_run_load_and_replay_against_live_server(live_server, tmp_path):
+    record_path = tmp_path / "requests.jsonl"
+    stats = asyncio.run(
+        run_load(
+            live_server,
+            users=2,
+            duration=0.5,
+            seed=1,
+            record_path=str(record_path),
+        )
+    )
+    report = stats.to_dict()
+    assert report["requests"] > 0
+    assert report["connection_errors"] == 0
+    assert report["database_locked"] == 0
+    assert set(report["operations"]) <= set(parse_mix(None))
+    assert "Latency histogram" in format_report(stats)
+
+    with open(record_path) as handle:
+        entries = parse_request_log(handle)
+    assert len(entries) == report["requests"]
+
+    replayed = asyncio.run(replay_log(live_server, entries[:10], users=2, speed=100.0))
+    assert replayed.total == min(10, len(entries))
+    assert replayed.connection_errors == 0
+
+
+def test_replay_speed_must_be_positive(test_app, tmp_path):
+    with pytest.raises(ValueError, match="speed"):
+        asyncio.run(replay_log("http://127.0.0.1:1", [], speed=0))
+
+    log = tmp_path / "requests.jsonl"
+    log.write_text("")
+    runner = test_app.test_cli_runner()
+    result = runner.invoke(args=["loadgen", "--replay", str(log), "--speed", "0"])
+    assert result.exit_code == 2 and "--speed" in result.output
+
+
+def test_board_setup_failure_reports_the_response(live_server, test_app, monkeypatch):
+    monkeypatch.setitem(
+        test_app.view_functions,
+        "api.create_project",
+        lambda: ({"message": "Board quota reached"}, 500),
+    )
+    parts = urlsplit(live_server)
+    user = SyntheticUser(
+        0, parts.hostname, parts.port, "loadgen-password", random.Random(1), LoadStats()
+    )
+
+    async def prepare():
+        await user.login()
+        try:
+            await user.prepare_board()
+        finally:
+            await user.conn.close()
+
+    with pytest.raises(RuntimeError, match="HTTP 500.*Board quota reached"):
+        asyncio.run(prepare())
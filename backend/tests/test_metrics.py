@@ -0,0 +1,80 @@
+import json
+
+from backend.app.metrics import Metrics, MetricsRegistry, render_prometheus
+
+
+def test_metrics_endpoint_reports_requests_and_queries(
+    test_client, auth_headers, created_project_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id = created_project_data["id"]
+    assert (
+        test_client.get(f"/api/projects/{project_id}", headers=headers).status_code
+        == 200
+    )
+    assert test_client.get("/api/projects/999999", headers=headers).status_code == 404
+
+    response = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+
+    assert "# TYPE kanban_http_request_duration_seconds histogram" in body
+    assert (
+        'kanban_http_requests_total{endpoint="api.get_project",method="GET",status="200"}'
+        in body
+    )
+    assert (
+        'kanban_http_requests_total{endpoint="api.get_project",method="GET",status="404"}'
+        in body
+    )
+    assert (
+        'kanban_http_request_duration_seconds_bucket{endpoint="api.get_project",method="GET",le="+Inf"}'
+        in body
+    )
+    assert 'kanban_db_queries_total{endpoint="api.get_project"}' in body
+    assert "kanban_http_requests_in_flight 0" in body
+    # The scrape itself is not recorded
+    assert 'endpoint="metrics"' not in body
+
+
+def test_render_prometheus_histogram_is_cumulative():
+    registry = MetricsRegistry()
+    labels = (("endpoint", "api.x"), ("method", "GET"))
+    for value in (0.001, 0.02, 0.02, 30.0):
+        registry.observe("kanban_http_request_duration_seconds", labels, value)
+    text = render_prometheus(registry)
+
+    prefix = (
+        'kanban_http_request_duration_seconds_bucket{endpoint="api.x",method="GET",'
+    )
+    assert f'{prefix}le="0.005"}} 1' in text
+    assert f'{prefix}le="0.025"}} 3' in text
+    assert f'{prefix}le="10.0"}} 3' in text
+    assert f'{prefix}le="+Inf"}} 4' in text
+    assert (
+        'kanban_http_request_duration_seconds_count{endpoint="api.x",method="GET"} 4'
+        in text
+    )
+
+
+def test_collect_aggregates_worker_snapshots(tmp_path):
+    metrics = Metrics()
+    metrics.directory = str(tmp_path)
+    labels = (("endpoint", "api.get_tags"), ("method", "GET"), ("status", "200"))
+    metrics.registry.inc("kanban_http_requests_total", labels, 3)
+    metrics.registry.set_gauge("kanban_http_requests_in_flight", (), 1)
+
+    # Snapshot left behind by another (already exited) worker process
+    other = MetricsRegistry()
+    other.inc("kanban_http_requests_total", labels, 2)
+    other.set_gauge("kanban_http_requests_in_flight", (), 5)
+    snapshot = other.snapshot()
+    snapshot["pid"] = 2**22 + 12345
+    with open(tmp_path / f"metrics-{snapshot['pid']}.json", "w") as handle:
+        json.dump(snapshot, handle)
+
+    merged = metrics.collect()
+    assert merged.counters[("kanban_http_requests_total", labels)] == 5
+    # Gauges from dead workers are dropped
+    assert merged.gauges[("kanban_http_requests_in_flight", ())] == 1
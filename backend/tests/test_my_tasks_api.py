@@ -0,0 +1,135 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from backend.app.pagination import decode_cursor, encode_cursor
+
+
+def _setup(test_client, headers, username):
+    ids = {}
+    for project_name in ("Alpha", "Beta"):
+        project_id = test_client.post(
+            "/api/projects", headers=headers, json={"name": project_name}
+        ).json["id"]
+        stage_id = test_client.post(
+            f"/api/projects/{project_id}/stages", headers=headers, json={"name": "Todo"}
+        ).json["id"]
+        for day, assignee, priority in (
+            (3, username, "High"),
+            (1, username, "Low"),
+            (2, "someone", "High"),
+            (None, username, "High"),
+        ):
+            task = {
+                "content": f"{project_name}-{day}-{assignee}",
+                "assignee": assignee,
+                "priority": priority,
+            }
+            if day:
+                task["due_date"] = f"2026-11-0{day}T12:00:00"
+            response = test_client.post(
+                f"/api/stages/{stage_id}/tasks", headers=headers, json=task
+            )
+            ids[task["content"]] = response.json["id"]
+    return ids
+
+
+def test_my_tasks_spans_projects_in_due_order(test_client, auth_headers, query_budget):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    username = auth_headers["username"]
+    _setup(test_client, headers, username)
+
+    with query_budget(4):
+        response = test_client.get("/api/me/tasks", headers=headers)
+    assert response.status_code == 200
+    assert [task["content"] for task in response.json] == [
+        f"Alpha-1-{username}",
+        f"Beta-1-{username}",
+        f"Alpha-3-{username}",
+        f"Beta-3-{username}",
+    ]
+    assert (
+        response.json[0]["project_name"] == "Alpha"
+        and response.json[0]["stage_name"] == "Todo"
+    )
+    assert "X-Next-Cursor" not in response.headers
+
+    filtered = test_client.get(
+        "/api/me/tasks?due_after=2026-11-02&due_before=2026-11-04&priority=High",
+        headers=headers,
+    ).json
+    assert [task["content"] for task in filtered] == [
+        f"Alpha-3-{username}",
+        f"Beta-3-{username}",
+    ]
+
+    anyone = test_client.get(
+        "/api/me/tasks?assignee=*&due_before=2026-11-03", headers=headers
+    ).json
+    assert [task["content"] for task in anyone] == [
+        f"Alpha-1-{username}",
+        f"Beta-1-{username}",
+        "Alpha-2-someone",
+        "Beta-2-someone",
+    ]
+
+
+def test_my_tasks_keyset_pages(test_client, auth_headers):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    _setup(test_client, headers, auth_headers["username"])
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/me/tasks?assignee=*&limit=3" + (
+            f"&cursor={cursor}" if cursor else ""
+        )
+        response = test_client.get(url, headers=headers)
+        assert response.status_code == 200
+        seen.extend(task["id"] for task in response.json)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 6
+
+    assert (
+        test_client.get("/api/me/tasks?cursor=bogus", headers=headers).status_code
+        == 400
+    )
+    assert (
+        test_client.get("/api/me/tasks?due_before=soon", headers=headers).status_code
+        == 400
+    )
+
+
+def test_my_tasks_only_covers_own_projects(test_client, auth_headers, db_session):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    _setup(test_client, headers, "shared-name")
+    test_client.post(
+        "/api/auth/register",
+        json={"username": "other", "email": "other@example.com", "password": "pw"},
+    )
+    token = test_client.post(
+        "/api/auth/login", json={"email": "other@example.com", "password": "pw"}
+    ).json["access_token"]
+    response = test_client.get(
+        "/api/me/tasks?assignee=shared-name",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200 and response.json == []
+
+
+def test_my_tasks_query_uses_assignee_index(test_app, db_session):
+    plan = db_session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT task.id FROM task JOIN stage ON task.stage_id = stage.id "
+            "JOIN project ON stage.project_id = project.id WHERE project.user_id = 1 "
+            "AND task.due_date IS NOT NULL AND task.assignee = 'a' AND task.deleted_at IS NULL ORDER BY task.due_date, task.id LIMIT 51"
+        )
+    ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_task_assignee_due_date" in details
+
+
+def test_cursor_round_trip():
+    value = datetime(2026, 11, 1, 12, 30)
+    assert decode_cursor(encode_cursor(value, 7), 2) == [value, 7]
@@ -0,0 +1,133 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+
+import pytest
+
+from backend.app import create_app
+from backend.app.profiling import RequestProfiler, SamplingProfiler, collapse_stats
+
+
+def _work(n):
+    return sum(i * i for i in range(n))
+
+
+def test_collapse_stats_produces_flamegraph_lines():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    _work(20000)
+    profiler.disable()
+    collapsed = collapse_stats(pstats.Stats(profiler))
+    lines = [line for line in collapsed.splitlines() if "_work" in line]
+    assert lines
+    stack, usec = lines[0].rsplit(" ", 1)
+    assert int(usec) > 0
+    assert "_work (test_profiling.py:" in stack
+
+
+@pytest.fixture(scope="function")
+def profiled_app(tmp_path):
+    app = create_app(config_name="testing")
+    app.config.update(
+        PROFILING_ENABLED=True,
+        PROFILING_DIR=str(tmp_path),
+        PROFILING_TOKEN="let-me-profile",
+        PROFILING_SAMPLE_RATE=0.0,
+    )
+    # create_app already ran with profiling disabled; attach a profiler
+    # configured from the updated settings.
+    RequestProfiler(app)
+    return app
+
+
+def test_profiling_is_disabled_by_default(test_app):
+    assert test_app.extensions["profiler"].directory is None
+    response = test_app.test_client().get("/api/health?profile=anything")
+    assert "X-Profile-File" not in response.headers
+
+
+def test_authorized_request_is_profiled(profiled_app, tmp_path):
+    client = profiled_app.test_client()
+
+    response = client.get("/api/health")
+    assert "X-Profile-File" not in response.headers
+    response = client.get("/api/health", headers={"X-Profile": "wrong"})
+    assert "X-Profile-File" not in response.headers
+    assert os.listdir(tmp_path) == []
+
+    response = client.get("/api/health", headers={"X-Profile": "let-me-profile"})
+    assert response.status_code == 200
+    prof_name = response.headers["X-Profile-File"]
+    assert prof_name.startswith("api.health_check-") and prof_name.endswith(".prof")
+    collapsed = tmp_path / prof_name.replace(".prof", ".collapsed")
+    assert collapsed.exists()
+    assert "health_check" in collapsed.read_text()
+    assert pstats.Stats(str(tmp_path / prof_name)).total_calls > 0
+
+    response = client.get("/api/health?profile=let-me-profile")
+    assert "X-Profile-File" in response.headers
+
+
+def test_sampling_profiles_requests(profiled_app, tmp_path):
+    profiled_app.config["PROFILING_SAMPLE_RATE"] = 1.0
+    response = profiled_app.test_client().get("/api/health")
+    assert "X-Profile-File" in response.headers
+    assert len(list(tmp_path.glob("*.prof"))) == 1
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        _work(500)
+
+
+def test_sampling_profiler_collects_endpoint_stacks(tmp_path):
+    sampler = SamplingProfiler()
+    sampler.directory = str(tmp_path)
+    sampler.hz = 200
+    sampler.flush_interval = 3600
+
+    sampler._active[threading.get_ident()] = "api.busy"
+    sampler.start()
+    try:
+        _busy(0.3)
+    finally:
+        sampler._active.clear()
+        sampler._stop.set()
+        sampler._thread.join()
+
+    assert sampler.samples > 0
+    assert sampler.overhead() < 0.5
+    busy_stacks = [
+        stack for stack in sampler.counts if "_busy (test_profiling.py" in stack
+    ]
+    assert busy_stacks
+    assert all(stack.startswith("api.busy;") for stack in busy_stacks)
+
+    path = sampler.flush()
+    assert path.endswith(".collapsed")
+    with open(path) as handle:
+        first = handle.readline().rstrip("\n")
+    stack, count = first.rsplit(" ", 1)
+    assert stack.startswith("api.busy;") and int(count) > 0
+    assert sampler.counts == {}
+    assert sampler.flush() is None
+
+
+def test_sampling_profiler_tracks_request_threads(tmp_path):
+    app = create_app(config_name="testing")
+    app.config.update(
+        SAMPLING_PROFILER_ENABLED=True,
+        SAMPLING_PROFILER_DIR=str(tmp_path),
+        SAMPLING_PROFILER_FLUSH_INTERVAL=3600,
+    )
+    sampler = SamplingProfiler(app)
+    try:
+        assert app.test_client().get("/api/health").status_code == 200
+        assert sampler._thread is not None and sampler._thread.is_alive()
+        assert sampler._active == {}
+    finally:
+        sampler.stop()
+    assert sampler._thread is None
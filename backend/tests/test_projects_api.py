@@ -1,10 +1,14 @@
+from datetime import datetime
+
 from backend.app.models import Project
 
 # Fixtures like test_client, auth_headers, created_project_data, db_session,
 # and another_user_auth_headers_activity are assumed to be available from conftest.py
 
 
-def test_update_project_success_only_name(test_client, auth_headers, created_project_data, db_session):
+def test_update_project_success_only_name(
+    test_client, auth_headers, created_project_data, db_session
+):
     project_id = created_project_data["id"]
     new_name = "Updated Project Name Only"
     headers = {"Authorization": auth_headers["Authorization"]}
@@ -14,14 +18,14 @@ def test_update_project_success_only_name(test_client, auth_headers, created_pro
     original_description = get_response.json["description"]
 
     response = test_client.put(
-        f"/api/projects/{project_id}",
-        headers=headers,
-        json={"name": new_name}
+        f"/api/projects/{project_id}", headers=headers, json={"name": new_name}
     )
     assert response.status_code == 200
     updated_project = response.json
     assert updated_project["name"] == new_name
-    assert updated_project["description"] == original_description  # Description should not change
+    assert (
+        updated_project["description"] == original_description
+    )  # Description should not change
 
     # Verify in DB
     project_db = db_session.query(Project).get(project_id)
@@ -29,7 +33,9 @@ def test_update_project_success_only_name(test_client, auth_headers, created_pro
     assert project_db.description == original_description
 
 
-def test_update_project_success_only_description(test_client, auth_headers, created_project_data, db_session):
+def test_update_project_success_only_description(
+    test_client, auth_headers, created_project_data, db_session
+):
     project_id = created_project_data["id"]
     original_name = created_project_data["name"]
     new_description = "Updated Project Description Only"
@@ -38,7 +44,7 @@ def test_update_project_success_only_description(test_client, auth_headers, crea
     response = test_client.put(
         f"/api/projects/{project_id}",
         headers=headers,
-        json={"description": new_description}
+        json={"description": new_description},
     )
     assert response.status_code == 200
     updated_project = response.json
@@ -51,7 +57,9 @@ def test_update_project_success_only_description(test_client, auth_headers, crea
     assert project_db.description == new_description
 
 
-def test_update_project_empty_name_and_description(test_client, auth_headers, created_project_data, db_session):
+def test_update_project_empty_name_and_description(
+    test_client, auth_headers, created_project_data, db_session
+):
     project_id = created_project_data["id"]
     headers = {"Authorization": auth_headers["Authorization"]}
 
@@ -64,7 +72,7 @@ def test_update_project_empty_name_and_description(test_client, auth_headers, cr
     response_empty_name = test_client.put(
         f"/api/projects/{project_id}",
         headers=headers,
-        json={"name": "   "}  # Empty after strip
+        json={"name": "   "},  # Empty after strip
     )
     assert response_empty_name.status_code == 200
     assert response_empty_name.json["name"] == original_name  # Name should not change
@@ -77,11 +85,13 @@ def test_update_project_empty_name_and_description(test_client, auth_headers, cr
     response_empty_desc = test_client.put(
         f"/api/projects/{project_id}",
         headers=headers,
-        json={"description": "   "}  # Empty after strip
+        json={"description": "   "},  # Empty after strip
     )
     assert response_empty_desc.status_code == 200
     assert response_empty_desc.json["description"] == ""  # Description should be empty
-    assert response_empty_desc.json["name"] == original_name  # Name should remain original
+    assert (
+        response_empty_desc.json["name"] == original_name
+    )  # Name should remain original
 
     # Verify in DB
     project_db_after_empty_desc = db_session.query(Project).get(project_id)
@@ -93,22 +103,24 @@ def test_update_project_no_input_data(test_client, auth_headers, created_project
     project_id = created_project_data["id"]
     headers = {"Authorization": auth_headers["Authorization"]}
     response = test_client.put(
-        f"/api/projects/{project_id}",
-        headers=headers,
-        json={}  # No data
+        f"/api/projects/{project_id}", headers=headers, json={}  # No data
     )
     assert response.status_code == 400
     assert response.json["message"] == "No input data provided"
 
 
-def test_update_project_forbidden(test_client, created_project_data, another_user_auth_headers_activity):
+def test_update_project_forbidden(
+    test_client, created_project_data, another_user_auth_headers_activity
+):
     project_id = created_project_data["id"]  # Created by the primary fixture user
-    other_user_headers = another_user_auth_headers_activity  # Headers for a different user
+    other_user_headers = (
+        another_user_auth_headers_activity  # Headers for a different user
+    )
 
     response = test_client.put(
         f"/api/projects/{project_id}",
         headers=other_user_headers,
-        json={"name": "Attempt by Other User"}
+        json={"name": "Attempt by Other User"},
     )
     assert response.status_code == 403
     assert response.json["message"] == "Access forbidden"
@@ -119,13 +131,15 @@ def test_update_non_existent_project(test_client, auth_headers):
     response = test_client.put(
         "/api/projects/99999",  # Non-existent ID
         headers=headers,
-        json={"name": "Trying to update ghost project"}
+        json={"name": "Trying to update ghost project"},
     )
     assert response.status_code == 404
     assert response.json["message"] == "Project not found"
 
 
-def test_update_project_success_name_and_description(test_client, auth_headers, created_project_data, db_session):
+def test_update_project_success_name_and_description(
+    test_client, auth_headers, created_project_data, db_session
+):
     project_id = created_project_data["id"]
     new_name = "Fully Updated Name"
     new_description = "Fully Updated Description"
@@ -134,7 +148,7 @@ def test_update_project_success_name_and_description(test_client, auth_headers,
     response = test_client.put(
         f"/api/projects/{project_id}",
         headers=headers,
-        json={"name": new_name, "description": new_description}
+        json={"name": new_name, "description": new_description},
     )
     assert response.status_code == 200
     updated_project = response.json
@@ -151,25 +165,33 @@ def test_update_project_unauthorized(test_client, created_project_data):
     project_id = created_project_data["id"]
     # No Authorization header
     response = test_client.put(
-        f"/api/projects/{project_id}",
-        json={"name": "Attempt without Auth"}
+        f"/api/projects/{project_id}", json={"name": "Attempt without Auth"}
     )
     assert response.status_code == 401
     # The specific message can vary, "Missing Authorization Header" is common for Flask-JWT-Extended
-    assert "Missing Authorization Header" in response.json.get("msg", "") or \
-           "Authorization Required" in response.json.get("message", "")  # Adjust if message is different
+    assert "Missing Authorization Header" in response.json.get(
+        "msg", ""
+    ) or "Authorization Required" in response.json.get(
+        "message", ""
+    )  # Adjust if message is different
 
 
 def test_create_project_missing_name(test_client, auth_headers):
     headers = {"Authorization": auth_headers["Authorization"]}
 
     # Test with no name field
-    response_no_name = test_client.post("/api/projects", headers=headers, json={"description": "Project without name"})
+    response_no_name = test_client.post(
+        "/api/projects", headers=headers, json={"description": "Project without name"}
+    )
     assert response_no_name.status_code == 400
     assert response_no_name.json["message"] == "Project name is required"
 
     # Test with empty name string
-    response_empty_name = test_client.post("/api/projects", headers=headers, json={"name": "   ", "description": "Project with empty name"})
+    response_empty_name = test_client.post(
+        "/api/projects",
+        headers=headers,
+        json={"name": "   ", "description": "Project with empty name"},
+    )
     assert response_empty_name.status_code == 400
     assert response_empty_name.json["message"] == "Project name is required"
 
@@ -179,18 +201,26 @@ def test_create_project_missing_name(test_client, auth_headers):
     assert response_no_data.json["message"] == "Project name is required"
 
 
-def test_get_project_forbidden(test_client, created_project_data, another_user_auth_headers_activity):
+def test_get_project_forbidden(
+    test_client, created_project_data, another_user_auth_headers_activity
+):
     project_id = created_project_data["id"]  # Created by primary user
     other_user_headers = another_user_auth_headers_activity
 
-    response = test_client.get(f"/api/projects/{project_id}", headers=other_user_headers)
+    response = test_client.get(
+        f"/api/projects/{project_id}", headers=other_user_headers
+    )
     assert response.status_code == 403
-    assert response.json["message"] == "Access forbidden"  # Matches the message in get_project
+    assert (
+        response.json["message"] == "Access forbidden"
+    )  # Matches the message in get_project
 
 
 def test_get_non_existent_project(test_client, auth_headers):
     headers = {"Authorization": auth_headers["Authorization"]}
-    response = test_client.get("/api/projects/99999", headers=headers)  # Non-existent ID
+    response = test_client.get(
+        "/api/projects/99999", headers=headers
+    )  # Non-existent ID
     assert response.status_code == 404
     assert response.json["message"] == "Project not found"
 
@@ -204,7 +234,7 @@ def test_create_project_success_with_description(test_client, auth_headers, db_s
     response = test_client.post(
         "/api/projects",
         headers=headers,
-        json={"name": project_name, "description": project_desc}
+        json={"name": project_name, "description": project_desc},
     )
     assert response.status_code == 201
     created_project = response.json
@@ -225,3 +255,179 @@ def test_create_project_success_with_description(test_client, auth_headers, db_s
     # db_session.delete(project_db)
     # db_session.commit()
     # For now, rely on db_session fixture's rollback.
+
+
+# === Tests for DELETE /api/projects/<project_id> ===
+def test_delete_project_cascades_in_database(
+    test_client, auth_headers, created_task_data, db_session
+):
+    from backend.app.models import (
+        ActivityLog,
+        Comment,
+        Stage,
+        SubTask,
+        Tag,
+        Task,
+        task_tag,
+    )
+    from backend.app.query_counter import count_queries
+    from backend.app.services.purge_service import purge_deleted
+
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id = created_task_data["project_id"]
+    task_id = created_task_data["task_id"]
+    for i in range(3):
+        test_client.post(
+            f"/api/stages/{created_task_data['stage_id']}/tasks",
+            headers=headers,
+            json={"content": f"Extra {i}"},
+        )
+    test_client.post(
+        f"/api/tasks/{task_id}/subtasks", headers=headers, json={"content": "Sub"}
+    )
+    test_client.post(
+        f"/api/tasks/{task_id}/comments", headers=headers, json={"content": "Note"}
+    )
+    assert test_client.post(
+        f"/api/tasks/{task_id}/tags", headers=headers, json={"tag_name": "cascade"}
+    ).status_code in (200, 201)
+    db_session.expunge_all()  # Nothing is loaded when the route runs
+
+    with count_queries() as collector:
+        response = test_client.delete(f"/api/projects/{project_id}", headers=headers)
+    assert response.status_code == 204
+    # DELETE only marks the project; nothing below it is touched
+    assert not [shape for shape in collector.shapes if shape.startswith("DELETE")]
+
+    # Purging it is a single DELETE per level, however many children there are
+    with count_queries() as collector:
+        purge_deleted(db_session, datetime.utcnow())
+    deletes = [
+        shape for shape in collector.shapes if shape.startswith("DELETE FROM project")
+    ]
+    assert deletes == [
+        "DELETE FROM project WHERE project.id IN (SELECT project.id FROM project WHERE project.id = ? LIMIT ? OFFSET ?)"
+    ]
+
+    assert db_session.query(Stage).filter_by(project_id=project_id).count() == 0
+    assert (
+        db_session.query(Task).filter_by(stage_id=created_task_data["stage_id"]).count()
+        == 0
+    )
+    assert db_session.query(SubTask).filter_by(parent_task_id=task_id).count() == 0
+    assert db_session.query(Comment).filter_by(task_id=task_id).count() == 0
+    assert db_session.query(task_tag).filter_by(task_id=task_id).count() == 0
+    assert db_session.query(ActivityLog).filter_by(project_id=project_id).count() == 0
+    assert (
+        db_session.query(Tag).filter_by(name="cascade").count() == 1
+    )  # Tags are shared
+
+
+def test_list_projects_pages_by_creation_with_counts(
+    test_client, auth_headers, created_task_data, db_session, query_budget
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    stage_id = created_task_data["stage_id"]
+    test_client.post(
+        f"/api/stages/{stage_id}/tasks",
+        headers=headers,
+        json={"content": "Late", "due_date": "2020-01-01"},
+    )
+    gone = test_client.post(
+        f"/api/stages/{stage_id}/tasks",
+        headers=headers,
+        json={"content": "Gone", "due_date": "2020-01-01"},
+    ).json
+    test_client.delete(f"/api/tasks/{gone['id']}", headers=headers)
+    created = [created_task_data["project_id"]]
+    for i in range(4):
+        created.append(
+            test_client.post(
+                "/api/projects", headers=headers, json={"name": f"Page {i}"}
+            ).json["id"]
+        )
+    db_session.query(Project).filter(Project.id.in_(created[-2:])).update(
+        {"created_at": datetime(2026, 1, 1)}
+    )
+    db_session.commit()
+    expected = [
+        *reversed(created[:-2]),
+        *sorted(created[-2:], reverse=True),
+    ]  # Newest first, ties by id
+
+    ids, cursor = [], None
+    while True:
+        with query_budget(3):
+            response = test_client.get(
+                "/api/projects",
+                headers=headers,
+                query_string={"limit": 2, "include": "counts", "cursor": cursor or ""},
+            )
+        assert response.status_code == 200 and len(response.json) <= 2
+        ids += [project["id"] for project in response.json]
+        counts = {project["id"]: project["counts"] for project in response.json}
+        if created_task_data["project_id"] in counts:
+            assert counts[created_task_data["project_id"]] == {
+                "stages": 1,
+                "tasks": 2,
+                "overdue": 1,
+            }
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert ids == expected
+
+    plain = test_client.get("/api/projects", headers=headers).json
+    assert [project["id"] for project in plain] == expected and "counts" not in plain[0]
+    assert (
+        test_client.get("/api/projects?cursor=nope", headers=headers).status_code == 400
+    )
+
+
+def test_board_cards_carry_subtask_progress(
+    test_client, auth_headers, created_task_data, query_budget
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, task_id = created_task_data["project_id"], created_task_data["task_id"]
+    done_stage = test_client.post(
+        f"/api/projects/{project_id}/stages", headers=headers, json={"name": "Done"}
+    ).json["id"]
+    for i in range(5):
+        extra = test_client.post(
+            f"/api/stages/{done_stage}/tasks",
+            headers=headers,
+            json={"content": f"Card {i}"},
+        ).json["id"]
+        test_client.post(
+            f"/api/tasks/{extra}/subtasks",
+            headers=headers,
+            json={"content": "Step", "completed": True},
+        )
+    url = f"/api/projects/{project_id}?include_stages=true&include_tasks=true"
+    test_client.get(url, headers=headers)  # Cached until the project changes
+
+    subtask = test_client.post(
+        f"/api/tasks/{task_id}/subtasks", headers=headers, json={"content": "One"}
+    ).json
+    test_client.post(
+        f"/api/tasks/{task_id}/subtasks", headers=headers, json={"content": "Two"}
+    )
+    test_client.put(
+        f"/api/subtasks/{subtask['id']}", headers=headers, json={"completed": True}
+    )
+    with query_budget(4):  # Project, stages, tasks and their tags, however many cards
+        response = test_client.get(url, headers=headers)
+    assert response.status_code == 200 and response.headers["X-Cache"] == "MISS"
+    stages = {stage["name"]: stage["tasks"] for stage in response.json["stages"]}
+    card = stages["Shared Test Stage"][0]
+    assert card["id"] == task_id and "subtasks" not in card
+    assert (card["subtask_count"], card["completed_subtask_count"]) == (2, 1)
+    assert [task["completed_subtask_count"] for task in stages["Done"]] == [1] * 5
+
+    # Without include_tasks the board has the stages only
+    assert (
+        "tasks"
+        not in test_client.get(f"/api/projects/{project_id}", headers=headers).json[
+            "stages"
+        ][0]
+    )
@@ -0,0 +1,79 @@
+import logging
+
+import pytest
+
+from backend.app.models import Task
+from backend.app.query_counter import count_queries, normalize_statement
+
+
+def test_normalize_statement_groups_by_shape():
+    first = normalize_statement("SELECT * FROM task WHERE id = 3 AND content = 'a'")
+    second = normalize_statement(
+        "SELECT *  FROM task\nWHERE id = 42 AND content = 'it''s'"
+    )
+    assert first == second == "SELECT * FROM task WHERE id = ? AND content = ?"
+    assert normalize_statement("SELECT 1 FROM tag WHERE id IN (?, ?, ?)") == (
+        "SELECT ? FROM tag WHERE id IN (?)"
+    )
+
+
+def test_count_queries_flags_repeated_shapes_with_call_site(
+    created_task_data, db_session
+):
+    with count_queries(threshold=3) as collector:
+        for _ in range(4):
+            db_session.execute(
+                Task.__table__.select().where(Task.id == created_task_data["task_id"])
+            ).fetchall()
+    assert collector.count == 4
+    [(shape, count, site)] = collector.n_plus_one
+    assert count == 4
+    assert shape.startswith("SELECT task.id")
+    assert site.startswith("tests/test_query_counter.py:")
+
+
+def test_debug_headers_and_n_plus_one_warning(
+    test_app, test_client, auth_headers, created_task_data, db_session, caplog
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    task_id = created_task_data["task_id"]
+    test_app.config.update(QUERY_COUNT_HEADERS=True, N_PLUS_ONE_THRESHOLD=2)
+    try:
+        # A request whose "view" runs the same query three times
+        with caplog.at_level(logging.WARNING):
+            with test_app.test_request_context(f"/api/tasks/{task_id}", method="PUT"):
+                test_app.preprocess_request()
+                for _ in range(3):
+                    db_session.execute(
+                        Task.__table__.select().where(Task.id == task_id)
+                    ).fetchall()
+                response = test_app.process_response(test_app.make_response("ok"))
+    finally:
+        test_app.config.update(QUERY_COUNT_HEADERS=None, N_PLUS_ONE_THRESHOLD=5)
+
+    assert int(response.headers["X-Query-Count"]) == 3
+    assert "X-Query-Time-Ms" in response.headers
+    assert response.headers["X-N-Plus-One"].startswith(
+        "3x tests/test_query_counter.py:"
+    )
+    assert "Possible N+1 queries in PUT" in caplog.text
+
+    # Headers are off outside debug mode by default
+    response = test_client.get(f"/api/tasks/{task_id}", headers=headers)
+    assert "X-Query-Count" not in response.headers
+
+
+def test_query_budget_fixture(
+    test_client, auth_headers, created_project_data, db_session, query_budget
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id = created_project_data["id"]
+
+    with query_budget(3) as collector:
+        response = test_client.get(f"/api/projects/{project_id}", headers=headers)
+    assert response.status_code == 200
+    assert collector.count <= 3
+
+    with pytest.raises(pytest.fail.Exception, match="Query budget exceeded"):
+        with query_budget(0):
+            test_client.get(f"/api/projects/{project_id}", headers=headers)
@@ -0,0 +1,214 @@
+import socketserver
+import threading
+
+import pytest
+
+from backend.app.response_cache import DiskCache, MemoryCache, RedisCache
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for RedisCache: GET, SET, INFO."""
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            if command == b"GET":
+                value = store.get(args[1])
+                reply = (
+                    b"$-1\r\n"
+                    if value is None
+                    else b"$%d\r\n%s\r\n" % (len(value), value)
+                )
+            elif command == b"SET":
+                store[args[1]] = args[2]
+                reply = b"+OK\r\n"
+            elif command == b"INFO":
+                info = b"# Stats\r\nevicted_keys:3\r\n"
+                reply = b"$%d\r\n%s\r\n" % (len(info), info)
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespHandler)
+    server.daemon_threads = True
+    server.store = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_memory_cache_evicts_least_recently_used_to_stay_under_cap():
+    cache = MemoryCache(max_bytes=10)
+    assert cache.set("a", b"1234") == 0
+    assert cache.set("b", b"1234") == 0
+    assert cache.get("a") == b"1234"  # b is now the least recently used
+    assert cache.set("c", b"1234") == 1
+    assert cache.get("b") is None and cache.get("c") == b"1234"
+    assert cache.set("huge", b"x" * 11) == 0 and cache.get("huge") is None
+    stats = cache.stats()
+    assert (stats["bytes"], stats["hits"], stats["misses"], stats["evictions"]) == (
+        8,
+        2,
+        2,
+        1,
+    )
+
+
+def test_disk_cache_is_shared_and_capped(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_a, worker_b = DiskCache(path, max_bytes=10), DiskCache(path, max_bytes=10)
+    worker_a.set("a", b"1234")
+    worker_a.set("b", b"1234")
+    assert worker_b.get("a") == b"1234"
+    assert worker_b.set("c", b"1234") == 1
+    assert worker_a.get("b") is None and worker_a.get("a") == b"1234"
+    assert worker_b.stats()["entries"] == 2
+
+
+def test_redis_cache_speaks_the_protocol(resp_server):
+    host, port = resp_server.server_address
+    cache = RedisCache(f"redis://{host}:{port}/0", ttl=60)
+    assert cache.get("board:1") is None
+    cache.set("board:1", b'{"id": 1}')
+    assert resp_server.store[b"board:1"] == b'{"id": 1}'
+    assert cache.get("board:1") == b'{"id": 1}'
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 3)
+
+
+def test_unreachable_redis_is_a_miss(resp_server):
+    host, port = resp_server.server_address
+    resp_server.shutdown()
+    resp_server.server_close()
+    cache = RedisCache(f"redis://{host}:{port}/0", timeout=0.2)
+    assert cache.get("board:1") is None
+    cache.set("board:1", b"{}")
+    assert cache.stats()["errors"] == 1  # Not retried until retry_interval passes
+
+
+def test_board_is_served_from_cache_until_the_project_changes(
+    test_client, auth_headers, created_task_data, test_app
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, stage_id = (
+        created_task_data["project_id"],
+        created_task_data["stage_id"],
+    )
+    url = f"/api/projects/{project_id}"
+
+    first = test_client.get(url, headers=headers)
+    assert first.headers["X-Cache"] == "MISS"
+    second = test_client.get(url, headers=headers)
+    assert second.headers["X-Cache"] == "HIT" and second.json == first.json
+
+    test_client.post(
+        f"/api/stages/{stage_id}/tasks", headers=headers, json={"content": "Another"}
+    )
+    third = test_client.get(url, headers=headers)
+    assert third.headers["X-Cache"] == "MISS"
+    assert third.json["task_count"] == 2 and third.json["stages"][0]["task_count"] == 2
+
+    registry = test_app.extensions["metrics"].registry
+    hits = (("kind", "board"), ("result", "hit"))
+    assert registry.counters[("kanban_response_cache_requests_total", hits)] >= 1
+
+
+def test_writes_invalidate_only_their_project(
+    test_client, auth_headers, created_task_data
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, task_id = created_task_data["project_id"], created_task_data["task_id"]
+    other_id = test_client.post(
+        "/api/projects", headers=headers, json={"name": "Other"}
+    ).json["id"]
+    for pid in (project_id, other_id):
+        test_client.get(f"/api/projects/{pid}/stages", headers=headers)
+        test_client.get(f"/api/projects/{pid}/activities", headers=headers)
+
+    test_client.post(
+        f"/api/tasks/{task_id}/comments", headers=headers, json={"content": "Hi"}
+    )
+    activities = test_client.get(
+        f"/api/projects/{project_id}/activities", headers=headers
+    )
+    assert activities.headers["X-Cache"] == "MISS"
+    assert activities.json[0]["action_type"] == "COMMENT_ADDED"
+    assert (
+        test_client.get(
+            f"/api/projects/{other_id}/activities", headers=headers
+        ).headers["X-Cache"]
+        == "HIT"
+    )
+    assert (
+        test_client.get(f"/api/projects/{other_id}/stages", headers=headers).headers[
+            "X-Cache"
+        ]
+        == "HIT"
+    )
+
+    test_client.put(
+        f"/api/stages/{created_task_data['stage_id']}",
+        headers=headers,
+        json={"name": "Renamed"},
+    )
+    stages = test_client.get(f"/api/projects/{project_id}/stages", headers=headers)
+    assert stages.headers["X-Cache"] == "MISS" and stages.json[0]["name"] == "Renamed"
+
+
+def test_rolled_back_batch_leaves_no_cached_response(
+    test_client, auth_headers, created_project_data
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    url = f"/api/projects/{created_project_data['id']}"
+    operations = [
+        {"method": "PUT", "path": url, "body": {"name": "PHANTOM"}},
+        {"method": "GET", "path": url},
+        {"method": "GET", "path": "/api/projects/99999"},
+    ]
+    batch = test_client.post(
+        "/api/batch", headers=headers, json={"operations": operations}
+    )
+    assert batch.json["committed"] is False
+    assert batch.json["results"][1]["body"]["name"] == "PHANTOM"
+
+    # Takes the project to the version number the batch had used
+    test_client.put(url, headers=headers, json={"description": "real edit"})
+    board = test_client.get(url, headers=headers)
+    assert board.headers["X-Cache"] == "MISS"
+    assert board.json["name"] == created_project_data["name"]
+    assert board.json["description"] == "real edit"
+
+
+def test_admin_cache_stats(test_client, auth_headers, created_project_data, test_app):
+    test_app.config["ADMIN_EMAILS"] = ["fixture@example.com"]
+    try:
+        test_client.get(
+            f"/api/projects/{created_project_data['id']}",
+            headers={"Authorization": auth_headers["Authorization"]},
+        )
+        response = test_client.get(
+            "/api/admin/cache", headers={"Authorization": auth_headers["Authorization"]}
+        )
+    finally:
+        test_app.config["ADMIN_EMAILS"] = []
+    assert response.status_code == 200
+    assert response.json["backend"] == "memory" and response.json["misses"] >= 1
@@ -0,0 +1,114 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from backend.app.services.seed_service import parse_distribution, seed_database
+
+
+def test_parse_distribution():
+    import random
+
+    rng = random.Random(1)
+    assert parse_distribution("fixed:4")(rng) == 4
+    assert all(2 <= parse_distribution("uniform:2:5")(rng) <= 5 for _ in range(50))
+    assert all(0 <= parse_distribution("zipf:1.5:10")(rng) <= 10 for _ in range(50))
+    assert all(parse_distribution("normal:5:10")(rng) >= 0 for _ in range(50))
+    with pytest.raises(ValueError):
+        parse_distribution("gamma:1:2")
+
+
+def test_seed_database_merges_shards(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    spec = {"stages": "fixed:3", "tasks": "fixed:4", "subtasks": "fixed:2"}
+
+    totals = seed_database(
+        engine, projects=5, users=4, tags=6, workers=2, seed=7, spec=spec
+    )
+
+    with engine.connect() as conn:
+        counts = {
+            name: conn.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar()
+            for name in (
+                "user",
+                "project",
+                "stage",
+                "task",
+                "sub_task",
+                "comment",
+                "task_tag",
+                "activity_log",
+            )
+        }
+        # Every foreign key must point at a merged parent row
+        orphans = conn.execute(
+            text(
+                "SELECT COUNT(*) FROM task LEFT JOIN stage ON stage.id = task.stage_id "
+                "LEFT JOIN project ON project.id = stage.project_id WHERE project.id IS NULL"
+            )
+        ).scalar()
+        orphan_subtasks = conn.execute(
+            text(
+                "SELECT COUNT(*) FROM sub_task WHERE parent_task_id NOT IN (SELECT id FROM task)"
+            )
+        ).scalar()
+
+    assert counts["user"] == 4
+    assert counts["project"] == 5
+    assert counts["stage"] == 15
+    assert counts["task"] == 60
+    assert counts["sub_task"] == 120
+    assert orphans == 0
+    assert orphan_subtasks == 0
+    for name, count in counts.items():
+        assert totals.get(name, count) == count
+
+    # A second run appends after the existing ids instead of colliding, and
+    # after the ids of purged tasks, whose activity is still on record
+    with engine.begin() as conn:
+        purged_id = conn.execute(text("SELECT MAX(id) FROM task")).scalar()
+        for statement in (
+            "DELETE FROM sub_task WHERE parent_task_id = :id",
+            "DELETE FROM comment WHERE task_id = :id",
+            "DELETE FROM task_tag WHERE task_id = :id",
+            "DELETE FROM task WHERE id = :id",
+        ):
+            conn.execute(text(statement), {"id": purged_id})
+    seed_database(engine, projects=2, users=1, tags=6, workers=2, seed=8, spec=spec)
+    with engine.connect() as conn:
+        assert conn.execute(
+            text("SELECT MIN(id) FROM task WHERE id >= :id"), {"id": purged_id}
+        ).scalar() == (purged_id + 1)
+        assert (
+            conn.execute(
+                text("SELECT seq FROM sqlite_sequence WHERE name = 'task'")
+            ).scalar()
+            == conn.execute(text("SELECT MAX(id) FROM task")).scalar()
+        )
+        assert conn.execute(text("SELECT COUNT(*) FROM project")).scalar() == 7
+        assert conn.execute(text("SELECT COUNT(*) FROM tag")).scalar() == 6
+
+
+def test_seed_cli_command(test_app, tmp_path):
+    runner = test_app.test_cli_runner()
+    database = tmp_path / "cli.db"
+    result = runner.invoke(
+        args=[
+            "seed",
+            "--database",
+            str(database),
+            "--projects",
+            "2",
+            "--users",
+            "2",
+            "--workers",
+            "1",
+            "--tasks",
+            "fixed:2",
+        ]
+    )
+    assert result.exit_code == 0, result.output
+    assert "Seeded" in result.output
+
+    result = runner.invoke(
+        args=["seed", "--database", str(database), "--tasks", "bogus"]
+    )
+    assert result.exit_code != 0
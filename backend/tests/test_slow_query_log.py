@@ -0,0 +1,118 @@
+import json
+
+import pytest
+
+from backend.app.slow_query_log import format_plan, parameter_shape
+
+
+@pytest.fixture(scope="function")
+def slow_query_log(test_app, tmp_path):
+    """Logs every statement into a temporary file for the duration of a test."""
+    ext = test_app.extensions["slow_query_log"]
+    original = (ext.threshold, ext.log_path)
+    ext.threshold = 0.0
+    ext.log_path = str(tmp_path / "slow.log")
+    yield ext
+    ext.threshold, ext.log_path = original
+
+
+@pytest.fixture(scope="function")
+def admin_headers(test_app, auth_headers):
+    test_app.config["ADMIN_EMAILS"] = ["fixture@example.com"]
+    yield {"Authorization": auth_headers["Authorization"]}
+    test_app.config["ADMIN_EMAILS"] = []
+
+
+def test_parameter_shape_hides_values():
+    assert parameter_shape((3, "secret", None)) == ["int", "str(6)", "NoneType"]
+    assert parameter_shape({"id": 1}) == {"id": "int"}
+    assert parameter_shape([(1, "ab"), (2, "cd")], executemany=True) == {
+        "rows": 2,
+        "row": ["int", "str(2)"],
+    }
+
+
+def test_format_plan_indents_children():
+    rows = [(2, 0, 0, "SCAN task"), (5, 2, 0, "USE TEMP B-TREE FOR ORDER BY")]
+    assert format_plan(rows) == "SCAN task\n  USE TEMP B-TREE FOR ORDER BY"
+
+
+def test_slow_statements_are_logged_with_plan_and_endpoint(
+    test_client, auth_headers, created_task_data, db_session, slow_query_log
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    stage_id = created_task_data["stage_id"]
+    response = test_client.get(f"/api/stages/{stage_id}/tasks", headers=headers)
+    assert response.status_code == 200
+
+    with open(slow_query_log.worker_log_path()) as handle:
+        records = [json.loads(line) for line in handle]
+    task_queries = [
+        r
+        for r in records
+        if r["endpoint"] == "api.get_tasks_for_stage"
+        and r["shape"].startswith("SELECT task.id")
+    ]
+    assert task_queries
+    record = task_queries[0]
+    assert record["params"][0] == "int"
+    assert str(stage_id) not in json.dumps(record["params"])
+    assert "task" in record["plan"]
+    assert record["duration_ms"] >= 0
+
+
+def test_admin_slow_query_endpoint(
+    test_client,
+    auth_headers,
+    created_task_data,
+    db_session,
+    slow_query_log,
+    admin_headers,
+):
+    stage_id = created_task_data["stage_id"]
+    for _ in range(3):
+        test_client.get(f"/api/stages/{stage_id}/tasks", headers=admin_headers)
+
+    response = test_client.get(
+        "/api/admin/slow-queries?sort=count&limit=5", headers=admin_headers
+    )
+    assert response.status_code == 200
+    offenders = response.json["offenders"]
+    assert 0 < len(offenders) <= 5
+    counts = [o["count"] for o in offenders]
+    assert counts == sorted(counts, reverse=True)
+    task_select = next(o for o in offenders if o["shape"].startswith("SELECT task.id"))
+    assert task_select["count"] >= 3
+    assert task_select["endpoints"]["api.get_tasks_for_stage"] >= 3
+
+    assert (
+        test_client.get(
+            "/api/admin/slow-queries?sort=bogus", headers=admin_headers
+        ).status_code
+        == 400
+    )
+
+
+def test_each_worker_writes_its_own_file(
+    test_client, auth_headers, db_session, slow_query_log, admin_headers
+):
+    other = {"ts": "2026-01-01T00:00:00", "duration_ms": 5.0, "shape": "SELECT ?"}
+    with open(f"{slow_query_log.log_path}.99999.1", "w") as handle:
+        handle.write(json.dumps({**other, "endpoint": "api.other_worker"}) + "\n")
+    test_client.get("/api/projects", headers=admin_headers)
+
+    assert slow_query_log.worker_log_path() in slow_query_log.log_files()
+    offenders = test_client.get(
+        "/api/admin/slow-queries?limit=100", headers=admin_headers
+    ).json["offenders"]
+    assert any("api.other_worker" in o["endpoints"] for o in offenders)
+
+
+def test_admin_slow_query_endpoint_requires_admin(
+    test_client, auth_headers, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    assert (
+        test_client.get("/api/admin/slow-queries", headers=headers).status_code == 403
+    )
+    assert test_client.get("/api/admin/slow-queries").status_code == 401
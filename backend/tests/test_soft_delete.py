@@ -0,0 +1,253 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from backend.app.models import ActivityLog, Comment, Project, Stage, SubTask, Task
+from backend.app.services.counter_service import reconcile_counters
+from backend.app.services.purge_service import purge_deleted
+
+
+def _drift(db_session):
+    report = reconcile_counters(db_session.connection())
+    return {
+        counter: result["drifted"]
+        for counter, result in report.items()
+        if result["drifted"]
+    }
+
+
+def _age(db_session, model, row_id, days):
+    db_session.query(model).filter_by(id=row_id).update(
+        {"deleted_at": datetime.utcnow() - timedelta(days=days)}
+    )
+    db_session.commit()
+
+
+def test_deleted_rows_are_hidden_and_restorable(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, stage_id, task_id = (
+        created_task_data[key] for key in ("project_id", "stage_id", "task_id")
+    )
+    other_id = test_client.post(
+        f"/api/stages/{stage_id}/tasks", headers=headers, json={"content": "Other"}
+    ).json["id"]
+
+    assert (
+        test_client.delete(f"/api/tasks/{task_id}", headers=headers).status_code == 204
+    )
+    assert test_client.get(f"/api/tasks/{task_id}", headers=headers).status_code == 404
+    assert (
+        test_client.put(
+            f"/api/tasks/{task_id}", headers=headers, json={"content": "x"}
+        ).status_code
+        == 404
+    )
+    assert [
+        task["id"]
+        for task in test_client.get(
+            f"/api/stages/{stage_id}/tasks", headers=headers
+        ).json
+    ] == [other_id]
+    board = test_client.get(f"/api/projects/{project_id}", headers=headers).json
+    assert board["task_count"] == 1 and board["stages"][0]["task_count"] == 1
+    assert (
+        test_client.get(f"/api/projects/{project_id}/stats", headers=headers).json[
+            "total_tasks"
+        ]
+        == 1
+    )
+    db_session.expire_all()
+    assert db_session.get(Task, task_id).deleted_at is not None
+    assert _drift(db_session) == {}
+
+    restored = test_client.post(f"/api/tasks/{task_id}/restore", headers=headers)
+    assert restored.status_code == 200 and restored.json["id"] == task_id
+    assert (
+        test_client.post(f"/api/tasks/{task_id}/restore", headers=headers).status_code
+        == 409
+    )
+    assert (
+        test_client.get(f"/api/projects/{project_id}", headers=headers).json[
+            "task_count"
+        ]
+        == 2
+    )
+    db_session.expire_all()
+    assert _drift(db_session) == {}
+
+
+def test_stage_and_project_deletes_hide_everything_below(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, stage_id, task_id = (
+        created_task_data[key] for key in ("project_id", "stage_id", "task_id")
+    )
+
+    assert (
+        test_client.delete(f"/api/stages/{stage_id}", headers=headers).status_code
+        == 204
+    )
+    assert test_client.get(f"/api/tasks/{task_id}", headers=headers).status_code == 404
+    assert (
+        test_client.get(f"/api/projects/{project_id}/stages", headers=headers).json
+        == []
+    )
+    assert (
+        test_client.get(f"/api/projects/{project_id}", headers=headers).json[
+            "task_count"
+        ]
+        == 0
+    )
+    # The task itself was not deleted, so only its stage can bring it back
+    assert (
+        test_client.post(f"/api/tasks/{task_id}/restore", headers=headers).status_code
+        == 409
+    )
+    assert (
+        test_client.post(f"/api/stages/{stage_id}/restore", headers=headers).status_code
+        == 200
+    )
+    assert (
+        test_client.get(f"/api/projects/{project_id}", headers=headers).json[
+            "task_count"
+        ]
+        == 1
+    )
+    db_session.expire_all()
+    assert _drift(db_session) == {}
+
+    assert (
+        test_client.delete(f"/api/projects/{project_id}", headers=headers).status_code
+        == 204
+    )
+    assert project_id not in [
+        p["id"] for p in test_client.get("/api/projects", headers=headers).json
+    ]
+    assert (
+        test_client.get(
+            f"/api/projects/{project_id}/stages", headers=headers
+        ).status_code
+        == 404
+    )
+    assert (
+        test_client.get(f"/api/stages/{stage_id}/tasks", headers=headers).status_code
+        == 404
+    )
+    assert test_client.get("/api/me/tasks?assignee=", headers=headers).json == []
+    assert (
+        test_client.post(f"/api/stages/{stage_id}/restore", headers=headers).status_code
+        == 404
+    )
+    assert (
+        test_client.post(
+            f"/api/projects/{project_id}/restore", headers=headers
+        ).status_code
+        == 200
+    )
+    assert test_client.get(f"/api/tasks/{task_id}", headers=headers).status_code == 200
+
+
+def test_restore_after_grace_period_is_gone(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    task_id = created_task_data["task_id"]
+    test_client.delete(f"/api/tasks/{task_id}", headers=headers)
+    _age(db_session, Task, task_id, 8)
+    assert (
+        test_client.post(f"/api/tasks/{task_id}/restore", headers=headers).status_code
+        == 410
+    )
+    assert (
+        test_client.post("/api/tasks/99999/restore", headers=headers).status_code == 404
+    )
+
+
+def test_purge_removes_expired_rows_in_batches(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id, stage_id, task_id = (
+        created_task_data[key] for key in ("project_id", "stage_id", "task_id")
+    )
+    test_client.post(
+        f"/api/tasks/{task_id}/subtasks", headers=headers, json={"content": "Step"}
+    )
+    test_client.post(
+        f"/api/tasks/{task_id}/comments", headers=headers, json={"content": "Hi"}
+    )
+    recent_id = test_client.post(
+        f"/api/stages/{stage_id}/tasks", headers=headers, json={"content": "Recent"}
+    ).json["id"]
+    test_client.delete(f"/api/tasks/{task_id}", headers=headers)
+    test_client.delete(f"/api/tasks/{recent_id}", headers=headers)
+    _age(db_session, Task, task_id, 8)
+
+    cutoff = datetime.utcnow() - timedelta(days=7)
+    purged, done = purge_deleted(db_session, cutoff, batch_size=1)
+    assert done and purged == {"projects": 0, "stages": 0, "tasks": 1, "activities": 0}
+    assert (
+        db_session.get(Task, task_id) is None
+        and db_session.get(Task, recent_id) is not None
+    )
+    assert db_session.query(SubTask).filter_by(parent_task_id=task_id).count() == 0
+    assert db_session.query(Comment).filter_by(task_id=task_id).count() == 0
+
+    for _ in range(3):
+        test_client.post(
+            f"/api/stages/{stage_id}/tasks", headers=headers, json={"content": "More"}
+        )
+    test_client.delete(f"/api/projects/{project_id}", headers=headers)
+    _age(db_session, Project, project_id, 8)
+    purged, done = purge_deleted(db_session, cutoff, batch_size=2)
+    assert done and (purged["projects"], purged["stages"], purged["tasks"]) == (1, 1, 4)
+    assert db_session.get(Stage, stage_id) is None
+    assert db_session.query(ActivityLog).filter_by(project_id=project_id).count() == 0
+    assert (
+        test_client.post(
+            f"/api/projects/{project_id}/restore", headers=headers
+        ).status_code
+        == 404
+    )
+
+
+def test_purge_stops_when_time_budget_runs_out(
+    test_client, auth_headers, created_task_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    stage_id = created_task_data["stage_id"]
+    for _ in range(2):
+        task_id = test_client.post(
+            f"/api/stages/{stage_id}/tasks", headers=headers, json={"content": "Old"}
+        ).json["id"]
+        test_client.delete(f"/api/tasks/{task_id}", headers=headers)
+        _age(db_session, Task, task_id, 8)
+
+    ticks = iter(range(100))
+    cutoff = datetime.utcnow() - timedelta(days=7)
+    purged, done = purge_deleted(
+        db_session, cutoff, batch_size=1, time_budget=1.5, clock=lambda: next(ticks)
+    )
+    assert not done and purged["tasks"] == 1
+    purged, done = purge_deleted(db_session, cutoff, batch_size=1)
+    assert done and purged["tasks"] == 1
+
+
+def test_live_queries_use_partial_indexes(test_app, db_session):
+    def plan(sql):
+        return " ".join(
+            row[-1] for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+        )
+
+    assert "ix_project_user_id_created_at_live" in plan(
+        "SELECT id FROM project WHERE user_id = 1 AND deleted_at IS NULL ORDER BY created_at DESC, id DESC"
+    )
+    assert "ix_stage_project_id_live" in plan(
+        'SELECT id FROM stage WHERE project_id = 1 AND deleted_at IS NULL ORDER BY "order"'
+    )
+    assert "ix_task_deleted_at" in plan(
+        "SELECT id FROM task WHERE deleted_at IS NOT NULL AND deleted_at <= '2026-01-01'"
+    )
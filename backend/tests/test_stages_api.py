@@ -1,3 +1,5 @@
+from datetime import datetime
+
 import pytest
 from backend.app.models import Stage
 
@@ -15,7 +17,7 @@ def created_stage_data(test_client, auth_headers, created_project_data, db_sessi
     response = test_client.post(
         f"/api/projects/{project_id}/stages",
         headers=headers,
-        json={"name": stage_name, "order": 1}
+        json={"name": stage_name, "order": 1},
     )
     if response.status_code != 201:
         pytest.fail(f"Failed to create stage for setup: {response.json}")
@@ -24,12 +26,14 @@ def created_stage_data(test_client, auth_headers, created_project_data, db_sessi
         "id": stage_data["id"],
         "name": stage_data["name"],
         "project_id": project_id,
-        "order": stage_data["order"]
+        "order": stage_data["order"],
     }
 
 
 # === Tests for POST /api/projects/<project_id>/stages ===
-def test_create_stage_success(test_client, auth_headers, created_project_data, db_session):
+def test_create_stage_success(
+    test_client, auth_headers, created_project_data, db_session
+):
     project_id = created_project_data["id"]
     headers = {"Authorization": auth_headers["Authorization"]}
     stage_name = "New Unique Stage"
@@ -38,7 +42,7 @@ def test_create_stage_success(test_client, auth_headers, created_project_data, d
     response = test_client.post(
         f"/api/projects/{project_id}/stages",
         headers=headers,
-        json={"name": stage_name, "order": stage_order}
+        json={"name": stage_name, "order": stage_order},
     )
     assert response.status_code == 201
     created_stage = response.json
@@ -56,20 +60,22 @@ def test_create_stage_project_not_found(test_client, auth_headers):
     response = test_client.post(
         "/api/projects/9999/stages",
         headers=headers,
-        json={"name": "Stage for Ghost Project"}
+        json={"name": "Stage for Ghost Project"},
     )
     assert response.status_code == 404
     assert response.json["message"] == "Project not found"
 
 
-def test_create_stage_forbidden_for_project(test_client, created_project_data, another_user_auth_headers_activity):
+def test_create_stage_forbidden_for_project(
+    test_client, created_project_data, another_user_auth_headers_activity
+):
     project_id = created_project_data["id"]  # Belongs to primary user
     other_user_headers = another_user_auth_headers_activity
 
     response = test_client.post(
         f"/api/projects/{project_id}/stages",
         headers=other_user_headers,
-        json={"name": "Stage by Other User"}
+        json={"name": "Stage by Other User"},
     )
     assert response.status_code == 403
     assert response.json["message"] == "Access forbidden to this project"
@@ -80,9 +86,7 @@ def test_create_stage_missing_name(test_client, auth_headers, created_project_da
     headers = {"Authorization": auth_headers["Authorization"]}
 
     response = test_client.post(
-        f"/api/projects/{project_id}/stages",
-        headers=headers,
-        json={}  # No name
+        f"/api/projects/{project_id}/stages", headers=headers, json={}  # No name
     )
     assert response.status_code == 400
     assert response.json["message"] == "Stage name is required"
@@ -90,14 +94,16 @@ def test_create_stage_missing_name(test_client, auth_headers, created_project_da
     response_empty_name = test_client.post(
         f"/api/projects/{project_id}/stages",
         headers=headers,
-        json={"name": "   "}  # Empty name
+        json={"name": "   "},  # Empty name
     )
     assert response_empty_name.status_code == 400
     assert response_empty_name.json["message"] == "Stage name is required"
 
 
 # === Tests for GET /api/projects/<project_id>/stages ===
-def test_get_stages_for_project_success(test_client, auth_headers, created_stage_data):  # Uses created_stage_data
+def test_get_stages_for_project_success(
+    test_client, auth_headers, created_stage_data
+):  # Uses created_stage_data
     project_id = created_stage_data["project_id"]
     headers = {"Authorization": auth_headers["Authorization"]}
 
@@ -116,16 +122,22 @@ def test_get_stages_project_not_found(test_client, auth_headers):
     assert response.json["message"] == "Project not found"
 
 
-def test_get_stages_forbidden_for_project(test_client, created_project_data, another_user_auth_headers_activity):
+def test_get_stages_forbidden_for_project(
+    test_client, created_project_data, another_user_auth_headers_activity
+):
     project_id = created_project_data["id"]
     other_user_headers = another_user_auth_headers_activity
-    response = test_client.get(f"/api/projects/{project_id}/stages", headers=other_user_headers)
+    response = test_client.get(
+        f"/api/projects/{project_id}/stages", headers=other_user_headers
+    )
     assert response.status_code == 403
     assert response.json["message"] == "Access forbidden to this project"
 
 
 # === Tests for PUT /api/stages/<stage_id> ===
-def test_update_stage_success(test_client, auth_headers, created_stage_data, db_session):
+def test_update_stage_success(
+    test_client, auth_headers, created_stage_data, db_session
+):
     stage_id = created_stage_data["id"]
     headers = {"Authorization": auth_headers["Authorization"]}
     new_name = "Updated Stage Name"
@@ -134,7 +146,7 @@ def test_update_stage_success(test_client, auth_headers, created_stage_data, db_
     response = test_client.put(
         f"/api/stages/{stage_id}",
         headers=headers,
-        json={"name": new_name, "order": new_order}
+        json={"name": new_name, "order": new_order},
     )
     assert response.status_code == 200
     updated_stage = response.json
@@ -148,18 +160,22 @@ def test_update_stage_success(test_client, auth_headers, created_stage_data, db_
 
 def test_update_stage_not_found(test_client, auth_headers):
     headers = {"Authorization": auth_headers["Authorization"]}
-    response = test_client.put("/api/stages/9999", headers=headers, json={"name": "Ghost Stage"})
+    response = test_client.put(
+        "/api/stages/9999", headers=headers, json={"name": "Ghost Stage"}
+    )
     assert response.status_code == 404
     assert response.json["message"] == "Stage not found"
 
 
-def test_update_stage_forbidden(test_client, created_stage_data, another_user_auth_headers_activity):
+def test_update_stage_forbidden(
+    test_client, created_stage_data, another_user_auth_headers_activity
+):
     stage_id = created_stage_data["id"]
     other_user_headers = another_user_auth_headers_activity
     response = test_client.put(
         f"/api/stages/{stage_id}",
         headers=other_user_headers,
-        json={"name": "Update by Other"}
+        json={"name": "Update by Other"},
     )
     assert response.status_code == 403
     assert response.json["message"] == "Access forbidden to this stage"
@@ -173,19 +189,25 @@ def test_update_stage_no_input_data(test_client, auth_headers, created_stage_dat
     assert response.json["message"] == "No input data provided"
 
 
-def test_update_stage_empty_name(test_client, auth_headers, created_stage_data, db_session):
+def test_update_stage_empty_name(
+    test_client, auth_headers, created_stage_data, db_session
+):
     stage_id = created_stage_data["id"]
     original_stage = db_session.query(Stage).get(stage_id)
     original_name = original_stage.name
     headers = {"Authorization": auth_headers["Authorization"]}
 
-    response = test_client.put(f"/api/stages/{stage_id}", headers=headers, json={"name": "   "})
+    response = test_client.put(
+        f"/api/stages/{stage_id}", headers=headers, json={"name": "   "}
+    )
     assert response.status_code == 200  # Should not update if name is only whitespace
     assert response.json["name"] == original_name
 
 
 # === Tests for DELETE /api/stages/<stage_id> ===
-def test_delete_stage_success(test_client, auth_headers, created_stage_data, db_session):
+def test_delete_stage_success(
+    test_client, auth_headers, created_stage_data, db_session
+):
     stage_id = created_stage_data["id"]
     headers = {"Authorization": auth_headers["Authorization"]}
 
@@ -193,7 +215,39 @@ def test_delete_stage_success(test_client, auth_headers, created_stage_data, db_
     assert response.status_code == 204
 
     stage_db = db_session.query(Stage).get(stage_id)
-    assert stage_db is None
+    assert stage_db.deleted_at is not None
+    assert (
+        test_client.get(
+            f"/api/projects/{created_stage_data['project_id']}/stages", headers=headers
+        ).json
+        == []
+    )
+
+
+def test_delete_stage_keeps_task_history(
+    test_client, auth_headers, created_task_data, db_session
+):
+    from backend.app.models import ActivityLog, Task
+    from backend.app.services.purge_service import purge_deleted
+
+    headers = {"Authorization": auth_headers["Authorization"]}
+    task_id = created_task_data["task_id"]
+
+    response = test_client.delete(
+        f"/api/stages/{created_task_data['stage_id']}", headers=headers
+    )
+    assert response.status_code == 204
+
+    assert db_session.query(Task).get(task_id).is_deleted
+    purge_deleted(db_session, datetime.utcnow())
+    assert db_session.query(Task).get(task_id) is None
+    # Task activity stays in the project history with its task reference
+    log = (
+        db_session.query(ActivityLog)
+        .filter_by(task_id=task_id, action_type="TASK_CREATED")
+        .one()
+    )
+    assert log.project_id == created_task_data["project_id"]
 
 
 def test_delete_stage_not_found(test_client, auth_headers):
@@ -203,7 +257,9 @@ def test_delete_stage_not_found(test_client, auth_headers):
     assert response.json["message"] == "Stage not found"
 
 
-def test_delete_stage_forbidden(test_client, created_stage_data, another_user_auth_headers_activity):
+def test_delete_stage_forbidden(
+    test_client, created_stage_data, another_user_auth_headers_activity
+):
     stage_id = created_stage_data["id"]
     other_user_headers = another_user_auth_headers_activity
     response = test_client.delete(f"/api/stages/{stage_id}", headers=other_user_headers)
@@ -0,0 +1,68 @@
+import os
+
+from sqlalchemy import create_engine, text
+
+from backend.app.startup import (
+    measure_startup,
+    migration_heads,
+    parse_importtime,
+    schema_is_current,
+)
+
+# Generous enough for a cold CI runner; eager heavyweight imports blow it.
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "2000"))
+
+
+def test_startup_stays_within_budget():
+    modules, summary = measure_startup("testing")
+    names = {module for module, _, _, _ in modules}
+
+    assert "backend.app" in names
+    # Migration tooling is only imported by `flask db`
+    assert not {name for name in names if name.split(".")[0] == "alembic"}
+    assert "flask_migrate" not in names
+    assert set(summary["phases"]) == {"config", "extensions", "blueprints", "cli"}
+    assert summary["wall_ms"] < STARTUP_BUDGET_MS, summary
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   encodings.idna\n"
+        "import time:      3056 |     120643 | backend.app\n"
+    )
+    assert parse_importtime(output) == [
+        ("encodings.idna", 120, 120, 1),
+        ("backend.app", 3056, 120643, 0),
+    ]
+
+
+def test_schema_is_current_compares_alembic_version_with_heads():
+    heads = migration_heads()
+    assert len(heads) == 1
+
+    engine = create_engine("sqlite://")
+    assert not schema_is_current(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+        conn.execute(text("INSERT INTO alembic_version VALUES ('1ecf5ab54880')"))
+    assert not schema_is_current(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE alembic_version SET version_num = :head"),
+            {"head": next(iter(heads))},
+        )
+    assert schema_is_current(engine)
+
+
+def test_cli_commands(test_app):
+    runner = test_app.test_cli_runner()
+
+    # The test database is built with create_all and never stamped
+    result = runner.invoke(args=["schema-status"])
+    assert result.exit_code == 1
+    assert "Upgrade required." in result.output
+
+    result = runner.invoke(args=["db", "--help"])
+    assert result.exit_code == 0
+    assert "upgrade" in result.output
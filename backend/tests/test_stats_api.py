@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+
+
+def _add_task(test_client, headers, stage_id, content, **fields):
+    response = test_client.post(
+        f"/api/stages/{stage_id}/tasks",
+        headers=headers,
+        json={"content": content, **fields},
+    )
+    assert response.status_code == 201
+    return response.json["id"]
+
+
+def test_get_project_stats(test_client, auth_headers, created_task_data, db_session):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_id = created_task_data["project_id"]
+    stage_id = created_task_data["stage_id"]
+    other_stage = test_client.post(
+        f"/api/projects/{project_id}/stages", headers=headers, json={"name": "Done"}
+    ).json["id"]
+
+    now = datetime.utcnow()
+    _add_task(
+        test_client,
+        headers,
+        stage_id,
+        "Late",
+        priority="High",
+        assignee="ana",
+        due_date=(now - timedelta(days=1)).isoformat(),
+    )
+    soon_id = _add_task(
+        test_client,
+        headers,
+        stage_id,
+        "Soon",
+        priority="High",
+        due_date=(now + timedelta(days=2)).isoformat(),
+    )
+    _add_task(
+        test_client,
+        headers,
+        other_stage,
+        "Later",
+        priority="Low",
+        assignee="ana",
+        due_date=(now + timedelta(days=30)).isoformat(),
+    )
+    for content, completed in (("a", True), ("b", False), ("c", True)):
+        response = test_client.post(
+            f"/api/tasks/{soon_id}/subtasks",
+            headers=headers,
+            json={"content": content, "completed": completed},
+        )
+        assert response.status_code == 201
+
+    response = test_client.get(f"/api/projects/{project_id}/stats", headers=headers)
+    assert response.status_code == 200
+    stats = response.json
+    assert stats["project_id"] == project_id
+    assert stats["total_tasks"] == 4
+    assert [(s["stage_id"], s["task_count"]) for s in stats["stages"]] == [
+        (stage_id, 3),
+        (other_stage, 1),
+    ]
+    assert stats["overdue"] == 1
+    assert stats["due_soon"] == 1
+    assert stats["priorities"] == {"High": 2, "Low": 1, "none": 1}
+    assert stats["assignees"] == {"ana": 2, "unassigned": 2}
+    assert stats["subtasks"] == {"total": 3, "completed": 2, "completion_ratio": 0.6667}
+
+    response = test_client.get(
+        f"/api/projects/{project_id}/stats?due_soon_days=60", headers=headers
+    )
+    assert response.json["due_soon"] == 2
+
+
+def test_get_project_stats_not_found_and_forbidden(
+    test_client, auth_headers, created_project_data, db_session
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    assert (
+        test_client.get("/api/projects/999999/stats", headers=headers).status_code
+        == 404
+    )
+
+    test_client.post(
+        "/api/auth/register",
+        json={
+            "username": "statsother",
+            "email": "statsother@example.com",
+            "password": "pw123456",
+        },
+    )
+    token = test_client.post(
+        "/api/auth/login",
+        json={"email": "statsother@example.com", "password": "pw123456"},
+    ).json["access_token"]
+    response = test_client.get(
+        f"/api/projects/{created_project_data['id']}/stats",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 403
+
+
+def test_get_all_projects_stats_uses_fixed_query_count(
+    test_client, auth_headers, db_session, query_budget
+):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    project_ids = []
+    for i in range(3):
+        project_id = test_client.post(
+            "/api/projects", headers=headers, json={"name": f"Stats {i}"}
+        ).json["id"]
+        stage_id = test_client.post(
+            f"/api/projects/{project_id}/stages", headers=headers, json={"name": "Todo"}
+        ).json["id"]
+        for j in range(i + 1):
+            _add_task(test_client, headers, stage_id, f"Task {j}")
+        project_ids.append(project_id)
+
+    with query_budget(6):
+        response = test_client.get("/api/projects/stats", headers=headers)
+    assert response.status_code == 200
+    by_id = {stats["project_id"]: stats for stats in response.json}
+    assert [by_id[project_id]["total_tasks"] for project_id in project_ids] == [1, 2, 3]
+    assert by_id[project_ids[0]]["subtasks"]["completion_ratio"] is None
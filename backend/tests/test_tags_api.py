@@ -64,7 +64,9 @@ def test_create_tag_missing_name(test_client, auth_headers):
         "/api/tags", headers=headers, json={"name": "   "}
     )
     assert response_empty.status_code == 422  # Should also be 422 as per route logic
-    assert response_empty.json.get("message") == "Tag name is required and cannot be empty"
+    assert (
+        response_empty.json.get("message") == "Tag name is required and cannot be empty"
+    )
 
 
 # POST /api/tasks/<task_id>/tags
@@ -142,16 +144,17 @@ def test_add_tag_to_task_by_id_and_name(
     assert len(response_add_again.json["tags"]) == 2  # Count should not change
 
 
-def test_add_tag_to_task_invalid_input(
-    test_client, auth_headers, created_task_data
-):
+def test_add_tag_to_task_invalid_input(test_client, auth_headers, created_task_data):
     headers = {"Authorization": auth_headers["Authorization"]}
     task_id = created_task_data["task_id"]
 
     # No tag_id or tag_name - this might also be caught as 422 if payload is truly empty by a global handler
     response = test_client.post(f"/api/tasks/{task_id}/tags", headers=headers, json={})
     assert response.status_code == 422
-    assert response.json.get("message") == "Either tag_name (non-empty) or tag_id is required"
+    assert (
+        response.json.get("message")
+        == "Either tag_name (non-empty) or tag_id is required"
+    )
 
     # Non-existent tag_id
     response_bad_id = test_client.post(
@@ -181,9 +184,7 @@ def test_add_tag_to_task_unauthorized(
 
 
 # DELETE /api/tasks/<task_id>/tags/<tag_id>
-def test_remove_tag_from_task(
-    test_client, auth_headers, created_task_data, db_session
-):
+def test_remove_tag_from_task(test_client, auth_headers, created_task_data, db_session):
     headers = {"Authorization": auth_headers["Authorization"]}
     task_id = created_task_data["task_id"]
     project_id = created_task_data["project_id"]
@@ -391,3 +392,61 @@ def test_add_tag_by_mixed_case_name(
     tag_db_check = db_session.query(Tag).filter_by(id=added_tag_info["id"]).first()
     assert tag_db_check is not None
     assert tag_db_check.name == new_mixed_name
+
+
+# GET /api/tags caching
+def test_tag_list_etag_and_revalidation(test_client, auth_headers, created_task_data):
+    headers = {"Authorization": auth_headers["Authorization"]}
+    first = test_client.get("/api/tags", headers=headers)
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, max-age=60"
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    unchanged = test_client.get("/api/tags", headers={**headers, "If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.data == b""
+
+    # Creating a tag, directly or through a task, moves the generation on
+    test_client.post("/api/tags", headers=headers, json={"name": "Fresh"})
+    created = test_client.get("/api/tags", headers={**headers, "If-None-Match": etag})
+    assert created.status_code == 200 and created.headers["ETag"] != etag
+    assert "Fresh" in [tag["name"] for tag in created.json]
+
+    test_client.post(
+        f"/api/tasks/{created_task_data['task_id']}/tags",
+        headers=headers,
+        json={"tag_name": "ViaTask"},
+    )
+    via_task = test_client.get(
+        "/api/tags", headers={**headers, "If-None-Match": created.headers["ETag"]}
+    )
+    assert via_task.status_code == 200
+    assert "ViaTask" in [tag["name"] for tag in via_task.json]
+
+
+def test_tag_list_memo_skips_the_database_between_checks(test_app, query_budget):
+    from backend.app.services.tag_service import TagListMemo
+
+    clock = [100.0]
+    memo = TagListMemo(clock=lambda: clock[0])
+    with test_app.test_request_context():
+        first = memo.get(check_interval=5)
+        with query_budget(0):
+            assert memo.get(check_interval=5) == first
+        clock[0] += 5
+        with query_budget(1):  # Generation only; the list is unchanged
+            assert memo.get(check_interval=5) == first
+
+
+def test_tag_change_clears_the_memo_when_it_commits(test_app, db_session):
+    from backend.app.services.tag_service import tag_list_memo, tags_changed
+
+    with test_app.test_request_context():
+        tag_list_memo.get(check_interval=60)
+        db_session.add(Tag(name="Pending"))
+        tags_changed()
+        # A concurrent reader memoizes the list before the change is visible
+        tag_list_memo._entry = (0, "stale", b"[]")
+        db_session.commit()
+        _, body = tag_list_memo.get(check_interval=60)
+    assert b"Pending" in body
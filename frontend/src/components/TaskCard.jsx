@@ -57,7 +57,11 @@ const TaskCard = ({ task, onEditTask }) => {
       {task.assignee && <p style={detailStyle}>Assignee: {task.assignee}</p>}
       <p style={detailStyle}>Due: {formatDate(task.due_date)}</p>
       <p style={priorityStyle}>Priority: {task.priority || 'Medium'}</p>
-      {/* Display other task details like subtasks count, comments count if available */}
+      {task.subtask_count > 0 && (
+        <p style={detailStyle}>
+          Subtasks: {task.completed_subtask_count}/{task.subtask_count}
+        </p>
+      )}
       {/* task.tags should be an array of tag objects */}
       {task.tags && task.tags.length > 0 && (
         <div style={{ marginTop: '5px' }}>
@@ -107,6 +107,21 @@ describe('TaskCard', () => {
     expect(screen.queryByText('Urgent')).not.toBeInTheDocument();
   });
 
+  it('renders subtask progress from the counts on the card', () => {
+    const taskWithSubtasks = {
+      ...mockTaskBase,
+      subtask_count: 3,
+      completed_subtask_count: 2,
+    };
+    render(<TaskCard task={taskWithSubtasks} onEditTask={mockOnEditTask} />);
+    expect(screen.getByText('Subtasks: 2/3')).toBeInTheDocument();
+  });
+
+  it('does not render subtask progress without subtasks', () => {
+    render(<TaskCard task={mockTaskBase} onEditTask={mockOnEditTask} />);
+    expect(screen.queryByText(/Subtasks:/)).not.toBeInTheDocument();
+  });
+
   it('calls onEditTask when Edit button is clicked', () => {
     render(<TaskCard task={mockTaskBase} onEditTask={mockOnEditTask} />);
     const editButton = screen.getByRole('button', { name: 'Edit' });
@@ -5,17 +5,24 @@ import './HomePage.css'; // Create this for styling
 
 const HomePage = () => {
   const [projects, setProjects] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [isCreateModalOpen, setIsCreateModalOpen] = useState(false);
   const [newProjectName, setNewProjectName] = useState('');
   const [newProjectDescription, setNewProjectDescription] = useState('');
 
-  const fetchProjects = async () => {
-    setLoading(true);
+  // Pages through the project list; a cursor appends the next page
+  const fetchProjects = async (cursor = null) => {
+    if (!cursor) setLoading(true);
     try {
-      const response = await apiClient.get('/projects');
-      setProjects(response.data);
+      const response = await apiClient.get('/projects', {
+        params: cursor ? { include: 'counts', cursor } : { include: 'counts' },
+      });
+      setProjects((previous) =>
+        cursor ? [...previous, ...response.data] : response.data,
+      );
+      setNextCursor(response.headers['x-next-cursor'] || null);
       setError(null);
     } catch (err) {
       setError(err.response?.data?.message || 'Failed to fetch projects.');
@@ -80,6 +87,14 @@ const HomePage = () => {
                 <p className="project-description">
                   {project.description || 'No description'}
                 </p>
+                {project.counts && (
+                  <p className="project-counts">
+                    {project.counts.stages} stages · {project.counts.tasks}{' '}
+                    tasks
+                    {project.counts.overdue > 0 &&
+                      ` · ${project.counts.overdue} overdue`}
+                  </p>
+                )}
                 <span className="project-created-at">
                   Created: {new Date(project.created_at).toLocaleDateString()}
                 </span>
@@ -88,6 +103,14 @@ const HomePage = () => {
           ))}
         </ul>
       )}
+      {nextCursor && (
+        <button
+          onClick={() => fetchProjects(nextCursor)}
+          className="load-more-button"
+        >
+          Load more
+        </button>
+      )}
 
       {isCreateModalOpen && (
         <div className="modal-overlay">
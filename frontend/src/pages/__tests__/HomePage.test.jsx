@@ -66,6 +66,43 @@ describe('HomePage', () => {
     expect(projectLinks[1]).toHaveAttribute('href', '/project/2');
   });
 
+  it('shows project counts and loads further pages', async () => {
+    const requests = [];
+    server.use(
+      http.get('/api/projects', ({ request }) => {
+        const params = new URL(request.url).searchParams;
+        requests.push(Object.fromEntries(params));
+        if (params.get('cursor') === 'page-2') {
+          return HttpResponse.json([{ ...mockProjects[1], id: 3 }]);
+        }
+        return HttpResponse.json(
+          [
+            {
+              ...mockProjects[0],
+              counts: { stages: 3, tasks: 12, overdue: 2 },
+            },
+          ],
+          { headers: { 'X-Next-Cursor': 'page-2' } },
+        );
+      }),
+    );
+    renderHomePage();
+    expect(
+      await screen.findByText('3 stages · 12 tasks · 2 overdue'),
+    ).toBeInTheDocument();
+
+    await userEvent.click(screen.getByRole('button', { name: 'Load more' }));
+    expect(await screen.findByText('Project Y')).toBeInTheDocument();
+    expect(screen.getByText('Project X')).toBeInTheDocument();
+    expect(
+      screen.queryByRole('button', { name: 'Load more' }),
+    ).not.toBeInTheDocument();
+    expect(requests).toEqual([
+      { include: 'counts' },
+      { include: 'counts', cursor: 'page-2' },
+    ]);
+  });
+
   it('displays an error message if fetching projects fails', async () => {
     server.use(
       http.get('/api/projects', () =>